@@ -0,0 +1,153 @@
+"""
+Admission control for the API.
+
+Many distinct cold filter combinations arriving together each become a
+cache leader (backend/cache.py) and run a full aggregation. Unbounded,
+they take every pooled connection and the cheap detail pages time out
+behind them. Two weighted limiters keep the load apart:
+
+  - `heavy`: aggregations on a cache miss (responses.cached_endpoint).
+    Each endpoint has a weight (the meta snapshot counts for more than a
+    ship page), and the weights in flight never exceed the capacity.
+  - `light`: the detail routers (pilot, ship, squadron, list), through
+    the `light_slot` dependency. Heavy work cannot use this capacity.
+
+A request that does not fit waits in a short FIFO queue; when the queue
+is full, or the wait exceeds the limiter's max_wait, it fails fast with
+AdmissionRejected, which main.py answers with 503 + Retry-After. Cache
+hits and requests following an in-flight computation never take a slot.
+
+Usage:
+    with heavy.slot(weight=2):
+        rows = aggregate_list_stats(filters)
+
+State is per process; `GET /api/admission` reports each limiter's
+capacity, slots in use, queue depth and admitted/rejected counts.
+"""
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+ADMISSION_ENABLED = os.getenv("ADMISSION", "1") != "0"
+
+
+class AdmissionRejected(Exception):
+    """A limiter's queue was full, or the wait for a slot timed out."""
+
+    def __init__(self, limiter: str, retry_after: int):
+        super().__init__(f"{limiter} capacity exhausted")
+        self.limiter = limiter
+        self.retry_after = retry_after
+
+
+class WeightedLimiter:
+    """
+    Thread-safe weighted semaphore with a bounded FIFO wait queue.
+
+    Waiters are admitted in arrival order, so a heavy request at the head
+    of the queue is not starved by lighter ones slipping past it.
+    """
+
+    def __init__(self, name: str, capacity: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+        self.admitted = 0
+        self.rejected = 0
+        self._in_use = 0
+        self._queue: deque[object] = deque()
+        self._cond = threading.Condition()
+
+    def _reject(self) -> AdmissionRejected:
+        self.rejected += 1
+        return AdmissionRejected(self.name, retry_after=max(1, round(self.max_wait)))
+
+    def acquire(self, weight: int = 1) -> int:
+        """Take `weight` units (capped at the capacity); returns the units
+        taken, to be passed to release(). Raises AdmissionRejected."""
+        if not ADMISSION_ENABLED:
+            return 0
+        weight = min(max(weight, 1), self.capacity)
+        with self._cond:
+            if not self._queue and self._in_use + weight <= self.capacity:
+                self._in_use += weight
+                self.admitted += 1
+                return weight
+            if len(self._queue) >= self.max_queue:
+                raise self._reject()
+
+            ticket = object()
+            self._queue.append(ticket)
+            deadline = time.monotonic() + self.max_wait
+            try:
+                while self._queue[0] is not ticket or self._in_use + weight > self.capacity:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._reject()
+                    self._cond.wait(remaining)
+                self._in_use += weight
+                self.admitted += 1
+                return weight
+            finally:
+                self._queue.remove(ticket)
+                # The next waiter may now be at the head of the queue.
+                self._cond.notify_all()
+
+    def release(self, weight: int) -> None:
+        if not weight:
+            return
+        with self._cond:
+            self._in_use -= weight
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, weight: int = 1) -> Iterator[None]:
+        taken = self.acquire(weight)
+        try:
+            yield
+        finally:
+            self.release(taken)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "name": self.name,
+                "capacity": self.capacity,
+                "in_use": self._in_use,
+                "queued": len(self._queue),
+                "max_queue": self.max_queue,
+                "max_wait_seconds": self.max_wait,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+            }
+
+
+# Heavy capacity stays well under the DB pool (pool_size 10 + overflow 20)
+# and the API worker threads (database.API_WORKER_THREADS), so light
+# requests always find a connection.
+heavy = WeightedLimiter(
+    "heavy",
+    capacity=int(os.getenv("ADMISSION_HEAVY_CAPACITY", "8")),
+    max_queue=int(os.getenv("ADMISSION_HEAVY_QUEUE", "16")),
+    max_wait=float(os.getenv("ADMISSION_HEAVY_WAIT_SECONDS", "3")),
+)
+light = WeightedLimiter(
+    "light",
+    capacity=int(os.getenv("ADMISSION_LIGHT_CAPACITY", "16")),
+    max_queue=int(os.getenv("ADMISSION_LIGHT_QUEUE", "64")),
+    max_wait=float(os.getenv("ADMISSION_LIGHT_WAIT_SECONDS", "5")),
+)
+
+
+def light_slot() -> Iterator[None]:
+    """FastAPI dependency: hold a light slot for the request."""
+    with light.slot():
+        yield
+
+
+def admission_stats() -> list[dict]:
+    return [heavy.stats(), light.stats()]
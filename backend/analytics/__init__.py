@@ -21,14 +21,27 @@ FILE MAP
   squadrons.py     — Squadron analytics (/squadrons page). GROUP BY list.ship_list.
   ships.py         — Ship analytics (/ships page). Uses pilot_ship_mapping table.
   factions.py      — Faction aggregations + get_meta_snapshot for the dashboard.
-  charts.py        — Time-series chart data (legacy, full table scan — not yet
-                     converted to use the list table).
+  snapshot.py      — Single-pass dashboard snapshot: materializes the 90-day
+                     fact set once (temp tables) and derives every breakdown.
+  charts.py        — Time-series chart data. Reads the card_usage cube and
+                     list_card co-presence; falls back to a full scan only
+                     for location / player-count / faction filters.
+  rollups.py       — Maintenance of the rollup tables (list_card,
+                     card_usage) — called by the scraper and migrations.
   filters.py       — Legacy `filter_query` (SQLAlchemy ORM query builder).
                      Most analytics files now build WHERE clauses by hand
                      for performance; this is used by API detail endpoints.
-  filter_helpers.py — Shared SQL-clause helpers: ship_list_filter_clause and
-                      format_filter_clause. Eliminates duplication between
-                      lists.py, squadrons.py, and the API detail endpoints.
+  filter_helpers.py — Shared SQL-clause helpers: WhereBuilder (the WHERE
+                      clause of lists, squadrons, ships and core),
+                      ship_list_filter_clause and format_filter_clause.
+                      Emits canonical statement text with array
+                      parameters, so repeated filter shapes reuse cached
+                      and prepared statements.
+  dialects.py      — SQL fragments that differ between Postgres and an
+                     embedded SQLite file (arrays, JSON expansion,
+                     GREATEST). lists, squadrons, ships and core take them
+                     from sql_dialect(); prepare_embedded_db builds the
+                     SQLite helper tables.
 
 =============================================================================
 DATA MODEL
@@ -0,0 +1,258 @@
+"""
+Precompiled card catalog for Phase 1 of aggregate_card_stats.
+
+The pilot/upgrade catalog is static between data updates, so everything
+the Phase 1 filter derives per card (int costs and stats, normalized
+faction, size, legality flags, upgrade types, lowercased search text) is
+computed once per (data source, mode) into columns. Every filter is then
+a bitmask over card positions: bit i is set when the i-th catalog card
+passes. Python ints serve as the bit vectors, so combining filters is a
+handful of big-int ANDs/ORs instead of a per-card loop:
+
+  - equality filters (faction, ship, size, type) read a precomputed
+    value → mask index;
+  - range filters (cost, loadout, hull, ...) read cumulative "value <= v"
+    masks and bisect, so a range is two lookups and one AND;
+  - text search scans one concatenated lowercase document for the whole
+    catalog with str.find, and maps hit offsets back to card positions.
+
+Card order (and so the order of filter_card_catalog's result dict) is the
+catalog's own iteration order.
+"""
+from bisect import bisect_left, bisect_right
+
+from ..data_structures.data_source import DataSource
+from ..utils.xwing_data.pilots import load_all_pilots
+from ..utils.xwing_data.upgrades import load_all_upgrades
+
+# Separates fields and cards in the search document; never part of a
+# search string, so matches cannot straddle two fields or two cards.
+_SEP = "\x00"
+
+_LEGACY_FORMATS = {"legacy_x2po", "legacy_xlc", "ffg", "legacy_pandorum"}
+_SIZE_CODES = {"S": "Small", "M": "Medium", "L": "Large", "H": "Huge"}
+
+
+def _normalize_faction(value: str) -> str:
+    return value.lower().replace(" ", "").replace("-", "")
+
+
+class _RangeColumn:
+    """Integer column with cumulative masks for O(log k) range filters."""
+
+    def __init__(self, values: list[int]):
+        by_value: dict[int, int] = {}
+        for i, v in enumerate(values):
+            by_value[v] = by_value.get(v, 0) | (1 << i)
+        self._values = sorted(by_value)
+        self._le_masks = []
+        acc = 0
+        for v in self._values:
+            acc |= by_value[v]
+            self._le_masks.append(acc)
+
+    def _le(self, bound: int) -> int:
+        """Mask of cards with value <= bound."""
+        k = bisect_right(self._values, bound) - 1
+        return self._le_masks[k] if k >= 0 else 0
+
+    def between(self, lo: int, hi: int) -> int:
+        """Mask of cards with lo <= value <= hi."""
+        k = bisect_left(self._values, lo) - 1
+        below = self._le_masks[k] if k >= 0 else 0
+        return self._le(hi) & ~below
+
+
+def _index_by(keys_per_card) -> dict:
+    """{key: mask} for an iterable of per-card key collections."""
+    index: dict = {}
+    for i, keys in enumerate(keys_per_card):
+        bit = 1 << i
+        for key in keys:
+            index[key] = index.get(key, 0) | bit
+    return index
+
+
+class CardCatalogIndex:
+    """Columnar, bitmask-indexed view of one pilot or upgrade catalog."""
+
+    def __init__(self, catalog: dict, mode: str):
+        self.mode = mode
+        self.ids: list[str] = list(catalog)
+        self.all = (1 << len(self.ids)) - 1
+
+        infos = list(catalog.values())
+        self.legal = self._flag_mask(infos, "valid_in_standard")
+        self.wildspace = self._flag_mask(infos, "wildspace")
+        self.epic = self._flag_mask(infos, "epic")
+
+        if mode == "pilots":
+            self._compile_pilots(infos)
+        else:
+            self._compile_upgrades(infos)
+
+        # One lowercase document for the whole catalog; doc_starts[i] is
+        # the offset of card i.
+        self.doc_starts: list[int] = []
+        parts = []
+        pos = 0
+        for text in self._search_texts:
+            self.doc_starts.append(pos)
+            parts.append(text)
+            pos += len(text) + 1
+        self.document = _SEP.join(parts)
+        del self._search_texts
+
+    @staticmethod
+    def _flag_mask(infos: list[dict], key: str) -> int:
+        mask = 0
+        for i, info in enumerate(infos):
+            if info.get(key, False):
+                mask |= 1 << i
+        return mask
+
+    def _compile_pilots(self, infos: list[dict]) -> None:
+        self.cost = _RangeColumn([int(p.get("cost", 0) or 0) for p in infos])
+        self.loadout = _RangeColumn([int(p.get("loadout", 0) or 0) for p in infos])
+        self.hull = _RangeColumn([int(p.get("hull") or 0) for p in infos])
+        self.shields = _RangeColumn([int(p.get("shields") or 0) for p in infos])
+        self.agility = _RangeColumn([int(p.get("agility") or 0) for p in infos])
+        self.attack = _RangeColumn([int(p.get("attack") or 0) for p in infos])
+        self.initiative = _RangeColumn([int(p.get("initiative") or 0) for p in infos])
+        self.by_size = _index_by([p.get("size", "Small")] for p in infos)
+        self.by_faction = _index_by(
+            [_normalize_faction(p.get("faction", ""))] for p in infos
+        )
+        self.by_ship = _index_by([p.get("ship_xws", "")] for p in infos)
+        self._search_texts = [
+            _SEP.join((
+                p.get("name", xws).lower(),
+                p.get("ability", "").lower(),
+                p.get("ship", "").lower(),
+                p.get("caption", "").lower(),
+            ))
+            for xws, p in zip(self.ids, infos)
+        ]
+
+    def _compile_upgrades(self, infos: list[dict]) -> None:
+        costs = []
+        factions = []
+        types = []
+        texts = []
+        for xws, u in zip(self.ids, infos):
+            costs.append(int(
+                u.get("cost", {}).get("value", 0)
+                if isinstance(u.get("cost"), dict)
+                else (u.get("cost") or 0)
+            ))
+            factions.append({
+                _normalize_faction(f)
+                for r in u.get("restrictions", [])
+                if "factions" in r
+                for f in r["factions"]
+            })
+            u_types = set()
+            sides = u.get("sides", [])
+            if sides and isinstance(sides, list):
+                for side in sides:
+                    if "type" in side:
+                        u_types.add(side["type"].lower())
+            elif "type" in u:
+                u_types.add(u["type"].lower())
+            types.append(u_types)
+            if sides:
+                u_text = "".join(" " + side.get("ability", "").lower() for side in sides)
+            else:
+                u_text = u.get("text", "").lower()
+            texts.append(u.get("name", xws).lower() + _SEP + u_text)
+
+        self.cost = _RangeColumn(costs)
+        self.by_faction = _index_by(factions)
+        self.unrestricted = 0
+        for i, fs in enumerate(factions):
+            if not fs:
+                self.unrestricted |= 1 << i
+        self.by_type = _index_by(types)
+        self._search_texts = texts
+
+    # --- Filter building blocks ------------------------------------------
+
+    @staticmethod
+    def any_of(index: dict, keys) -> int:
+        mask = 0
+        for key in keys:
+            mask |= index.get(key, 0)
+        return mask
+
+    def text_mask(self, needle: str) -> int:
+        """Cards whose searchable text contains the lowercase `needle`."""
+        if not needle:
+            return self.all
+        doc = self.document
+        starts = self.doc_starts
+        mask = 0
+        pos = doc.find(needle)
+        while pos != -1:
+            card = bisect_right(starts, pos) - 1
+            mask |= 1 << card
+            # Skip to the next card: one hit is enough.
+            if card + 1 >= len(starts):
+                break
+            pos = doc.find(needle, starts[card + 1])
+        return mask
+
+    def format_mask(
+        self,
+        allowed_formats: list[str],
+        data_source: DataSource,
+        include_epic: bool,
+    ) -> int:
+        """Format legality, as in the original per-card `show_card` logic."""
+        if allowed_formats:
+            mask = 0
+            if "xwa" in allowed_formats or "amg" in allowed_formats:
+                mask |= self.legal
+            if "wildspace" in allowed_formats:
+                mask |= self.wildspace
+            if "xwa_epic" in allowed_formats or "legacy_epic" in allowed_formats:
+                mask |= self.epic
+            if data_source == DataSource.LEGACY and not _LEGACY_FORMATS.isdisjoint(allowed_formats):
+                mask |= self.legal
+        else:
+            mask = self.legal
+        # Explicit "include epic" flag (e.g. a Huge ship's detail page):
+        # show the epic-flagged card regardless of the format selection.
+        if include_epic:
+            mask |= self.epic
+        return mask
+
+    def size_mask(self, base_sizes: dict) -> int:
+        active_sizes = [s for s, v in base_sizes.items() if v]
+        if not active_sizes:
+            return self.all
+        return self.any_of(self.by_size, {_SIZE_CODES.get(s, s) for s in active_sizes})
+
+    def selected(self, mask: int) -> list[str]:
+        """Card ids for the set bits of `mask`, in catalog order."""
+        ids = self.ids
+        out = []
+        while mask:
+            low = mask & -mask
+            out.append(ids[low.bit_length() - 1])
+            mask ^= low
+        return out
+
+
+# (data_source, mode) -> (catalog dict the index was built from, index).
+# Keyed on the dict's identity so a hot-reloaded catalog is recompiled.
+_indexes: dict[tuple[DataSource, str], tuple[dict, CardCatalogIndex]] = {}
+
+
+def get_catalog_index(data_source: DataSource, mode: str) -> CardCatalogIndex:
+    """The compiled catalog for (data_source, mode), built on first use."""
+    catalog = load_all_pilots(data_source) if mode == "pilots" else load_all_upgrades(data_source)
+    entry = _indexes.get((data_source, mode))
+    if entry is None or entry[0] is not catalog:
+        entry = (catalog, CardCatalogIndex(catalog, mode))
+        _indexes[(data_source, mode)] = entry
+    return entry[1]
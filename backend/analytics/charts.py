@@ -1,45 +1,194 @@
 """
 Card Usage Charts Analytics.
+
+Usage history is served from the maintained `card_usage` cube (daily
+counts per card, see analytics/rollups.py) with a `list_card` self-join for
+the comparison series. Filters the cube cannot express (location, player
+count, faction) fall back to the legacy full scan over playerstanding.
+
+Both paths count standings with the team rule of the other analytics,
+`(NOT t.is_team_event OR ps.is_team_member)`: team members count, team
+placeholder rows do not.
 """
-from datetime import datetime, timedelta
+from datetime import date
 from collections import defaultdict
 from sqlmodel import Session, select
-from ..database import engine
+from sqlalchemy import text
+from ..database import read_engine, stream_rows
 from ..models import PlayerStanding, Tournament
-from ..data_structures.formats import Format
 from ..utils.list_keys import coerce_list_json
 from .filters import filter_query, apply_tournament_filters
 
+USAGE_GRANULARITIES = ("week", "month", "quarter")
+
+# Filter keys that are not dimensions of the card_usage cube. Any of them
+# being set forces the legacy scan.
+_SCAN_ONLY_FILTERS = (
+    "continent", "country", "city",
+    "player_count_min", "player_count_max",
+    "factions",
+)
+
+
+def bucket_label(d: date, granularity: str = "month") -> str:
+    """
+    Chart label for the bucket containing `d`.
+
+    month → "2023-01", quarter → "2023-Q1", week → ISO date of the Monday
+    starting the week ("2023-01-02"), matching Postgres date_trunc('week').
+    """
+    if granularity == "week":
+        return date.fromordinal(d.toordinal() - d.weekday()).isoformat()
+    if granularity == "quarter":
+        return f"{d.year}-Q{(d.month - 1) // 3 + 1}"
+    return d.strftime("%Y-%m")
+
+
 def get_card_usage_history(
     filters: dict,
     main_card_xws: str,
     comparison_xws_list: list[str] = [],
-    is_upgrade: bool = False # False = Pilot, True = Upgrade
+    is_upgrade: bool = False, # False = Pilot, True = Upgrade
+    granularity: str = "month",
 ) -> list[dict]:
     """
     Get usage history for a main card and optional comparison cards.
-    Aggregates by month.
-    
+    Aggregates by week, month or quarter (`granularity`).
+
+    The main series counts standings whose list contains the main card; each
+    comparison series counts standings whose list contains BOTH the main
+    card and the comparison card (pilot or upgrade).
+
     Returns list of dicts:
     [
       {"date": "2023-01", "main_card": 10, "comp1": 5, ...},
       ...
     ]
     """
-    with Session(engine) as session:
-        query = select(PlayerStanding, Tournament).where(PlayerStanding.tournament_id == Tournament.id)
-        query = filter_query(query, filters)
-        rows = session.exec(query).all()
-        
-        # Structure: date_key -> {card_xws -> count}
-        # Date key: YYYY-MM
-        history = defaultdict(lambda: defaultdict(int))
-        
-        all_tracked_cards = {main_card_xws} | set(comparison_xws_list)
-        
-        allowed_formats = filters.get("allowed_formats")
-
-        for result, tournament in rows:
+    if granularity not in USAGE_GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+
+    if any(filters.get(k) for k in _SCAN_ONLY_FILTERS):
+        history = _scan_usage_history(
+            filters, main_card_xws, comparison_xws_list, is_upgrade, granularity
+        )
+    else:
+        history = _cube_usage_history(
+            filters, main_card_xws, comparison_xws_list, is_upgrade, granularity
+        )
+
+    # Format for Recharts
+    # Sort by date
+    chart_data = []
+    for d in sorted(history.keys()):
+        entry = {"date": d}
+        counts = history[d]
+        entry[main_card_xws] = counts[main_card_xws]
+        for comp in comparison_xws_list:
+            entry[comp] = counts[comp]
+        chart_data.append(entry)
+
+    return chart_data
+
+
+def _cube_usage_history(
+    filters: dict,
+    main_card_xws: str,
+    comparison_xws_list: list[str],
+    is_upgrade: bool,
+    granularity: str,
+) -> dict[str, dict[str, int]]:
+    """
+    Indexed range reads against card_usage (main series) and list_card
+    (co-presence of each comparison card with the main card).
+    """
+    params: dict = {
+        "grain": granularity,
+        "kind": "upgrade" if is_upgrade else "pilot",
+        "main": main_card_xws,
+    }
+    cube_where = ["cu.card_kind = :kind", "cu.card_xws = :main"]
+    t_where = ["(NOT t.is_team_event OR ps.is_team_member)"]
+
+    if filters.get("date_start"):
+        params["date_start"] = date.fromisoformat(str(filters["date_start"]))
+        cube_where.append("cu.day >= :date_start")
+        t_where.append("t.date >= :date_start")
+    if filters.get("date_end"):
+        params["date_end"] = date.fromisoformat(str(filters["date_end"]))
+        cube_where.append("cu.day <= :date_end")
+        t_where.append("t.date <= :date_end")
+
+    sources = filters.get("sources") or filters.get("platforms")
+    if sources:
+        params["sources"] = list(sources)
+        cube_where.append("cu.source = ANY(:sources)")
+        t_where.append("t.source = ANY(:sources)")
+
+    allowed_formats = filters.get("allowed_formats")
+    if allowed_formats:
+        params["formats"] = list(allowed_formats)
+        cube_where.append("cu.format = ANY(:formats)")
+        t_where.append("COALESCE(t.format, 'unknown') = ANY(:formats)")
+
+    main_sql = text(f"""
+        SELECT date_trunc(:grain, cu.day)::date AS bucket, SUM(cu.entries)
+        FROM card_usage cu
+        WHERE {" AND ".join(cube_where)}
+        GROUP BY bucket
+    """)
+
+    history: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    with Session(read_engine()) as session:
+        for bucket, entries in session.execute(main_sql, params).fetchall():
+            history[bucket_label(bucket, granularity)][main_card_xws] += int(entries or 0)
+
+        if comparison_xws_list and history:
+            # Comparison cards may be pilots or upgrades — match either kind
+            # and count each standing once per comparison card.
+            params["comparisons"] = list(comparison_xws_list)
+            comp_sql = text(f"""
+                SELECT date_trunc(:grain, t.date)::date AS bucket,
+                       b.card_xws,
+                       COUNT(DISTINCT ps.id)
+                FROM list_card a
+                JOIN list_card b
+                  ON b.list_id = a.list_id AND b.card_xws = ANY(:comparisons)
+                JOIN playerstanding ps ON ps.list_id = a.list_id
+                JOIN tournament t ON t.id = ps.tournament_id
+                WHERE a.card_kind = :kind AND a.card_xws = :main
+                  AND {" AND ".join(t_where)}
+                GROUP BY bucket, b.card_xws
+            """)
+            for bucket, comp_xws, entries in session.execute(comp_sql, params).fetchall():
+                label = bucket_label(bucket, granularity)
+                if label in history:
+                    history[label][comp_xws] += int(entries or 0)
+
+    return history
+
+
+def _scan_usage_history(
+    filters: dict,
+    main_card_xws: str,
+    comparison_xws_list: list[str],
+    is_upgrade: bool,
+    granularity: str,
+) -> dict[str, dict[str, int]]:
+    """
+    Legacy path: scan every matching PlayerStanding and parse its list_json.
+    Only used for filters the cube has no dimension for (see
+    _SCAN_ONLY_FILTERS).
+    """
+    # Structure: bucket label -> {card_xws -> count}
+    history = defaultdict(lambda: defaultdict(int))
+
+    allowed_formats = filters.get("allowed_formats")
+
+    query = select(PlayerStanding, Tournament).where(PlayerStanding.tournament_id == Tournament.id)
+    query = filter_query(query, filters)
+    with Session(read_engine()) as session:
+        for result, tournament in stream_rows(session, query):
             # Format Check
             t_fmt_raw = tournament.format
             t_fmt = t_fmt_raw.value if hasattr(t_fmt_raw, 'value') else (t_fmt_raw or "unknown")
@@ -49,85 +198,44 @@ def get_card_usage_history(
             # Location Filtering
             if not apply_tournament_filters(tournament, filters):
                 continue
-                
-            date_key = tournament.date.strftime("%Y-%m")
+
+            # Team filter — same rule as the cube and the other analytics.
+            if tournament.is_team_event and not result.is_team_member:
+                continue
+
+            date_key = bucket_label(tournament.date, granularity)
             xws = coerce_list_json(result.list_json)
             if not xws:
                 continue
-            
-            # Check presence of tracked cards in the list
-            found_cards = set()
-            
-            for p in xws.get("pilots", []):
-                pid = p.get("id") or p.get("name")
-                
-                # Check Pilot
-                if not is_upgrade:
-                    if pid in all_tracked_cards:
-                        found_cards.add(pid)
-                        
-                # Check Upgrade (if main card is upgrade OR we are comparing upgrades)
-                # Actually, complexity:
-                # 1. Main card is Pilot -> Comparisons are upgrades (usage on that pilot?) or other pilots?
-                # Assumption: Comparisons are of the SAME type generally, but user asked for "combination".
-                # If Pilot Page: Chart shows Pilot Usage. Comparison? 
-                # User request: "having the possibility to select other cards, I would like to see how much the selected cards were used in time... in combination with the card of which the page is open".
-                # Ah! So if I am on Pilot X page.
-                # Chart Line 1: Pilot X usage total? Or just Pilot X?
-                # User: "graph of how much that card (upgrade/pilot) was used over time" -> Base line.
-                # "select other cards... see how much they were used... in combination with the card".
-                # So Line 2 (Upgrade Y): Usage of Pilot X + Upgrade Y.
-                
-                # Implementation Logic:
-                # 1. Always check if Main Card is present.
-                # 2. If Main Card is present, increment "Usage".
-                # 3. If Main Card is present, Check for Comparison Cards in the SAME list.
-                # 4. If Comparison Card is present (AND Main Card is present), increment "Combo Usage".
-                
-                # We need to scan the whole list first to confirm Main Card presence.
-                pass
-            
-            # Efficient Scan
+
             # Flatten List to set of XWS IDs
             list_pilots = set()
             list_upgrades = set()
-            
+
             for p in xws.get("pilots", []):
                 pid = p.get("id") or p.get("name")
                 if pid: list_pilots.add(pid)
-                
+
                 upgrades = p.get("upgrades", {}) or {}
-                for u_list in upgrades.values():
-                    for u in u_list:
-                        list_upgrades.add(u)
-                        
+                if isinstance(upgrades, dict):
+                    for u_list in upgrades.values():
+                        if isinstance(u_list, list):
+                            list_upgrades.update(u_list)
+                elif isinstance(upgrades, list):
+                    list_upgrades.update(upgrades)
+
             # Check Main Card Presence
-            main_present = False
             if not is_upgrade:
                 main_present = main_card_xws in list_pilots
             else:
                 main_present = main_card_xws in list_upgrades
-            
+
             if main_present:
-                # Increment Main Card
                 history[date_key][main_card_xws] += 1
-                
-                # Check Comparisons
+
+                # Comparisons count only in combination with the main card.
                 for comp_xws in comparison_xws_list:
-                    # Comparison could be pilot or upgrade. Check both.
                     if comp_xws in list_pilots or comp_xws in list_upgrades:
                         history[date_key][comp_xws] += 1
-                        
-        # Format for Recharts
-        # Sort by date
-        sorted_dates = sorted(history.keys())
-        chart_data = []
-        for d in sorted_dates:
-            entry = {"date": d}
-            counts = history[d]
-            entry[main_card_xws] = counts[main_card_xws]
-            for comp in comparison_xws_list:
-                entry[comp] = counts[comp]
-            chart_data.append(entry)
-            
-        return chart_data
+
+    return history
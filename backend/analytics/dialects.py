@@ -0,0 +1,239 @@
+"""
+SQL dialects for the analytics queries.
+
+The list, squadron, ship and card aggregations are written once; the few
+pieces that differ between database engines come from the dialect of the
+database the API reads from:
+
+  - PostgresSQL: production. List parameters bind as arrays (`= ANY`,
+    `@>`, `&&`), list JSON is expanded with the jsonb functions.
+  - SQLiteSQL: an embedded single-file database (test.db, a seed or demo
+    file), so a small mirror or an offline node serves /api/lists,
+    /api/cards/*, /api/ships and tournament detail from one local file. List parameters bind
+    as JSON text (bind_list) and are expanded with json_each, like the
+    list JSON (JSON1, SQLite >= 3.38 for `->>`).
+
+sql_dialect() picks the dialect of database.engine. The SQLite path also
+needs the pilot_ship_mapping helper table, which prepare_embedded_db()
+materializes from the card catalog.
+"""
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresSQL:
+    name = "postgresql"
+
+    def bind_list(self, values) -> object:
+        """Bound value of a list parameter (any_of, ship_list_match)."""
+        return list(values)
+
+    def any_of(self, column: str, param: str) -> str:
+        """`column` equals one of the list parameter `param`."""
+        return f"{column} = ANY(:{param})"
+
+    def ship_list_match(self, column: str, param: str, mode: str) -> str:
+        """The comma-joined `column` holds all ("all") or at least one
+        ("any") of the ships in `param`."""
+        # As an array, "contains ship X" is one operator instead of
+        # = / LIKE 'X,%' / '%,X,%' / '%,X'.
+        op = "@>" if mode == "all" else "&&"
+        return f"(string_to_array({column}, ',') {op} CAST(:{param} AS text[]))"
+
+    def nonneg(self, expr: str) -> str:
+        return f"GREATEST(0, {expr})"
+
+    def ilike(self, column: str, param: str) -> str:
+        return f"{column} ILIKE :{param}"
+
+    def pilot_elements(self, json_column: str, alias: str) -> str:
+        """FROM item with one row per element of `json_column`->'pilots'."""
+        return f"jsonb_array_elements({json_column}::jsonb->'pilots') {alias}"
+
+    def element(self, alias: str) -> str:
+        """The JSON value of a pilot_elements() row."""
+        return alias
+
+    def distinct_array_agg(self, column: str) -> str:
+        """Aggregate: the distinct non-NULL values of `column` (see load_array)."""
+        return f"array_remove(array_agg(DISTINCT {column}), NULL)"
+
+    def load_array(self, value) -> list:
+        return value or []
+
+    def load_json(self, value):
+        return value
+
+    def json_text_if_array(self, column: str, key: str) -> str:
+        """`column` as JSON text when its `key` holds a non-empty array,
+        else NULL."""
+        return (
+            f"CASE WHEN jsonb_typeof({column}->'{key}') = 'array' "
+            f"AND jsonb_array_length({column}->'{key}') > 0 THEN {column}::text END"
+        )
+
+    def has_upgrade(self, pilot: str, param: str) -> str:
+        """The pilot JSON `pilot` has the upgrade `param`. `upgrades` may be
+        an object ({"talent": ["predator"], ...}), an array, or missing;
+        each shape is guarded with jsonb_typeof before unnesting so
+        jsonb_each never runs on a non-object."""
+        return (
+            f"(jsonb_typeof({pilot}->'upgrades') = 'object' AND "
+            f"EXISTS (SELECT 1 FROM jsonb_each({pilot}->'upgrades') e, "
+            "jsonb_array_elements_text(e.value) u "
+            f"WHERE jsonb_typeof(e.value) = 'array' AND u = :{param})) "
+            "OR "
+            f"(jsonb_typeof({pilot}->'upgrades') = 'array' AND "
+            f"EXISTS (SELECT 1 FROM jsonb_array_elements_text({pilot}->'upgrades') u "
+            f"WHERE u = :{param}))"
+        )
+
+    def upgrade_rows(self, source: str, columns: str) -> str:
+        """SELECT of `columns` plus `u_elem`, one row per upgrade id of the
+        pilot JSON column `p` of `source`."""
+        return f"""
+            SELECT {columns}, u_elem
+            FROM (
+                SELECT {columns},
+                    CASE
+                        WHEN jsonb_typeof(p->'upgrades') = 'array' THEN p->'upgrades'
+                        WHEN jsonb_typeof(p->'upgrades') = 'object' THEN
+                            COALESCE(
+                                (SELECT jsonb_agg(v)
+                                 FROM jsonb_each(p->'upgrades') e,
+                                      jsonb_array_elements_text(e.value) v
+                                 WHERE jsonb_typeof(e.value) = 'array'),
+                                '[]'::jsonb
+                            )
+                        ELSE '[]'::jsonb
+                    END as upgrades_json
+                FROM {source}
+            ) uv, jsonb_array_elements_text(uv.upgrades_json) u_elem
+        """
+
+    # Shared aggregates over playerstanding result columns.
+
+    def wins_sum(self, prefix: str = "ps.") -> str:
+        g = self.nonneg
+        return f"SUM({g(f'COALESCE({prefix}swiss_wins, 0)')} + {g(f'COALESCE({prefix}cut_wins, 0)')})"
+
+    def games_sum(self, prefix: str = "ps.") -> str:
+        terms = " + ".join(
+            self.nonneg(f"COALESCE({prefix}{col}, 0)")
+            for col in ("swiss_wins", "swiss_losses", "swiss_draws", "cut_wins", "cut_losses", "cut_draws")
+        )
+        return f"SUM({terms})"
+
+
+class SQLiteSQL(PostgresSQL):
+    name = "sqlite"
+
+    def bind_list(self, values) -> object:
+        return json.dumps(list(values))
+
+    def any_of(self, column: str, param: str) -> str:
+        return f"{column} IN (SELECT value FROM json_each(:{param}))"
+
+    def ship_list_match(self, column: str, param: str, mode: str) -> str:
+        # instr() on the comma-delimited list: one probe per selected ship.
+        found = f"instr(',' || {column} || ',', ',' || s.value || ',')"
+        if mode == "all":
+            return f"NOT EXISTS (SELECT 1 FROM json_each(:{param}) s WHERE {found} = 0)"
+        return f"EXISTS (SELECT 1 FROM json_each(:{param}) s WHERE {found} > 0)"
+
+    def nonneg(self, expr: str) -> str:
+        return f"MAX(0, {expr})"
+
+    def ilike(self, column: str, param: str) -> str:
+        # LIKE is case-insensitive for ASCII in SQLite.
+        return f"{column} LIKE :{param}"
+
+    def pilot_elements(self, json_column: str, alias: str) -> str:
+        return f"json_each({json_column}, '$.pilots') {alias}"
+
+    def element(self, alias: str) -> str:
+        return f"{alias}.value"
+
+    def distinct_array_agg(self, column: str) -> str:
+        return f"json_group_array(DISTINCT {column}) FILTER (WHERE {column} IS NOT NULL)"
+
+    def load_array(self, value) -> list:
+        # array_agg(DISTINCT) comes back sorted; json_group_array does not.
+        return sorted(json.loads(value)) if value else []
+
+    def load_json(self, value):
+        return json.loads(value) if isinstance(value, str) else value
+
+    def json_text_if_array(self, column: str, key: str) -> str:
+        return (
+            f"CASE WHEN json_type({column}, '$.{key}') = 'array' "
+            f"AND json_array_length({column}, '$.{key}') > 0 THEN {column} END"
+        )
+
+    def has_upgrade(self, pilot: str, param: str) -> str:
+        return (
+            f"EXISTS (SELECT 1 FROM json_each({pilot}, '$.upgrades') e "
+            f"WHERE (json_type({pilot}, '$.upgrades') = 'array' AND e.value = :{param}) "
+            f"OR (json_type({pilot}, '$.upgrades') = 'object' AND e.type = 'array' "
+            "AND EXISTS (SELECT 1 FROM json_each(CASE WHEN e.type = 'array' THEN e.value ELSE '[]' END) u "
+            f"WHERE u.value = :{param})))"
+        )
+
+    def upgrade_rows(self, source: str, columns: str) -> str:
+        return f"""
+            SELECT {columns}, u.value AS u_elem
+            FROM {source}, json_each({source}.p, '$.upgrades') e,
+                 json_each(CASE WHEN e.type = 'array' THEN e.value ELSE '[]' END) u
+            WHERE json_type({source}.p, '$.upgrades') = 'object' AND e.type = 'array'
+            UNION ALL
+            SELECT {columns}, e.value AS u_elem
+            FROM {source}, json_each({source}.p, '$.upgrades') e
+            WHERE json_type({source}.p, '$.upgrades') = 'array'
+        """
+
+
+POSTGRES = PostgresSQL()
+SQLITE = SQLiteSQL()
+
+
+def sql_dialect() -> PostgresSQL:
+    """The dialect of the API's database (replicas share the primary's)."""
+    from ..database import engine
+
+    return SQLITE if engine.dialect.name == "sqlite" else POSTGRES
+
+
+_PILOT_SHIP_MAPPING_DDL = """
+    CREATE TABLE IF NOT EXISTS pilot_ship_mapping (
+        pilot_xws TEXT NOT NULL,
+        source TEXT NOT NULL,
+        ship_xws TEXT NOT NULL,
+        PRIMARY KEY (pilot_xws, source)
+    )
+"""
+
+
+def prepare_embedded_db(engine) -> None:
+    """Create and fill the helper tables of an SQLite analytics database.
+
+    pilot_ship_mapping (the ships and cards pages join it) is managed
+    outside this repo on Postgres; here it is materialized from the card
+    catalog when empty. A no-op on other engines.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    from sqlalchemy import text
+
+    from ..scripts.populate_pilot_ship_mapping import populate
+
+    with engine.begin() as conn:
+        conn.execute(text(_PILOT_SHIP_MAPPING_DDL))
+        filled = conn.execute(text("SELECT 1 FROM pilot_ship_mapping LIMIT 1")).first()
+    if filled:
+        return
+    try:
+        populate(engine)
+    except Exception as e:
+        logger.warning("pilot_ship_mapping not filled (card catalog unavailable?): %s", e)
@@ -1,15 +1,31 @@
 """
 Faction Analytics - Aggregation Logic for Factions.
 """
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from sqlmodel import Session, select, func
 import json
-from ..database import engine
+from ..database import engine, read_engine, stream_rows
 from ..models import PlayerStanding, Tournament
 from ..data_structures.factions import Faction
 from ..data_structures.data_source import DataSource
 from .filters import filter_query, get_active_formats, apply_tournament_filters
 from ..utils.list_keys import get_list_key
 
+logger = logging.getLogger(__name__)
+
+# "single_pass" (default), "parallel" or "sequential" — see get_meta_snapshot.
+META_SNAPSHOT_MODE = os.getenv("META_SNAPSHOT_MODE", "single_pass")
+# Parallel mode: pool size (one DB connection per busy worker; keep well
+# below the engine's pool_size + max_overflow) and per-part time budget.
+META_SNAPSHOT_WORKERS = int(os.getenv("META_SNAPSHOT_WORKERS", "6"))
+META_SNAPSHOT_TIMEOUT_SECONDS = float(os.getenv("META_SNAPSHOT_TIMEOUT_SECONDS", "60"))
+
 def aggregate_faction_stats(
     filters: dict,
     data_source: DataSource = DataSource.XWA
@@ -18,13 +34,13 @@ def aggregate_faction_stats(
     Aggregate statistics per faction.
     Returns list of dicts matching FactionStats schema.
     """
-    with Session(engine) as session:
+    with Session(read_engine()) as session:
         # Load tournament results
         query = select(PlayerStanding, Tournament).where(
             PlayerStanding.tournament_id == Tournament.id
         )
         query = filter_query(query, filters)
-        rows = session.exec(query).all()
+        rows = stream_rows(session, query)
         
         faction_stats = {}
         
@@ -115,14 +131,26 @@ def get_meta_snapshot(
 ) -> dict:
     """
     Get meta snapshot data for home page.
-    Combines aggregated statistics from factions, ships, lists, pilots, and upgrades.
+    Combines aggregated statistics from factions, ships, lists, pilots, and
+    upgrades over the last 90 days, plus tournament/player totals.
+
+    Execution is selected by the META_SNAPSHOT_MODE env var:
+      - "single_pass" (default): analytics/snapshot.py materializes the
+        filtered fact set once and derives every breakdown from it.
+      - "parallel": runs each page aggregation on its own pooled
+        connection via a bounded thread pool (META_SNAPSHOT_WORKERS), with a
+        per-part budget (META_SNAPSHOT_TIMEOUT_SECONDS). Failed or timed-out
+        parts are served empty and named in the "degraded" key.
+      - "sequential": runs each page aggregation on its own, one after the
+        other (the original behaviour; also used automatically for
+        "single_pass" on non-Postgres engines).
     """
     from datetime import datetime, timedelta
-    
+
     # 90 days range
     days_back = 90
     date_str = (datetime.now() - timedelta(days=days_back)).strftime("%Y-%m-%d")
-    
+
     filters = {
         "date_start": date_str,
         "include_epic": include_epic,
@@ -132,12 +160,24 @@ def get_meta_snapshot(
         filters["allowed_formats"] = get_active_formats(allowed_formats)
     else:
         filters["allowed_formats"] = ["xwa"] if data_source == DataSource.XWA else ["legacy_x2po"]
-    
-    faction_stats = aggregate_faction_stats(filters, data_source)
-    
-    from .ships import aggregate_ship_stats
-    ship_stats = aggregate_ship_stats(filters, data_source=data_source)
-    
+
+    if META_SNAPSHOT_MODE == "single_pass" and engine.dialect.name == "postgresql":
+        from .snapshot import compute_meta_snapshot
+        parts = {**compute_meta_snapshot(filters, data_source), "degraded": []}
+    elif META_SNAPSHOT_MODE == "parallel":
+        parts = _parallel_snapshot(filters, data_source)
+    else:
+        parts = _sequential_snapshot(filters, data_source)
+
+    return {
+        **parts,
+        "last_sync": datetime.now().strftime("%Y-%m-%d"),
+        "date_range": "Last 90 Days",
+    }
+
+
+def _snapshot_lists(filters: dict, data_source: DataSource) -> list[dict]:
+    """List stats for the snapshot, with pilots attached."""
     from .lists import aggregate_list_stats, fetch_list_pilots
     list_stats = aggregate_list_stats(filters, data_source=data_source)
 
@@ -146,44 +186,151 @@ def get_meta_snapshot(
     # of lists, so fetch pilots just for those.
     list_signatures: list[str] = [l["signature"] for l in list_stats if l.get("signature")]
     list_pilots = fetch_list_pilots(list_signatures) if list_signatures else {}
-    list_stats = [
+    return [
         {**l, "pilots": list_pilots.get(l["signature"], [])}
         for l in list_stats
         if l.get("signature")
     ]
-    
+
+
+def _snapshot_tasks(filters: dict, data_source: DataSource) -> dict[str, Callable]:
+    """The independent snapshot sub-aggregations, keyed by part name.
+
+    Each opens its own Session, so in parallel mode every part runs on its
+    own pooled connection.
+    """
+    from .ships import aggregate_ship_stats
     from .core import aggregate_card_stats
-    pilot_stats = aggregate_card_stats(filters, mode="pilots", data_source=data_source)
-    upgrade_stats = aggregate_card_stats(filters, mode="upgrades", data_source=data_source)
-    
-    total_games = sum(f["games_count"] for f in faction_stats)
-    total_lists = sum(f["list_count"] for f in faction_stats) # Approx total lists analyzed
-    
-    # Calculate stats for the snapshot range
-    # total_tournaments? we need to count them.
-    # aggregate functions don't return total tournaments.
-    # But we can query quickly here.
-    
-    with Session(engine) as session:
-        q_t = select(func.count(Tournament.id)).where(Tournament.date >= date_str)
-        q_p = select(func.count(PlayerStanding.id)).join(Tournament).where(Tournament.date >= date_str)
-        # Apply format filters
-        # Note: apply_tournament_filters is python side usually, but allowed_formats can be SQL if possible
-        # For simple counts we can approx or rely on aggregates.
-        # But wait, schemas.MetaSnapshotResponse needs total_tournaments and total_players.
-        
-        # Let's trust stats or query roughly.
-        total_tournaments = 0 # Placeholder if heavy
-        total_players = 0     # Placeholder
-    
+
     return {
-        "factions": faction_stats,
-        "ships": ship_stats,
-        "lists": list_stats,
-        "pilots": pilot_stats,
-        "upgrades": upgrade_stats,
-        "last_sync": datetime.now().strftime("%Y-%m-%d"),
-        "date_range": "Last 90 Days",
-        "total_tournaments": total_tournaments, # Should implement proper counting if needed
-        "total_players": total_players
+        "factions": lambda: aggregate_faction_stats(filters, data_source),
+        "ships": lambda: aggregate_ship_stats(filters, data_source=data_source),
+        "lists": lambda: _snapshot_lists(filters, data_source),
+        "pilots": lambda: aggregate_card_stats(filters, mode="pilots", data_source=data_source),
+        "upgrades": lambda: aggregate_card_stats(filters, mode="upgrades", data_source=data_source),
+        "totals": lambda: _snapshot_totals(filters),
+    }
+
+
+# Value served for a part that failed or timed out in parallel mode.
+_SNAPSHOT_FALLBACKS: dict[str, object] = {
+    "factions": [],
+    "ships": [],
+    "lists": [],
+    "pilots": [],
+    "upgrades": [],
+    "totals": (0, 0),
+}
+
+
+def _assemble_snapshot(parts: dict, degraded: list[str]) -> dict:
+    total_tournaments, total_players = parts["totals"]
+    return {
+        "factions": parts["factions"],
+        "ships": parts["ships"],
+        "lists": parts["lists"],
+        "pilots": parts["pilots"],
+        "upgrades": parts["upgrades"],
+        "total_tournaments": total_tournaments,
+        "total_players": total_players,
+        "degraded": degraded,
     }
+
+
+def _sequential_snapshot(filters: dict, data_source: DataSource) -> dict:
+    """Run each snapshot aggregation independently (one scan apiece).
+
+    The totals stay best-effort: when they fail the snapshot is served
+    with zero totals and "totals" listed under "degraded", so it is not
+    cached.
+    """
+    tasks = _snapshot_tasks(filters, data_source)
+    totals = tasks.pop("totals")
+    parts = {name: fn() for name, fn in tasks.items()}
+    degraded: list[str] = []
+    try:
+        parts["totals"] = totals()
+    except Exception as e:
+        logger.error(f"meta snapshot: 'totals' failed: {e}", exc_info=True)
+        parts["totals"] = _SNAPSHOT_FALLBACKS["totals"]
+        degraded.append("totals")
+    return _assemble_snapshot(parts, degraded)
+
+
+_snapshot_pool: ThreadPoolExecutor | None = None
+_snapshot_pool_lock = threading.Lock()
+
+
+def _get_snapshot_pool() -> ThreadPoolExecutor:
+    """Process-wide bounded pool shared by all parallel snapshots, so
+    concurrent cold snapshots cannot exceed META_SNAPSHOT_WORKERS
+    connections between them."""
+    global _snapshot_pool
+    with _snapshot_pool_lock:
+        if _snapshot_pool is None:
+            _snapshot_pool = ThreadPoolExecutor(
+                max_workers=META_SNAPSHOT_WORKERS,
+                thread_name_prefix="meta-snapshot",
+            )
+        return _snapshot_pool
+
+
+def _parallel_snapshot(filters: dict, data_source: DataSource) -> dict:
+    """
+    Fan the snapshot sub-aggregations out over the bounded pool.
+
+    Latency becomes max() of the parts instead of sum(). Each part has
+    META_SNAPSHOT_TIMEOUT_SECONDS from submission; a part that raises or
+    exceeds its budget is served with an empty fallback and listed under
+    "degraded" (the caller must not cache such a snapshot). A timed-out
+    query keeps running on its worker until the database returns — Python
+    threads cannot be interrupted — but the request no longer waits for it.
+    """
+    pool = _get_snapshot_pool()
+    started = time.monotonic()
+    # Each part runs in a copy of the caller's context, so the request's
+    # QueryScope (query profile, cancellation) covers the worker queries.
+    futures = {
+        name: pool.submit(contextvars.copy_context().run, fn)
+        for name, fn in _snapshot_tasks(filters, data_source).items()
+    }
+
+    parts: dict[str, object] = {}
+    degraded: list[str] = []
+    for name, future in futures.items():
+        remaining = started + META_SNAPSHOT_TIMEOUT_SECONDS - time.monotonic()
+        try:
+            parts[name] = future.result(timeout=max(0.0, remaining))
+        except FuturesTimeoutError:
+            future.cancel()
+            logger.warning(
+                f"meta snapshot: '{name}' exceeded {META_SNAPSHOT_TIMEOUT_SECONDS}s budget"
+            )
+            parts[name] = _SNAPSHOT_FALLBACKS[name]
+            degraded.append(name)
+        except Exception as e:
+            logger.error(f"meta snapshot: '{name}' failed: {e}", exc_info=True)
+            parts[name] = _SNAPSHOT_FALLBACKS[name]
+            degraded.append(name)
+
+    return _assemble_snapshot(parts, degraded)
+
+
+def _snapshot_totals(filters: dict) -> tuple[int, int]:
+    """Tournament and player counts for the snapshot window: every
+    tournament in it, with standings or not, and every standing."""
+    with Session(read_engine()) as session:
+        q_t = (
+            select(func.count(Tournament.id))
+            .where(Tournament.date >= filters["date_start"])
+            .where(Tournament.format.in_(filters["allowed_formats"]))
+        )
+        q_p = (
+            select(func.count(PlayerStanding.id))
+            .join(Tournament)
+            .where(Tournament.date >= filters["date_start"])
+            .where(Tournament.format.in_(filters["allowed_formats"]))
+        )
+        total_tournaments = session.exec(q_t).one_or_none() or 0
+        total_players = session.exec(q_p).one_or_none() or 0
+    return total_tournaments, total_players
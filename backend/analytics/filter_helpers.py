@@ -1,9 +1,34 @@
 """
-Shared SQL filter-clause helpers used by list/squadron analytics and detail
-endpoints. Centralises the ship and format filter fragments so the same
+Shared SQL filter-clause helpers used by list/squadron/ship/card analytics
+and detail endpoints. Centralises the WHERE fragments so the same
 behaviour is reused across files.
+
+Statement text is canonical: it depends only on which filters are set,
+never on their values or on how many values a list filter holds. Lists
+bind as one array parameter (`= ANY(:p)`, `@>`, `&&`) instead of one
+parameter (or four LIKE patterns) per element, and parameter names are
+fixed. A repeated filter shape is then the same statement to SQLAlchemy's
+compiled cache and to Postgres prepared statements (psycopg 3 prepares a
+statement after a few executions), so its parse/plan work is reused.
+
+Engine-specific fragments (arrays, GREATEST, JSON expansion) come from the
+SQL dialect of the database (dialects.py), so the same clauses serve
+Postgres and an embedded SQLite file.
 """
-from typing import Iterable
+import threading
+from typing import Callable, Iterable
+
+from .dialects import PostgresSQL, sql_dialect
+
+
+def _as_list(values) -> list:
+    if isinstance(values, str):
+        return [values]
+    return list(values)
+
+
+def _normalize_faction(value: str) -> str:
+    return value.lower().replace(" ", "").replace("-", "")
 
 
 def ship_list_filter_clause(
@@ -12,44 +37,33 @@ def ship_list_filter_clause(
     param_prefix: str = "ship",
     column: str = "l.ship_list",
     mode: str = "any",
+    dialect: PostgresSQL | None = None,
 ) -> str:
     """
     Build a WHERE-clause fragment that matches `column` (default `l.ship_list`,
     a sorted comma-joined ship string) against the given ships.
 
-    A ship is considered contained if it appears at the start, middle, or end
-    of the comma-joined list (4 LIKE patterns).
-
     `mode` controls how the per-ship containment predicates are combined:
-      - "any" (default): OR'd — matches when at least one selected ship is
-        present in the column. Used by the ships page (chassis catalog
-        "is one of" semantics).
-      - "all": AND'd — matches only when every selected ship is present.
-        Used by the squadrons and lists pages, where a squadron/list may
-        contain multiple chassis and the user wants the intersection.
-
-    Mutates `params` in place with the bound parameters. Returns an empty
-    string if no ships are provided (caller can decide to skip the clause).
+      - "any" (default): matches when at least one selected ship is
+        present in the column (array overlap, `&&`). Used by the ships
+        page (chassis catalog "is one of" semantics).
+      - "all": matches only when every selected ship is present (array
+        containment, `@>`). Used by the squadrons and lists pages, where a
+        squadron/list may contain multiple chassis and the user wants the
+        intersection.
+
+    Mutates `params` in place with one array parameter,
+    `<param_prefix>_list`. Returns an empty string if no ships are
+    provided (caller can decide to skip the clause).
     """
     if not ships:
         return ""
     if mode not in ("any", "all"):
         raise ValueError(f"ship_list_filter_clause: mode must be 'any' or 'all', got {mode!r}")
-    parts = []
-    for i, s in enumerate(ships):
-        key = f"{param_prefix}_{i}"
-        parts.append(
-            f"({column} = :{key} "
-            f"OR {column} LIKE :{key}_start "
-            f"OR {column} LIKE :{key}_mid "
-            f"OR {column} LIKE :{key}_end)"
-        )
-        params[key] = s
-        params[f"{key}_start"] = f"{s},%"
-        params[f"{key}_mid"] = f"%,{s},%"
-        params[f"{key}_end"] = f"%,{s}"
-    joiner = " AND " if mode == "all" else " OR "
-    return "(" + joiner.join(parts) + ")"
+    dialect = dialect or sql_dialect()
+    key = f"{param_prefix}_list"
+    params[key] = dialect.bind_list(dict.fromkeys(_as_list(ships)))
+    return dialect.ship_list_match(column, key, mode)
 
 
 def format_filter_clause(
@@ -83,10 +97,13 @@ def epic_ships_exclusion_clause(
     source,
     params: dict,
     column: str = "l.ship_list",
+    dialect: PostgresSQL | None = None,
 ) -> str:
     """
     Build a WHERE-clause fragment to exclude lists/squadrons containing Epic-only
     ships (ships that have no standard-legal pilots) when include_epic is False.
+
+    The ships bind as one array parameter, `epic_ships`.
     """
     if include_epic:
         return ""
@@ -96,30 +113,189 @@ def epic_ships_exclusion_clause(
     ships = load_all_ships(source)
     pilots = load_all_pilots(source)
 
-    epic_ships = []
-    for xws in ships:
-        ship_pilots = [p for p in pilots.values() if p.get("ship_xws") == xws]
-        if not any(p.get("valid_in_standard") for p in ship_pilots):
-            epic_ships.append(xws)
+    standard_ships = {p.get("ship_xws") for p in pilots.values() if p.get("valid_in_standard")}
+    epic_ships = sorted(xws for xws in ships if xws not in standard_ships)
 
     if not epic_ships:
         return ""
 
-    parts = []
-    for i, s in enumerate(epic_ships):
-        key = f"epic_ship_{i}"
-        parts.append(
-            f"({column} = :{key} "
-            f"OR {column} LIKE :{key}_start "
-            f"OR {column} LIKE :{key}_mid "
-            f"OR {column} LIKE :{key}_end)"
-        )
-        params[key] = s
-        params[f"{key}_start"] = f"{s},%"
-        params[f"{key}_mid"] = f"%,{s},%"
-        params[f"{key}_end"] = f"%,{s}"
+    dialect = dialect or sql_dialect()
+    params["epic_ships"] = dialect.bind_list(epic_ships)
+    # Always "NOT (<match>)", whatever shape the dialect's match has.
+    return f"NOT ({dialect.ship_list_match(column, 'epic_ships', 'any')})"
+
+
+class WhereBuilder:
+    """
+    WHERE clause plus its bound parameters, built from a `filters` dict.
+
+    The analytics aggregations (lists, squadrons, ships, cards) share the
+    tournament, faction, ship, team and epic filters through the methods
+    below; query-specific fragments go in with add(). Fragments appear in
+    call order, and every parameter name is fixed, so the text is the same
+    for every request with the same set of filters.
+
+        where = WhereBuilder()
+        where.tournament_filters(filters)
+        where.team_rule()
+        sql = text(f"... WHERE {where.sql()} ...")
+        session.execute(sql, where.params)
+    """
+
+    def __init__(
+        self, *clauses: str, params: dict | None = None, dialect: PostgresSQL | None = None
+    ):
+        self.clauses: list[str] = list(clauses)
+        self.params: dict = params if params is not None else {}
+        self.dialect = dialect or sql_dialect()
+
+    def add(self, clause: str, **params) -> None:
+        """Append `clause` (skipped when empty) and bind `params`."""
+        if clause:
+            self.clauses.append(clause)
+            self.params.update(params)
+
+    def sql(self) -> str:
+        return " AND ".join(self.clauses) if self.clauses else "1=1"
+
+    def tournament_filters(self, filters: dict, table_alias: str = "t") -> None:
+        """Date range, source, player count, location and format."""
+        t = table_alias
+        if filters.get("date_start"):
+            self.add(f"{t}.date >= :date_start", date_start=filters["date_start"])
+        if filters.get("date_end"):
+            self.add(f"{t}.date <= :date_end", date_end=filters["date_end"])
+        sources = filters.get("sources") or filters.get("platforms")
+        if sources:
+            self.add(self.dialect.any_of(f"{t}.source", "sources"), sources=self.dialect.bind_list(_as_list(sources)))
+        if filters.get("player_count_min") is not None:
+            self.add(f"{t}.player_count >= :pc_min", pc_min=int(filters["player_count_min"]))
+        if filters.get("player_count_max") is not None:
+            self.add(f"{t}.player_count <= :pc_max", pc_max=int(filters["player_count_max"]))
+
+        # Location filters — tournament.location is stored as JSON; access via
+        # JSONB ->> operator on the text representation of each sub-field.
+        if filters.get("continent"):
+            self.add(self.dialect.any_of(f"{t}.location->>'continent'", "continents"),
+                     continents=self.dialect.bind_list(_as_list(filters["continent"])))
+        if filters.get("country"):
+            self.add(self.dialect.any_of(f"{t}.location->>'country'", "countries"),
+                     countries=self.dialect.bind_list(_as_list(filters["country"])))
+        if filters.get("city"):
+            self.add(self.dialect.any_of(f"{t}.location->>'city'", "cities"),
+                     cities=self.dialect.bind_list(_as_list(filters["city"])))
+
+        formats = filters.get("allowed_formats")
+        if formats:
+            self.add(self.dialect.any_of(f"{t}.format", "formats"), formats=self.dialect.bind_list(_as_list(formats)))
 
-    return "NOT (" + " OR ".join(parts) + ")"
+    def faction_filter(self, factions, column: str = "l.faction_xws_normalized") -> None:
+        """Normalized faction keys ("Rebel Alliance" → "rebelalliance")."""
+        if not factions:
+            return
+        normalized = [_normalize_faction(f) for f in _as_list(factions) if f and f != "all"]
+        if normalized:
+            self.add(self.dialect.any_of(column, "factions"), factions=self.dialect.bind_list(normalized))
+
+    def ship_filter(self, ships, mode: str = "all", column: str = "l.ship_list") -> None:
+        self.add(ship_list_filter_clause(
+            ships, self.params, column=column, mode=mode, dialect=self.dialect
+        ))
+
+    def team_rule(self) -> None:
+        """Team events count member rows only, never team placeholders."""
+        self.add("(NOT t.is_team_event OR ps.is_team_member)")
+
+    def exclude_epic_ships(self, filters: dict, data_source, column: str = "l.ship_list") -> None:
+        """Unless filters["epic"] is set, drop lists with Epic-only ships."""
+        if not filters.get("epic", False):
+            self.add(epic_ships_exclusion_clause(
+                False, data_source, self.params, column, dialect=self.dialect
+            ))
 
 
 huge_ships_exclusion_clause = epic_ships_exclusion_clause
+
+
+# --- Approximate distinct counts --------------------------------------------
+# Opt-in HyperLogLog counting via the postgresql-hll extension
+# (`CREATE EXTENSION hll`). Sketches are mergeable and fixed-size, so the
+# GROUP BY no longer has to sort/hash every distinct value per group. When
+# the extension is not installed, callers silently get exact COUNT(DISTINCT).
+_hll_available: bool | None = None
+_hll_lock = threading.Lock()
+
+# hll hash function per value type of the counted column.
+_HLL_HASH_FUNCTIONS = {
+    "integer": "hll_hash_integer",
+    "bigint": "hll_hash_bigint",
+    "text": "hll_hash_text",
+}
+
+
+def hll_available() -> bool:
+    """True when the connected database has the `hll` extension installed.
+
+    Checked once per process; any error (SQLite, missing catalog access)
+    counts as unavailable.
+    """
+    global _hll_available
+    if _hll_available is None:
+        with _hll_lock:
+            if _hll_available is None:
+                from sqlalchemy import text
+                from ..database import read_engine
+                try:
+                    with read_engine().connect() as conn:
+                        _hll_available = bool(conn.execute(
+                            text("SELECT 1 FROM pg_extension WHERE extname = 'hll'")
+                        ).first())
+                except Exception:
+                    _hll_available = False
+    return _hll_available
+
+
+# Stats fields that come from COUNT(DISTINCT ...) and are estimated in
+# approximate mode.
+DISTINCT_FIELDS = ("entries_count", "different_lists_count", "list_count", "squadron_count")
+
+
+def with_exact_counts(
+    items: list[dict],
+    cache_key: str,
+    compute_exact: Callable[[list[str]], Iterable[dict]],
+) -> list[dict]:
+    """Replace the approximate distinct counts of the visible page with exact
+    ones. `compute_exact(page_ids)` returns exact stats rows for just those
+    xws ids; the result is cached per page under `cache_key`."""
+    if not items or not hll_available():
+        return items
+    from ..cache import get_cached_or_compute
+
+    page_ids = sorted(item["xws"] for item in items)
+
+    def compute():
+        wanted = set(page_ids)
+        return {row["xws"]: row for row in compute_exact(page_ids) if row["xws"] in wanted}
+
+    exact = get_cached_or_compute(f"{cache_key}|exact|{','.join(page_ids)}", compute)
+    return [
+        {**item, **{k: exact[item["xws"]][k] for k in DISTINCT_FIELDS}}
+        if item["xws"] in exact else item
+        for item in items
+    ]
+
+
+def distinct_count_expr(column: str, approx: bool = False, value_type: str = "integer") -> str:
+    """
+    SQL aggregate counting distinct values of `column`.
+
+    `approx=True` returns a HyperLogLog estimate (rounded to bigint) when the
+    hll extension is available; otherwise — and by default — an exact
+    COUNT(DISTINCT column). `value_type` picks the hll hash function
+    ("integer", "bigint" or "text").
+    """
+    if approx and hll_available():
+        hash_fn = _HLL_HASH_FUNCTIONS[value_type]
+        return f"ROUND(hll_cardinality(hll_add_agg({hash_fn}({column}))))::bigint"
+    return f"COUNT(DISTINCT {column})"
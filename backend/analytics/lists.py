@@ -47,16 +47,21 @@ iteration for canonicalization (~10-15s cold). Post-normalization, the GROUP
 BY runs on the ~63K list table rows. With caching (see backend/cache.py), the
 second request for the same filter set is instant.
 
-For lazy pagination, add LIMIT/OFFSET to the SQL below — the data is already
-fully filtered and aggregated.
+`aggregate_list_page` is the pushdown variant used by /api/lists: the same
+GROUP BY with min_games as HAVING, the points range in WHERE, ORDER BY the
+requested metric and keyset (cursor) pagination, so a page never pulls the
+full aggregation into Python. `count_list_stats` supplies the total.
 """
+import base64
+import json
 from sqlmodel import Session
 from sqlalchemy import text
-from ..database import engine
+from ..database import read_engine, stream_rows
 from ..data_structures.factions import Faction
 from ..data_structures.data_source import DataSource
 from ..api.formatters import _reformat_pilots
-from .filter_helpers import format_filter_clause, ship_list_filter_clause, huge_ships_exclusion_clause
+from .dialects import sql_dialect
+from .filter_helpers import WhereBuilder
 
 
 def aggregate_list_stats(
@@ -70,79 +75,11 @@ def aggregate_list_stats(
     No Python canonicalization needed — list.canonical_signature is
     pre-computed at insert time.
     """
-    where_clauses: list[str] = []
     params: dict = {}
+    where_sql = _list_where_sql(filters, data_source, params)
+    dialect = sql_dialect()
 
-    if filters.get("date_start"):
-        where_clauses.append("t.date >= :date_start")
-        params["date_start"] = filters["date_start"]
-    if filters.get("date_end"):
-        where_clauses.append("t.date <= :date_end")
-        params["date_end"] = filters["date_end"]
-    if filters.get("sources") or filters.get("platforms"):
-        sources = filters.get("sources") or filters.get("platforms", [])
-        if sources:
-            where_clauses.append("t.source = ANY(:sources)")
-            params["sources"] = list(sources)
-    if filters.get("player_count_min") is not None:
-        where_clauses.append("t.player_count >= :pc_min")
-        params["pc_min"] = int(filters["player_count_min"])
-    if filters.get("player_count_max") is not None:
-        where_clauses.append("t.player_count <= :pc_max")
-        params["pc_max"] = int(filters["player_count_max"])
-
-    # Location filters — tournament.location is stored as JSON; access via
-    # JSONB ->> operator on the text representation of each sub-field.
-    filter_continents = filters.get("continent")
-    if filter_continents:
-        where_clauses.append("t.location->>'continent' = ANY(:continents)")
-        params["continents"] = list(filter_continents)
-    filter_countries = filters.get("country")
-    if filter_countries:
-        where_clauses.append("t.location->>'country' = ANY(:countries)")
-        params["countries"] = list(filter_countries)
-    filter_cities = filters.get("city")
-    if filter_cities:
-        where_clauses.append("t.location->>'city' = ANY(:cities)")
-        params["cities"] = list(filter_cities)
-
-    fmt_clause = format_filter_clause(filters.get("allowed_formats"), params, leading_and=False)
-    if fmt_clause:
-        where_clauses.append(fmt_clause)
-
-    if filters.get("factions"):
-        facs = filters["factions"]
-        if isinstance(facs, (list, set)) and facs:
-            normalized = [
-                f.lower().replace(" ", "").replace("-", "") for f in facs
-            ]
-            where_clauses.append("l.faction_xws_normalized = ANY(:factions)")
-            params["factions"] = normalized
-
-    # Ship filter — accept both "ship" (singular, used by ship_detail.py)
-    # and "ships" (plural, used by the broader API surface).
-    #
-    # mode="all" → AND semantics: a list matches only when EVERY
-    # selected ship is present in its ship_list. Matches the
-    # squadrons page behavior: selecting X-wing + A-wing should
-    # return lists that contain BOTH, not the union.
-    ship_clause = ship_list_filter_clause(
-        filters.get("ship") or filters.get("ships"),
-        params,
-        mode="all",
-    )
-    if ship_clause:
-        where_clauses.append(ship_clause)
-
-    where_clauses.append("(NOT t.is_team_event OR ps.is_team_member)")
-    if not filters.get("epic", False):
-        huge_clause = huge_ships_exclusion_clause(False, data_source, params)
-        if huge_clause:
-            where_clauses.append(huge_clause)
-
-    where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
-
-    with Session(engine) as session:
+    with Session(read_engine()) as session:
         sql = text(
             f"""
             SELECT
@@ -152,12 +89,8 @@ def aggregate_list_stats(
                 l.name,
                 l.points,
                 COUNT(*) as entries,
-                SUM(
-                    GREATEST(0, COALESCE(ps.swiss_wins, 0)) + GREATEST(0, COALESCE(ps.swiss_losses, 0)) +
-                    GREATEST(0, COALESCE(ps.swiss_draws, 0)) + GREATEST(0, COALESCE(ps.cut_wins, 0)) +
-                    GREATEST(0, COALESCE(ps.cut_losses, 0)) + GREATEST(0, COALESCE(ps.cut_draws, 0))
-                ) as total_games,
-                SUM(GREATEST(0, COALESCE(ps.swiss_wins, 0)) + GREATEST(0, COALESCE(ps.cut_wins, 0))) as wins
+                {dialect.games_sum()} as total_games,
+                {dialect.wins_sum()} as wins
             FROM playerstanding ps
             JOIN tournament t ON t.id = ps.tournament_id
             JOIN list l ON l.id = ps.list_id
@@ -166,49 +99,224 @@ def aggregate_list_stats(
                      l.name, l.points
             """
         )
-        result = session.execute(sql, params).fetchall()
-
-    # Build result list — stats only. Pilots are NOT loaded here: pulling
-    # list_json for every row (51K+ rows, ~49MB) and reformatting all of
-    # them was the dominant cold-cache cost, yet pagination discards all
-    # but one page. Callers attach pilots for only the rows they return via
-    # fetch_list_pilots().
-    #
-    # Row tuple column order:
-    #   0 canonical_signature, 1 faction, 2 faction_xws_normalized,
-    #   3 name, 4 points, 5 entries, 6 total_games, 7 wins
-    final_list = []
-    for row in result:
-        faction = row[1] or "unknown"
-        try:
-            f_enum = Faction.from_xws(faction)
-        except (ValueError, AttributeError):
-            f_enum = Faction.UNKNOWN
-        wins = int(row[7] or 0)
-        games = int(row[6] or 0)
-        entries = int(row[5] or 0)
-        # win_rate as a percentage (0-100), one decimal place. Avoid
-        # division-by-zero — empty groups surface as 0.0.
-        win_rate = round((wins / games) * 100, 1) if games else 0.0
-        final_list.append({
-            "signature": row[0],
-            "name": row[3] or "",
-            "points": row[4] or 0,
-            "original_points": 0,
-            "faction_xws": f_enum,
-            "pilots": [],
-            "wins": wins,
-            "games": games,
-            "win_rate": win_rate,
-            "count": entries,
-            "entries": entries,
-            "entries_count": entries,
-        })
+        # Build result list — stats only. Pilots are NOT loaded here: pulling
+        # list_json for every row (51K+ rows, ~49MB) and reformatting all of
+        # them was the dominant cold-cache cost, yet pagination discards all
+        # but one page. Callers attach pilots for only the rows they return via
+        # fetch_list_pilots(). Rows are shaped as they stream in, so the raw
+        # result set is never held next to the shaped one.
+        final_list = [shape_list_row(row) for row in stream_rows(session, sql, params)]
 
     final_list.sort(key=lambda x: x["games"], reverse=True)
     return final_list
 
 
+def _list_where_sql(filters: dict, data_source: DataSource, params: dict) -> str:
+    """
+    WHERE clause shared by every list aggregation (full, paged, count).
+
+    Filters on tournament (date, source, player count, location, format),
+    list (faction, ships, points, epic exclusion) and the team rule.
+    Mutates `params` with the bound values.
+    """
+    where = WhereBuilder(params=params)
+    where.tournament_filters(filters)
+    where.faction_filter(filters.get("factions"))
+
+    # Ship filter — accept both "ship" (singular, used by ship_detail.py)
+    # and "ships" (plural, used by the broader API surface).
+    #
+    # mode="all" → AND semantics: a list matches only when EVERY
+    # selected ship is present in its ship_list. Matches the
+    # squadrons page behavior: selecting X-wing + A-wing should
+    # return lists that contain BOTH, not the union.
+    where.ship_filter(filters.get("ship") or filters.get("ships"), mode="all")
+
+    # Points range — list.points may be NULL (unknown cost), which the
+    # page treats as 0 points.
+    if filters.get("points_min") is not None:
+        where.add("COALESCE(l.points, 0) >= :points_min", points_min=int(filters["points_min"]))
+    if filters.get("points_max") is not None:
+        where.add("COALESCE(l.points, 0) <= :points_max", points_max=int(filters["points_max"]))
+
+    where.team_rule()
+    where.exclude_epic_ships(filters, data_source)
+    return where.sql()
+
+
+# Sort metric label (as sent by the frontend) → SQL expression over the
+# aggregated columns of _grouped_lists_sql. Mirrors api/lists._list_sort_key.
+_LIST_SORT_SQL = {
+    "Win Rate": "CASE WHEN agg.total_games > 0 THEN CAST(agg.wins AS DOUBLE PRECISION) / agg.total_games ELSE 0 END",
+    "Points Cost": "COALESCE(agg.points, 0)",
+    "Entries": "agg.entries",
+    "Lists": "agg.entries",
+    "Popularity": "agg.entries",
+}
+_DEFAULT_LIST_SORT_SQL = "agg.total_games"
+
+
+def _grouped_lists_sql(where_sql: str, filters: dict, params: dict) -> str:
+    """Per-list GROUP BY with `min_games` applied as HAVING."""
+    dialect = sql_dialect()
+    games_sum = dialect.games_sum()
+    having = ""
+    if filters.get("min_games"):
+        having = f"HAVING {games_sum} >= :min_games"
+        params["min_games"] = int(filters["min_games"])
+    return f"""
+        SELECT
+            l.canonical_signature,
+            l.faction,
+            l.faction_xws_normalized,
+            l.name,
+            l.points,
+            COUNT(*) as entries,
+            {games_sum} as total_games,
+            {dialect.wins_sum()} as wins
+        FROM playerstanding ps
+        JOIN tournament t ON t.id = ps.tournament_id
+        JOIN list l ON l.id = ps.list_id
+        WHERE {where_sql}
+        GROUP BY l.id, l.canonical_signature, l.faction, l.faction_xws_normalized,
+                 l.name, l.points
+        {having}
+    """
+
+
+def encode_list_cursor(sort_value, signature: str) -> str:
+    """Opaque keyset cursor: base64url JSON of [last sort value, signature]."""
+    raw = json.dumps([sort_value, signature], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_list_cursor(cursor: str) -> tuple[object, str]:
+    """Inverse of encode_list_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, signature = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(signature, str) or not isinstance(value, (int, float)):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return value, signature
+
+
+def aggregate_list_page(
+    filters: dict,
+    data_source: DataSource = DataSource.XWA,
+    sort_metric: str = "Games",
+    sort_direction: str = "desc",
+    limit: int = 20,
+    cursor: str | None = None,
+    offset: int = 0,
+) -> tuple[list[dict], str | None]:
+    """
+    One page of list stats with filtering, sorting and pagination pushed
+    into SQL (top-K sort instead of materializing every group in Python).
+
+    Honours `min_games` (HAVING) and `points_min` / `points_max` (WHERE) from
+    `filters`. Rows are ordered by the sort metric, then canonical_signature
+    ascending as a unique tiebreaker. Pagination is keyset-based when
+    `cursor` is given (from a previous call's next_cursor), otherwise
+    `offset`-based. Returns (rows, next_cursor); next_cursor is None on the
+    last page.
+    """
+    params: dict = {}
+    where_sql = _list_where_sql(filters, data_source, params)
+    grouped_sql = _grouped_lists_sql(where_sql, filters, params)
+
+    sort_sql = _LIST_SORT_SQL.get(sort_metric, _DEFAULT_LIST_SORT_SQL)
+    desc = sort_direction == "desc"
+    direction = "DESC" if desc else "ASC"
+
+    keyset_sql = ""
+    if cursor:
+        last_value, last_sig = decode_list_cursor(cursor)
+        params["cursor_value"] = last_value
+        params["cursor_sig"] = last_sig
+        cmp = "<" if desc else ">"
+        keyset_sql = (
+            f"WHERE ({sort_sql} {cmp} :cursor_value "
+            f"OR ({sort_sql} = :cursor_value AND agg.canonical_signature > :cursor_sig))"
+        )
+        offset = 0
+
+    # Fetch one extra row to know whether another page exists.
+    params["limit"] = limit + 1
+    params["offset"] = offset
+    sql = text(f"""
+        SELECT agg.*, {sort_sql} AS sort_value
+        FROM ({grouped_sql}) agg
+        {keyset_sql}
+        ORDER BY sort_value {direction}, agg.canonical_signature ASC
+        LIMIT :limit OFFSET :offset
+    """)
+
+    with Session(read_engine()) as session:
+        result = session.execute(sql, params).fetchall()
+
+    has_more = len(result) > limit
+    result = result[:limit]
+    items = [shape_list_row(row) for row in result]
+    for item in items:
+        item["points"] = item["points"] or 0
+
+    next_cursor = None
+    if has_more and result:
+        last = result[-1]
+        next_cursor = encode_list_cursor(last[-1], last[0])
+    return items, next_cursor
+
+
+def count_list_stats(
+    filters: dict,
+    data_source: DataSource = DataSource.XWA,
+) -> int:
+    """Number of list groups matching `filters` (incl. min_games / points)."""
+    params: dict = {}
+    where_sql = _list_where_sql(filters, data_source, params)
+    grouped_sql = _grouped_lists_sql(where_sql, filters, params)
+    with Session(read_engine()) as session:
+        return int(
+            session.execute(text(f"SELECT COUNT(*) FROM ({grouped_sql}) agg"), params).scalar() or 0
+        )
+
+
+def shape_list_row(row) -> dict:
+    """
+    Turn one list GROUP BY row into a ListStats dict (pilots left empty).
+
+    Row tuple column order:
+      0 canonical_signature, 1 faction, 2 faction_xws_normalized,
+      3 name, 4 points, 5 entries, 6 total_games, 7 wins
+    """
+    faction = row[1] or "unknown"
+    try:
+        f_enum = Faction.from_xws(faction)
+    except (ValueError, AttributeError):
+        f_enum = Faction.UNKNOWN
+    wins = int(row[7] or 0)
+    games = int(row[6] or 0)
+    entries = int(row[5] or 0)
+    # win_rate as a percentage (0-100), one decimal place. Avoid
+    # division-by-zero — empty groups surface as 0.0.
+    win_rate = round((wins / games) * 100, 1) if games else 0.0
+    return {
+        "signature": row[0],
+        "name": row[3] or "",
+        "points": row[4] or 0,
+        "original_points": 0,
+        "faction_xws": f_enum,
+        "pilots": [],
+        "wins": wins,
+        "games": games,
+        "win_rate": win_rate,
+        "count": entries,
+        "entries": entries,
+        "entries_count": entries,
+    }
+
 def fetch_list_pilots(signatures: list[str]) -> dict[str, list[dict]]:
     """Fetch + reformat pilots for a small set of list signatures.
 
@@ -219,15 +327,17 @@ def fetch_list_pilots(signatures: list[str]) -> dict[str, list[dict]]:
     if not signatures:
         return {}
 
-    with Session(engine) as session:
+    dialect = sql_dialect()
+    with Session(read_engine()) as session:
         sql = text(
             "SELECT canonical_signature, list_json FROM list "
-            "WHERE canonical_signature = ANY(:sigs)"
+            f"WHERE {dialect.any_of('canonical_signature', 'sigs')}"
         )
-        rows = session.execute(sql, {"sigs": list(set(signatures))}).fetchall()
+        rows = session.execute(sql, {"sigs": dialect.bind_list(set(signatures))}).fetchall()
 
     result: dict[str, list[dict]] = {}
     for sig, list_json in rows:
+        list_json = dialect.load_json(list_json)
         if list_json and isinstance(list_json, dict):
             result[sig] = _reformat_pilots(list_json.get("pilots", []))
         else:
@@ -0,0 +1,193 @@
+"""
+Maintained rollup tables for time-series analytics.
+
+Two tables back the card usage charts (see backend/models.py):
+
+  list_card   — one row per (list_id, card_kind, card_xws): the distinct
+                pilots and upgrades of every `list` row. Written
+                incrementally by the scraper right after the `list` insert.
+  card_usage  — counted player standings per (day, format, source,
+                card_kind, card_xws). Rebuilt wholesale from list_card at
+                the end of every scrape, before data_version is bumped.
+
+pilot_config (entries/wins per pilot loadout, format, source and month)
+backs the pilot configurations endpoint and is rebuilt at the same point.
+
+All are Postgres-only (jsonb functions, ON CONFLICT). Callers running
+against SQLite skip them, mirroring `_persist_list_rows` in the scraper.
+"""
+from collections.abc import Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlmodel import Session
+
+from ..database import engine
+
+# Upgrade xws ids of one pilot element `p` (jsonb). A pilot's `upgrades` may
+# be an object ({"talent": ["predator"]}), an array, or missing — each shape
+# is guarded with jsonb_typeof before unnesting (same approach as the
+# upgrades CTE in core.py).
+_PILOT_UPGRADES_SQL = """
+        SELECT v FROM jsonb_each(
+                CASE WHEN jsonb_typeof(p->'upgrades') = 'object'
+                     THEN p->'upgrades' ELSE '{}'::jsonb END
+            ) e,
+            jsonb_array_elements_text(
+                CASE WHEN jsonb_typeof(e.value) = 'array'
+                     THEN e.value ELSE '[]'::jsonb END
+            ) v
+        UNION ALL
+        SELECT v FROM jsonb_array_elements_text(
+            CASE WHEN jsonb_typeof(p->'upgrades') = 'array'
+                 THEN p->'upgrades' ELSE '[]'::jsonb END
+        ) v
+"""
+
+# Distinct (list_id, card_kind, card_xws) rows for the lists matched by
+# {scope}. Pilot ids fall back to `name` like the legacy chart scan did.
+_LIST_CARD_SELECT = """
+    SELECT DISTINCT l.id, 'pilot', COALESCE(NULLIF(p->>'id', ''), p->>'name')
+    FROM list l
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(l.list_json->'pilots') = 'array'
+             THEN l.list_json->'pilots' ELSE '[]'::jsonb END
+    ) p
+    WHERE {scope} AND COALESCE(NULLIF(p->>'id', ''), p->>'name') IS NOT NULL
+    UNION
+    SELECT DISTINCT l.id, 'upgrade', u
+    FROM list l
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(l.list_json->'pilots') = 'array'
+             THEN l.list_json->'pilots' ELSE '[]'::jsonb END
+    ) p
+    CROSS JOIN LATERAL ({pilot_upgrades}) up(u)
+    WHERE {scope} AND u IS NOT NULL AND u <> ''
+"""
+
+# Pilot loadouts per (pilot, upgrade signature, format, source, month). The
+# signature matches the former Python combo key of the configurations
+# endpoint: upgrade ids sorted by code point (COLLATE "C") joined with "|".
+_PILOT_CONFIG_INSERT = """
+    INSERT INTO pilot_config
+        (pilot_xws, upgrade_signature, format, source, month, entries, wins)
+    SELECT
+        p->>'id',
+        cfg.signature,
+        COALESCE(t.format, 'unknown'),
+        COALESCE(t.source, 'unknown'),
+        date_trunc('month', t.date)::date,
+        COUNT(*),
+        SUM(GREATEST(0, COALESCE(ps.swiss_wins, 0)) + GREATEST(0, COALESCE(ps.cut_wins, 0)))
+    FROM playerstanding ps
+    JOIN tournament t ON t.id = ps.tournament_id
+    JOIN list l ON l.id = ps.list_id
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(l.list_json->'pilots') = 'array'
+             THEN l.list_json->'pilots' ELSE '[]'::jsonb END
+    ) p
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(string_agg(u, '|' ORDER BY u COLLATE "C"), '') AS signature
+        FROM ({pilot_upgrades}) up(u)
+        WHERE u IS NOT NULL
+    ) cfg
+    WHERE p->>'id' IS NOT NULL
+      AND (NOT t.is_team_event OR ps.is_team_member)
+    GROUP BY 1, 2, 3, 4, 5
+"""
+
+
+def _is_sqlite(bind) -> bool:
+    return bind is not None and bind.dialect.name == "sqlite"
+
+
+def populate_list_cards(
+    session: Session, list_ids: Sequence[int] | None = None
+) -> None:
+    """Insert list_card rows for the given list ids (all lists when None).
+
+    Idempotent: existing rows are kept via ON CONFLICT DO NOTHING, so the
+    scraper can call it for every saved tournament, including lists that
+    were already present.
+    """
+    if _is_sqlite(session.bind):
+        return
+    if list_ids is not None and not list_ids:
+        return
+
+    if list_ids is None:
+        scope, params = "TRUE", {}
+    else:
+        scope, params = "l.id = ANY(:list_ids)", {"list_ids": list(list_ids)}
+
+    session.execute(
+        text(
+            "INSERT INTO list_card (list_id, card_kind, card_xws) "
+            + _LIST_CARD_SELECT.format(scope=scope, pilot_upgrades=_PILOT_UPGRADES_SQL)
+            + " ON CONFLICT DO NOTHING"
+        ),
+        params,
+    )
+
+
+def refresh_card_usage(conn: Connection | None = None) -> int:
+    """Rebuild the card_usage cube from list_card. Returns the row count.
+
+    Runs as DELETE + INSERT in one transaction, so readers keep seeing the
+    previous cube until the commit (DELETE rather than TRUNCATE, which would
+    take an ACCESS EXCLUSIVE lock and block the chart endpoint meanwhile).
+    Counting uses the same team filter as the other analytics:
+    `(NOT t.is_team_event OR ps.is_team_member)`.
+    """
+    if conn is None:
+        with engine.begin() as own_conn:
+            return refresh_card_usage(own_conn)
+
+    if _is_sqlite(conn):
+        return 0
+
+    conn.execute(text("DELETE FROM card_usage"))
+    result = conn.execute(text("""
+        INSERT INTO card_usage (day, format, source, card_kind, card_xws, entries)
+        SELECT
+            t.date,
+            COALESCE(t.format, 'unknown'),
+            COALESCE(t.source, 'unknown'),
+            lc.card_kind,
+            lc.card_xws,
+            COUNT(*)
+        FROM playerstanding ps
+        JOIN tournament t ON t.id = ps.tournament_id
+        JOIN list_card lc ON lc.list_id = ps.list_id
+        WHERE (NOT t.is_team_event OR ps.is_team_member)
+        GROUP BY t.date, COALESCE(t.format, 'unknown'),
+                 COALESCE(t.source, 'unknown'), lc.card_kind, lc.card_xws
+    """))
+    return result.rowcount or 0
+
+
+def refresh_pilot_config(conn: Connection | None = None) -> int:
+    """Rebuild the pilot_config loadout aggregate. Returns the row count.
+
+    Same transactional DELETE + INSERT pattern as refresh_card_usage.
+    """
+    if conn is None:
+        with engine.begin() as own_conn:
+            return refresh_pilot_config(own_conn)
+
+    if _is_sqlite(conn):
+        return 0
+
+    conn.execute(text("DELETE FROM pilot_config"))
+    result = conn.execute(text(_PILOT_CONFIG_INSERT.format(pilot_upgrades=_PILOT_UPGRADES_SQL)))
+    return result.rowcount or 0
+
+
+def refresh_rollups() -> None:
+    """Refresh every rollup derived from the list tables.
+
+    Called by the scraper once all tournaments are saved and before the
+    data_version bump, so the API cache invalidation sees fresh rollups.
+    """
+    refresh_card_usage()
+    refresh_pilot_config()
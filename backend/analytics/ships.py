@@ -5,10 +5,12 @@ Aggregates statistics (win rate, popularity, games) per ship per faction.
 """
 from sqlmodel import Session
 from sqlalchemy import text
-from ..database import engine
+from ..database import read_engine
 from ..data_structures.factions import Faction
 from ..data_structures.data_source import DataSource
 from ..data_structures.sorting_order import SortingCriteria, SortDirection
+from .dialects import sql_dialect
+from .filter_helpers import WhereBuilder, _as_list, distinct_count_expr
 
 
 def aggregate_ship_stats(
@@ -23,69 +25,50 @@ def aggregate_ship_stats(
     """
     source_str = "xwa" if data_source == DataSource.XWA else "legacy"
 
-    where_clauses = ["p->>'id' IS NOT NULL"]
-    params: dict[str, object] = {"source": source_str}
-
-    if filters.get("date_start"):
-        where_clauses.append("t.date >= :date_start"); params["date_start"] = filters["date_start"]
-    if filters.get("date_end"):
-        where_clauses.append("t.date <= :date_end"); params["date_end"] = filters["date_end"]
-    sources = filters.get("sources") or filters.get("platforms") or []
-    if sources:
-        where_clauses.append("t.source = ANY(:sources)"); params["sources"] = sources
-    if filters.get("player_count_min") is not None:
-        where_clauses.append("t.player_count >= :pc_min"); params["pc_min"] = int(filters["player_count_min"])
-    if filters.get("player_count_max") is not None:
-        where_clauses.append("t.player_count <= :pc_max"); params["pc_max"] = int(filters["player_count_max"])
-    # Location filters — tournament.location is stored as JSON; access via
-    # JSONB ->> operator on the text representation of each sub-field.
-    filter_continents = filters.get("continent")
-    if filter_continents:
-        where_clauses.append("t.location->>'continent' = ANY(:continents)"); params["continents"] = list(filter_continents)
-    filter_countries = filters.get("country")
-    if filter_countries:
-        where_clauses.append("t.location->>'country' = ANY(:countries)"); params["countries"] = list(filter_countries)
-    filter_cities = filters.get("city")
-    if filter_cities:
-        where_clauses.append("t.location->>'city' = ANY(:cities)"); params["cities"] = list(filter_cities)
-    fmts = filters.get("allowed_formats")
-    if fmts:
-        where_clauses.append("t.format = ANY(:formats)"); params["formats"] = list(fmts)
+    dialect = sql_dialect()
+    pilot_id = f"{dialect.element('p')}->>'id'"
+
+    where = WhereBuilder(f"{pilot_id} IS NOT NULL", params={"source": source_str}, dialect=dialect)
+    where.tournament_filters(filters)
     # Push faction filter to SQL
-    facs = filters.get("factions") or filters.get("faction")
-    if facs:
-        if isinstance(facs, str): facs = [facs]
-        normalized = [f.lower().replace(" ", "").replace("-", "") for f in facs]
-        where_clauses.append("ps.faction_xws_normalized = ANY(:factions)"); params["factions"] = normalized
+    where.faction_filter(filters.get("factions") or filters.get("faction"), column="ps.faction_xws_normalized")
     # Push ship filter to SQL
     ship_filter = filters.get("ship") or filters.get("ships")
     if ship_filter:
-        if isinstance(ship_filter, str): ship_filter = [ship_filter]
-        where_clauses.append("psm.ship_xws = ANY(:ship_filter)"); params["ship_filter"] = ship_filter
+        where.add(dialect.any_of("psm.ship_xws", "ship_filter"), ship_filter=dialect.bind_list(_as_list(ship_filter)))
     # Push search filter to SQL (search by ship name via pilot_ship_mapping)
     search = filters.get("search_name")
     if search:
-        where_clauses.append("psm.ship_xws ILIKE :search"); params["search"] = f"%{search}%"
+        where.add(dialect.ilike("psm.ship_xws", "search"), search=f"%{search}%")
+
+    # Restrict to specific ships (exact recount of one visible page after
+    # an approximate aggregation).
+    only_ships = filters.get("only_ships")
+    if only_ships:
+        where.add(dialect.any_of("psm.ship_xws", "only_ships"), only_ships=dialect.bind_list(only_ships))
 
-    where_clauses.append("(NOT t.is_team_event OR ps.is_team_member)")
+    where.team_rule()
+    where_sql = where.sql()
+    params = where.params
 
-    where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+    # Opt-in HyperLogLog estimates for the distinct counts (exact when the
+    # hll extension is missing) — see filter_helpers.distinct_count_expr.
+    approx = bool(filters.get("approx_distinct"))
 
     sql = text(f"""
         SELECT
             psm.ship_xws,
-            array_remove(array_agg(DISTINCT l.faction), NULL) as factions,
-            COUNT(DISTINCT ps.id) as entries_count,
-            SUM(GREATEST(0, COALESCE(ps.swiss_wins, 0)) + GREATEST(0, COALESCE(ps.cut_wins, 0))) as wins,
-            SUM(GREATEST(0, COALESCE(ps.swiss_wins, 0)) + GREATEST(0, COALESCE(ps.swiss_losses, 0)) + GREATEST(0, COALESCE(ps.swiss_draws, 0))
-                + GREATEST(0, COALESCE(ps.cut_wins, 0)) + GREATEST(0, COALESCE(ps.cut_losses, 0)) + GREATEST(0, COALESCE(ps.cut_draws, 0))) as games,
-            COUNT(DISTINCT ps.list_id) as different_lists_count,
-            COUNT(DISTINCT l.ship_list) as squadron_count
+            {dialect.distinct_array_agg("l.faction")} as factions,
+            {distinct_count_expr("ps.id", approx)} as entries_count,
+            {dialect.wins_sum()} as wins,
+            {dialect.games_sum()} as games,
+            {distinct_count_expr("ps.list_id", approx)} as different_lists_count,
+            {distinct_count_expr("l.ship_list", approx, "text")} as squadron_count
         FROM playerstanding ps
         JOIN tournament t ON t.id = ps.tournament_id
         JOIN list l ON l.id = ps.list_id
-        JOIN jsonb_array_elements(l.list_json::jsonb->'pilots') p ON true
-        JOIN pilot_ship_mapping psm ON psm.pilot_xws = (p->>'id') AND psm.source = :source
+        JOIN {dialect.pilot_elements("l.list_json", "p")} ON true
+        JOIN pilot_ship_mapping psm ON psm.pilot_xws = ({pilot_id}) AND psm.source = :source
         WHERE {where_sql}
         GROUP BY psm.ship_xws
         ORDER BY games DESC
@@ -94,12 +77,30 @@ def aggregate_ship_stats(
     # SQL execution inside a tight session scope — no Python processing
     # happens while the connection is held. This prevents pool exhaustion
     # under concurrent load.
-    with Session(engine) as session:
+    with Session(read_engine()) as session:
         result = session.execute(sql, params).fetchall()
 
+    if dialect.name != "postgresql":
+        result = [(row[0], dialect.load_array(row[1]), *row[2:]) for row in result]
+
     # Python processing (no database connection needed)
+    return shape_ship_rows(result, sort_criteria, sort_direction)
+
+
+def shape_ship_rows(
+    rows,
+    sort_criteria: SortingCriteria = SortingCriteria.LISTS,
+    sort_direction: SortDirection = SortDirection.DESCENDING,
+) -> list[dict]:
+    """
+    Turn ship GROUP BY rows into sorted ShipStats dicts.
+
+    Row column order:
+      0 ship_xws, 1 factions[], 2 entries_count, 3 wins, 4 games,
+      5 different_lists_count, 6 squadron_count
+    """
     results = []
-    for row in result:
+    for row in rows:
         ship_xws = row[0]
         factions = row[1] or ["unknown"]
         entries_count = row[2] or 0
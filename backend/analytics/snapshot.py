@@ -0,0 +1,299 @@
+"""
+Single-pass Meta Snapshot - one scan for the whole dashboard.
+
+The sequential snapshot (factions.get_meta_snapshot in "sequential" mode)
+runs five heavy aggregations plus two count queries, each re-joining
+playerstanding → tournament → list over the same 90-day window. Here the
+filtered fact set is materialized once per request into two temp tables:
+
+    snapshot_facts   — one row per playerstanding in the window:
+                       ps_id, tournament_id, list_id, counted (team filter),
+                       wins, games, raw list_json faction, list
+                       signature.
+    snapshot_pilots  — counted facts joined to `list` with the pilots array
+                       unnested (one row per pilot entry).
+
+Every breakdown (factions, ships, lists, pilots, upgrades) and the player
+total are then small GROUP BYs over those temp tables; the tournament
+total counts the window's tournaments directly, as the other modes do.
+The row shapes match the per-page aggregations exactly so the existing
+shaping helpers (shape_list_row, shape_ship_rows, apply_card_rows) are
+reused unchanged.
+
+Postgres-only (temp tables with ON COMMIT DROP, jsonb functions). Both temp
+tables live in the request's own transaction, so concurrent snapshots never
+see each other's rows and nothing outlives the session.
+"""
+from sqlmodel import Session
+from sqlalchemy import text
+from ..database import engine
+from ..data_structures.factions import Faction
+from ..data_structures.data_source import DataSource
+from ..data_structures.sorting_order import SortingCriteria, SortDirection
+from ..api.formatters import _reformat_pilots
+from .core import filter_card_catalog, apply_card_rows, _finalize_results
+from .filter_helpers import format_filter_clause, huge_ships_exclusion_clause
+from .lists import shape_list_row
+from .ships import shape_ship_rows
+
+_WINS_SQL = "GREATEST(0, COALESCE(ps.swiss_wins, 0)) + GREATEST(0, COALESCE(ps.cut_wins, 0))"
+_GAMES_SQL = (
+    "GREATEST(0, COALESCE(ps.swiss_wins, 0)) + GREATEST(0, COALESCE(ps.swiss_losses, 0)) "
+    "+ GREATEST(0, COALESCE(ps.swiss_draws, 0)) + GREATEST(0, COALESCE(ps.cut_wins, 0)) "
+    "+ GREATEST(0, COALESCE(ps.cut_losses, 0)) + GREATEST(0, COALESCE(ps.cut_draws, 0))"
+)
+
+# Created empty then filled with INSERT ... SELECT (rather than CREATE TABLE
+# AS) so the filter values stay ordinary bind parameters.
+_CREATE_FACTS = """
+    CREATE TEMP TABLE snapshot_facts (
+        ps_id integer,
+        tournament_id integer,
+        list_id integer,
+        counted boolean,
+        wins integer,
+        games integer,
+        ps_faction text,
+        signature text
+    ) ON COMMIT DROP
+"""
+
+_CREATE_PILOTS = """
+    CREATE TEMP TABLE snapshot_pilots (
+        ps_id integer,
+        list_id integer,
+        wins integer,
+        games integer,
+        ship_list text,
+        faction text,
+        pilot jsonb
+    ) ON COMMIT DROP
+"""
+
+_FILL_PILOTS = """
+    INSERT INTO snapshot_pilots
+    SELECT f.ps_id, f.list_id, f.wins, f.games, l.ship_list, l.faction, p
+    FROM snapshot_facts f
+    JOIN list l ON l.id = f.list_id
+    JOIN jsonb_array_elements(l.list_json::jsonb->'pilots') p ON true
+    WHERE f.counted AND p->>'id' IS NOT NULL
+"""
+
+# Same definitions as factions._snapshot_totals: every tournament in the
+# window (with standings or not) and every standing in it. Placeholder
+# rows (team events) are part of the totals but not of the breakdowns,
+# which all use the `counted` flag.
+_TOTALS = """
+    SELECT
+        (SELECT COUNT(*) FROM tournament t WHERE {where_sql}),
+        (SELECT COUNT(*) FROM snapshot_facts)
+"""
+
+# Distinct lists per faction by signature, like aggregate_faction_stats'
+# get_list_key set: list.canonical_signature is get_list_key(list_json),
+# and standings without a `list` row (lists without pilots) share the
+# empty signature.
+_FACTIONS = """
+    SELECT ps_faction, SUM(wins), SUM(games), COUNT(*), COUNT(DISTINCT signature)
+    FROM snapshot_facts
+    WHERE counted AND ps_faction IS NOT NULL
+    GROUP BY ps_faction
+"""
+
+# Column order matches lists.shape_list_row, plus list_json for the pilots.
+_LISTS = """
+    SELECT
+        l.canonical_signature, l.faction, l.faction_xws_normalized,
+        l.name, l.points, a.entries, a.total_games, a.wins, l.list_json
+    FROM (
+        SELECT list_id, COUNT(*) AS entries, SUM(games) AS total_games, SUM(wins) AS wins
+        FROM snapshot_facts
+        WHERE counted AND list_id IS NOT NULL
+        GROUP BY list_id
+    ) a
+    JOIN list l ON l.id = a.list_id
+    WHERE {epic_sql}
+"""
+
+# Column order matches ships.shape_ship_rows.
+_SHIPS = """
+    SELECT
+        psm.ship_xws,
+        array_remove(array_agg(DISTINCT sp.faction), NULL),
+        COUNT(DISTINCT sp.ps_id),
+        SUM(sp.wins),
+        SUM(sp.games),
+        COUNT(DISTINCT sp.list_id),
+        COUNT(DISTINCT sp.ship_list)
+    FROM snapshot_pilots sp
+    JOIN pilot_ship_mapping psm
+      ON psm.pilot_xws = (sp.pilot->>'id') AND psm.source = :ship_source
+    GROUP BY psm.ship_xws
+    ORDER BY 5 DESC
+"""
+
+# Column order matches core.apply_card_rows.
+_PILOTS = """
+    SELECT
+        pilot->>'id', COUNT(DISTINCT ps_id), SUM(wins), SUM(games),
+        COUNT(DISTINCT list_id), COUNT(DISTINCT ship_list)
+    FROM snapshot_pilots
+    GROUP BY pilot->>'id'
+"""
+
+# Same upgrade flattening as the upgrades CTE in core.py: `upgrades` may be
+# an array or a {slot: [xws, ...]} object.
+_UPGRADES = """
+    SELECT
+        u_elem, COUNT(DISTINCT ps_id), SUM(wins), SUM(games),
+        COUNT(DISTINCT list_id), COUNT(DISTINCT ship_list)
+    FROM snapshot_pilots sp,
+         jsonb_array_elements_text(
+            CASE
+                WHEN jsonb_typeof(sp.pilot->'upgrades') = 'array' THEN sp.pilot->'upgrades'
+                WHEN jsonb_typeof(sp.pilot->'upgrades') = 'object' THEN
+                    COALESCE(
+                        (SELECT jsonb_agg(v)
+                         FROM jsonb_each(sp.pilot->'upgrades') e,
+                              jsonb_array_elements_text(e.value) v
+                         WHERE jsonb_typeof(e.value) = 'array'),
+                        '[]'::jsonb
+                    )
+                ELSE '[]'::jsonb
+            END
+         ) u_elem
+    WHERE u_elem IS NOT NULL
+    GROUP BY u_elem
+"""
+
+
+def compute_meta_snapshot(
+    filters: dict,
+    data_source: DataSource = DataSource.XWA,
+) -> dict:
+    """
+    Compute every dashboard breakdown from one materialized fact set.
+
+    `filters` is the snapshot filter dict built by get_meta_snapshot
+    (date_start, allowed_formats, epic). Returns the factions, ships, lists
+    (with pilots attached), pilots and upgrades breakdowns plus
+    total_tournaments / total_players.
+    """
+    where_clauses = ["t.date >= :date_start"]
+    params: dict[str, object] = {"date_start": filters["date_start"]}
+    fmt_clause = format_filter_clause(filters.get("allowed_formats"), params, leading_and=False)
+    if fmt_clause:
+        where_clauses.append(fmt_clause)
+
+    list_params: dict[str, object] = {}
+    epic_sql = "TRUE"
+    if not filters.get("epic", False):
+        epic_sql = huge_ships_exclusion_clause(False, data_source, list_params) or "TRUE"
+
+    where_sql = " AND ".join(where_clauses)
+    fill_facts = f"""
+        INSERT INTO snapshot_facts
+        SELECT
+            ps.id, ps.tournament_id, ps.list_id,
+            (NOT t.is_team_event OR ps.is_team_member),
+            {_WINS_SQL},
+            {_GAMES_SQL},
+            ps.list_json->>'faction',
+            COALESCE(sl.canonical_signature, '')
+        FROM playerstanding ps
+        JOIN tournament t ON t.id = ps.tournament_id
+        LEFT JOIN list sl ON sl.id = ps.list_id
+        WHERE {where_sql}
+    """
+    ship_source = "xwa" if data_source == DataSource.XWA else "legacy"
+
+    # One transaction: the temp tables are dropped when it ends. All SQL
+    # runs inside this scope; shaping happens after the connection is
+    # returned to the pool.
+    with Session(engine) as session:
+        session.execute(text(_CREATE_FACTS))
+        session.execute(text(fill_facts), params)
+        session.execute(text(_CREATE_PILOTS))
+        session.execute(text(_FILL_PILOTS))
+        # Temp tables have no statistics until analyzed; the planner
+        # otherwise assumes a tiny table for the GROUP BYs below.
+        session.execute(text("ANALYZE snapshot_facts"))
+        session.execute(text("ANALYZE snapshot_pilots"))
+
+        totals = session.execute(text(_TOTALS.format(where_sql=where_sql)), params).one()
+        faction_rows = session.execute(text(_FACTIONS)).fetchall()
+        list_rows = session.execute(text(_LISTS.format(epic_sql=epic_sql)), list_params).fetchall()
+        ship_rows = session.execute(text(_SHIPS), {"ship_source": ship_source}).fetchall()
+        pilot_rows = session.execute(text(_PILOTS)).fetchall()
+        upgrade_rows = session.execute(text(_UPGRADES)).fetchall()
+        session.commit()
+
+    return {
+        "factions": shape_faction_rows(faction_rows),
+        "ships": shape_ship_rows(ship_rows),
+        "lists": _shape_snapshot_lists(list_rows),
+        "pilots": _card_results(pilot_rows, filters, "pilots", data_source),
+        "upgrades": _card_results(upgrade_rows, filters, "upgrades", data_source),
+        "total_tournaments": int(totals[0] or 0),
+        "total_players": int(totals[1] or 0),
+    }
+
+
+def shape_faction_rows(rows) -> list[dict]:
+    """
+    Turn (raw_faction, wins, games, entries, distinct_lists) rows into
+    FactionStats dicts — every known faction present, sorted by games desc.
+
+    Mirrors aggregate_faction_stats: the raw list_json faction must be an
+    exact Faction value, anything else is dropped.
+    """
+    faction_stats = {}
+    for f in Faction:
+        if f == Faction.UNKNOWN:
+            continue
+        faction_stats[f.value] = {
+            "xws": f,
+            "games_count": 0,
+            "list_count": 0,
+            "wins": 0,
+            "different_lists_count": 0,
+        }
+
+    for raw, wins, games, entries, distinct_lists in rows:
+        try:
+            faction_xws = Faction(raw).value
+        except ValueError:
+            continue
+        s = faction_stats.get(faction_xws)
+        if s is None:
+            continue
+        s["wins"] += int(wins or 0)
+        s["games_count"] += int(games or 0)
+        s["list_count"] += int(entries or 0)
+        s["different_lists_count"] += int(distinct_lists or 0)
+
+    results = list(faction_stats.values())
+    results.sort(key=lambda x: x["games_count"], reverse=True)
+    return results
+
+
+def _shape_snapshot_lists(rows) -> list[dict]:
+    """List stats with pilots attached, sorted by games desc."""
+    lists = []
+    for row in rows:
+        if not row[0]:
+            continue
+        item = shape_list_row(row)
+        list_json = row[8]
+        if list_json and isinstance(list_json, dict):
+            item["pilots"] = _reformat_pilots(list_json.get("pilots", []))
+        lists.append(item)
+    lists.sort(key=lambda x: x["games"], reverse=True)
+    return lists
+
+
+def _card_results(rows, filters: dict, mode: str, data_source: DataSource) -> list[dict]:
+    """Phase 1 catalog filter + Phase 2 rows → sorted card stats."""
+    stats = filter_card_catalog(filters, mode, data_source)
+    apply_card_rows(stats, rows)
+    return _finalize_results(stats, SortingCriteria.LISTS, SortDirection.DESCENDING)
@@ -8,10 +8,11 @@ old Python re-grouping that iterated every list_json.
 from sqlmodel import Session
 from sqlalchemy import text
 
-from ..database import engine
+from ..database import read_engine
 from ..data_structures.data_source import DataSource
 from ..data_structures.sorting_order import SortingCriteria, SortDirection
-from .filter_helpers import format_filter_clause, ship_list_filter_clause, huge_ships_exclusion_clause
+from .dialects import sql_dialect
+from .filter_helpers import WhereBuilder
 
 
 def aggregate_squadron_stats(
@@ -26,52 +27,10 @@ def aggregate_squadron_stats(
     Joins on the normalized list table — ship composition is already
     pre-computed as list.ship_list, so no Python re-grouping is needed.
     """
-    where_clauses = []
-    params: dict = {}
-
-    if filters.get("date_start"):
-        where_clauses.append("t.date >= :date_start")
-        params["date_start"] = filters["date_start"]
-    if filters.get("date_end"):
-        where_clauses.append("t.date <= :date_end")
-        params["date_end"] = filters["date_end"]
-
-    sources = filters.get("sources") or filters.get("platforms")
-    if sources:
-        where_clauses.append("t.source = ANY(:sources)")
-        params["sources"] = list(sources)
-
-    if filters.get("player_count_min") is not None:
-        where_clauses.append("t.player_count >= :pc_min")
-        params["pc_min"] = int(filters["player_count_min"])
-    if filters.get("player_count_max") is not None:
-        where_clauses.append("t.player_count <= :pc_max")
-        params["pc_max"] = int(filters["player_count_max"])
-
-    # Location filters — tournament.location is stored as JSON; access via
-    # JSONB ->> operator on the text representation of each sub-field.
-    filter_continents = filters.get("continent")
-    if filter_continents:
-        where_clauses.append("t.location->>'continent' = ANY(:continents)")
-        params["continents"] = list(filter_continents)
-    filter_countries = filters.get("country")
-    if filter_countries:
-        where_clauses.append("t.location->>'country' = ANY(:countries)")
-        params["countries"] = list(filter_countries)
-    filter_cities = filters.get("city")
-    if filter_cities:
-        where_clauses.append("t.location->>'city' = ANY(:cities)")
-        params["cities"] = list(filter_cities)
-
-    fmt_clause = format_filter_clause(filters.get("allowed_formats"), params, leading_and=False)
-    if fmt_clause:
-        where_clauses.append(fmt_clause)
-
-    facs = filters.get("factions")
-    if facs:
-        normalized = [f.lower().replace(" ", "").replace("-", "") for f in facs]
-        where_clauses.append("l.faction_xws_normalized = ANY(:factions)")
-        params["factions"] = normalized
+    dialect = sql_dialect()
+    where = WhereBuilder(dialect=dialect)
+    where.tournament_filters(filters)
+    where.faction_filter(filters.get("factions"))
 
     # Ship filter — use list.ship_list (comma-joined) for fast filter.
     # Accept both "ship" (singular, used by ship_detail.py) and "ships"
@@ -81,21 +40,12 @@ def aggregate_squadron_stats(
     # selected ship is present in its ship_list. This is the natural
     # choice for squadrons — selecting X-wing + A-wing should show
     # squadrons that contain BOTH, not the union.
-    ship_clause = ship_list_filter_clause(
-        filters.get("ship") or filters.get("ships"),
-        params,
-        mode="all",
-    )
-    if ship_clause:
-        where_clauses.append(ship_clause)
-
-    where_clauses.append("(NOT t.is_team_event OR ps.is_team_member)")
-    if not filters.get("epic", False):
-        huge_clause = huge_ships_exclusion_clause(False, data_source, params)
-        if huge_clause:
-            where_clauses.append(huge_clause)
+    where.ship_filter(filters.get("ship") or filters.get("ships"), mode="all")
 
-    where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+    where.team_rule()
+    where.exclude_epic_ships(filters, data_source)
+    where_sql = where.sql()
+    params = where.params
 
     # GROUP BY ship_list — no Python post-processing needed
     #
@@ -110,12 +60,8 @@ def aggregate_squadron_stats(
             l.faction as faction,
             l.ship_list as ship_list,
             COUNT(DISTINCT ps.id) as popularity,
-            SUM(GREATEST(0, COALESCE(ps.swiss_wins, 0)) + GREATEST(0, COALESCE(ps.cut_wins, 0))) as wins,
-            SUM(
-                GREATEST(0, COALESCE(ps.swiss_wins, 0)) + GREATEST(0, COALESCE(ps.swiss_losses, 0)) +
-                GREATEST(0, COALESCE(ps.swiss_draws, 0)) + GREATEST(0, COALESCE(ps.cut_wins, 0)) +
-                GREATEST(0, COALESCE(ps.cut_losses, 0)) + GREATEST(0, COALESCE(ps.cut_draws, 0))
-            ) as games,
+            {dialect.wins_sum()} as wins,
+            {dialect.games_sum()} as games,
             COUNT(DISTINCT l.id) as different_lists_count
         FROM playerstanding ps
         JOIN tournament t ON t.id = ps.tournament_id
@@ -125,7 +71,7 @@ def aggregate_squadron_stats(
         """
     )
 
-    with Session(engine) as session:
+    with Session(read_engine()) as session:
         rows = session.execute(sql, params).fetchall()
 
     # Build result list directly from SQL — no Python re-grouping
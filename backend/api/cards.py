@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Query, Depends
 from ..analytics.core import aggregate_card_stats
+from ..analytics.filter_helpers import with_exact_counts
 from ..data_structures.sorting_order import SortingCriteria, SortDirection
 from ..data_structures.data_source import DataSource
+from .responses import cached_endpoint
 from .schemas import PaginatedPilotsResponse, PaginatedUpgradesResponse
-from ..cache import get_cached_or_compute
+from ..cache import depends_on_catalog, get_cached_or_compute, get_sorted_permutation
 
 router = APIRouter(prefix="/api/cards", tags=["Cards"])
 
+_PILOTS_PREFIX = depends_on_catalog("cards_pilots|")
+_UPGRADES_PREFIX = depends_on_catalog("cards_upgrades|")
+
 
 def _compute_cards(
     data_source: str,
@@ -17,7 +22,7 @@ def _compute_cards(
 
     The heavy SQL aggregation is sort-independent, so it always runs with a
     neutral sort (Lists desc). The caller applies the requested sort to the
-    cached list before paginating — see _sort_card_stats.
+    cached list before paginating — see _card_sort_key.
     """
     try:
         ds_enum = DataSource(data_source)
@@ -33,7 +38,7 @@ def _compute_cards(
     )
 
 
-def _sort_card_stats(data: list[dict], sort_metric: str, sort_direction: str) -> list[dict]:
+def _card_sort_key(sort_metric: str):
     def sort_key(item):
         if sort_metric == "Squadrons":
             return (item.get("squadron_count", 0), item.get("games_count", 0))
@@ -49,7 +54,21 @@ def _sort_card_stats(data: list[dict], sort_metric: str, sort_direction: str) ->
             return 0
         return (item.get("list_count", 0), item.get("games_count", 0))
 
-    return sorted(data, key=sort_key, reverse=(sort_direction == "desc"))
+    return sort_key
+
+
+def _sorted_page(
+    cache_key: str, data: list[dict], sort_metric: str, sort_direction: str, page: int, size: int,
+) -> list[dict]:
+    """One page of `data` in the requested order, via a cached permutation."""
+    order = get_sorted_permutation(
+        cache_key,
+        (sort_metric, sort_direction),
+        data,
+        _card_sort_key(sort_metric),
+        reverse=(sort_direction == "desc"),
+    )
+    return [data[i] for i in order[page * size : (page + 1) * size]]
 
 
 def _build_filters(
@@ -134,6 +153,7 @@ def _build_filters(
 
 
 @router.get("/pilots", response_model=PaginatedPilotsResponse)
+@cached_endpoint(_PILOTS_PREFIX, weight=2)
 def get_pilots(
     page: int = Query(0, ge=0),
     size: int = Query(20, ge=1, le=100),
@@ -174,6 +194,7 @@ def get_pilots(
     date_end: str | None = Query(None),
     player_count_min: int | None = Query(None),
     player_count_max: int | None = Query(None),
+    approx: bool = Query(False, description="Approximate distinct counts (HyperLogLog) for the full ranking; the returned page is exact"),
 ):
     effective_search = search or search_text
     filters = _build_filters(
@@ -189,9 +210,10 @@ def get_pilots(
         player_count_min=player_count_min, player_count_max=player_count_max,
         epic=epic,
     )
+    filters["approx_distinct"] = approx
 
     cache_key = (
-        f"cards_pilots|{data_source}"
+        f"{_PILOTS_PREFIX}{data_source}"
         f"|{','.join(sorted(formats or []))}"
         f"|{','.join(sorted(factions or []))}"
         f"|{','.join(sorted(ships or []))}"
@@ -212,7 +234,7 @@ def get_pilots(
         f"|{','.join(sorted(city or []))}"
         f"|{date_start or ''}|{date_end or ''}"
         f"|{player_count_min}|{player_count_max}"
-        f"|{epic}"
+        f"|{epic}|approx={approx}"
     )
 
     def compute():
@@ -220,14 +242,21 @@ def get_pilots(
 
     data = get_cached_or_compute(cache_key, compute)
     # Sort AFTER the cache lookup — the heavy aggregation is sort-independent.
-    data = _sort_card_stats(data, sort_metric, sort_direction)
     total = len(data)
-    items = data[page * size : (page + 1) * size]
+    items = _sorted_page(cache_key, data, sort_metric, sort_direction, page, size)
+    if approx:
+        items = with_exact_counts(
+            items, cache_key,
+            lambda ids: _compute_cards(
+                data_source, "pilots", {**filters, "approx_distinct": False, "only_cards": ids}
+            ),
+        )
 
     return PaginatedPilotsResponse(items=items, total=total, page=page, size=size)
 
 
 @router.get("/upgrades", response_model=PaginatedUpgradesResponse)
+@cached_endpoint(_UPGRADES_PREFIX, weight=2)
 def get_upgrades(
     page: int = Query(0, ge=0),
     size: int = Query(20, ge=1, le=100),
@@ -252,6 +281,7 @@ def get_upgrades(
     date_end: str | None = Query(None),
     player_count_min: int | None = Query(None),
     player_count_max: int | None = Query(None),
+    approx: bool = Query(False, description="Approximate distinct counts (HyperLogLog) for the full ranking; the returned page is exact"),
 ):
     effective_search = search or search_text
     filters = _build_filters(
@@ -263,9 +293,10 @@ def get_upgrades(
         upgrade_id=upgrade_id,
         epic=epic,
     )
+    filters["approx_distinct"] = approx
 
     cache_key = (
-        f"cards_upgrades|{data_source}"
+        f"{_UPGRADES_PREFIX}{data_source}"
         f"|{','.join(sorted(formats or []))}"
         f"|{','.join(sorted(factions or []))}"
         f"|{','.join(sorted(upgrade_types or []))}"
@@ -278,7 +309,7 @@ def get_upgrades(
         f"|{date_start or ''}|{date_end or ''}"
         f"|{player_count_min}|{player_count_max}"
         f"|{upgrade_id or ''}"
-        f"|{epic}"
+        f"|{epic}|approx={approx}"
     )
 
     def compute():
@@ -286,8 +317,14 @@ def get_upgrades(
 
     data = get_cached_or_compute(cache_key, compute)
     # Sort AFTER the cache lookup — the heavy aggregation is sort-independent.
-    data = _sort_card_stats(data, sort_metric, sort_direction)
     total = len(data)
-    items = data[page * size : (page + 1) * size]
+    items = _sorted_page(cache_key, data, sort_metric, sort_direction, page, size)
+    if approx:
+        items = with_exact_counts(
+            items, cache_key,
+            lambda ids: _compute_cards(
+                data_source, "upgrades", {**filters, "approx_distinct": False, "only_cards": ids}
+            ),
+        )
 
     return PaginatedUpgradesResponse(items=items, total=total, page=page, size=size)
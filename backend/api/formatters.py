@@ -1,4 +1,9 @@
+from collections.abc import Iterable
+
+from pydantic import TypeAdapter
+
 from .schemas import ListData, PilotData, UpgradeData
+from ..utils.xwing_data.aliases import load_alias_index
 from ..utils.xwing_data.pilots import get_pilot_info
 from ..utils.xwing_data.ships import get_ship_icon_name
 from ..utils.xwing_data.upgrades import get_upgrade_info, get_upgrade_slot
@@ -49,7 +54,90 @@ def _reformat_pilots(raw_pilots: list[dict]) -> list[dict]:
     return out
 
 
+def _norm_upgrade_id(u):
+    """XWS id of one upgrade entry.
+
+    The raw list_json may store upgrades either as a dict of slot -> ids,
+    a flat list of id strings, or a flat list of {"xws": id} entries (the
+    shape produced by `_reformat_pilots`).
+    """
+    if isinstance(u, dict):
+        return u.get("xws") or u.get("id") or u.get("name") or ""
+    return u
+
+
+def _norm_slot(slot: str) -> str:
+    norm_slot = slot.lower()
+    return "config" if norm_slot == "configuration" else norm_slot
+
+
+def _to_int(value) -> int:
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return 0
+
+
+def _upgrade_cost(upg_info) -> int:
+    """Points cost of a catalog upgrade record (0 when unknown)."""
+    upg_cost = upg_info.get("cost")
+    if isinstance(upg_cost, dict):
+        upg_cost = upg_cost.get("value", 0)
+    return _to_int(upg_cost or 0)
+
+
+def _resolve_faction(f_raw: str) -> tuple[str, str, str]:
+    """(label, key, icon char) for a raw faction string."""
+    try:
+        f_enum = Faction.from_xws(f_raw)
+        f_label = f_enum.label
+        f_key = f_enum.value
+    except:
+        f_label = f_raw.title()
+        f_key = f_raw
+    return f_label, f_key, get_faction_char(f_key)
+
+
+def _list_fields(stats: dict, resolve_faction=_resolve_faction) -> dict:
+    """List-level ListData fields (everything but pilots and points)."""
+    f_raw = stats.get("faction") or stats.get("faction_xws") or "unknown"
+    f_label, f_key, f_char = resolve_faction(f_raw)
+
+    try: win_rate = float(stats.get("win_rate", 0.0))
+    except (ValueError, TypeError): win_rate = 0.0
+
+    raw_count = (
+        stats.get("count",
+        stats.get("entries",
+        stats.get("entries_count",
+        stats.get("popularity", 0))))
+    )
+    count = _to_int(raw_count or 0)
+
+    return {
+        "signature": stats.get("signature", "Unknown Signature") or "Unknown Signature",
+        "name": stats.get("name", "Unknown List") or "Unknown List",
+        "faction": f_label,
+        "faction_key": f_key,
+        "faction_xws": stats.get("faction_xws", f_key),
+        "icon_char": stats.get("icon_char") or f_char,
+        "original_points": _to_int(stats.get("points", 0)),
+        "count": count,
+        "entries": count,
+        "entries_count": count,
+        "games": _to_int(stats.get("games", 0)),
+        "wins": _to_int(stats.get("wins", 0)),
+        "win_rate": win_rate,
+    }
+
+
 def enrich_list_data(stats: dict, source: DataSource = DataSource.XWA) -> ListData:
+    """Enrich one aggregated list row into a validated ListData.
+
+    For many lists at once (meta snapshot, ship and squadron top lists) use
+    `enrich_lists_batch`, which produces the same models without the
+    per-list lookups and validation.
+    """
     pilots = stats.get("pilots", [])
     rich_pilots = []
     
@@ -83,15 +171,6 @@ def enrich_list_data(stats: dict, source: DataSource = DataSource.XWA) -> ListDa
         
         rich_upgrades = []
         upgrades_data = p.get("upgrades", {})
-        
-        # The raw list_json may store upgrades either as a dict of slot -> ids,
-        # a flat list of id strings, or a flat list of {"xws": id} entries
-        # (the shape produced by `_reformat_pilots`). Normalize each entry so
-        # the per-card lookup below always receives an XWS string.
-        def _norm_upgrade_id(u):
-            if isinstance(u, dict):
-                return u.get("xws") or u.get("id") or u.get("name") or ""
-            return u
 
         if isinstance(upgrades_data, dict):
             for slot, items in upgrades_data.items():
@@ -154,53 +233,122 @@ def enrich_list_data(stats: dict, source: DataSource = DataSource.XWA) -> ListDa
             upgrades=rich_upgrades
         ))
 
-    f_raw = stats.get("faction") or stats.get("faction_xws") or "unknown"
-    try:
-        f_enum = Faction.from_xws(f_raw)
-        f_label = f_enum.label
-        f_key = f_enum.value
-    except:
-        f_label = f_raw.title()
-        f_key = f_raw
-
-    try: points = int(stats.get("points", 0))
-    except (ValueError, TypeError): points = 0
-    
-    raw_count = (
-        stats.get("count",
-        stats.get("entries",
-        stats.get("entries_count",
-        stats.get("popularity", 0))))
-    )
-    try: count = int(raw_count or 0)
-    except (ValueError, TypeError): count = 0
-    
-    try: games = int(stats.get("games", 0))
-    except (ValueError, TypeError): games = 0
-    
-    try: win_rate = float(stats.get("win_rate", 0.0))
-    except (ValueError, TypeError): win_rate = 0.0
-
-    try: wins = int(stats.get("wins", 0))
-    except (ValueError, TypeError): wins = 0
-
-    icon_char = stats.get("icon_char") or get_faction_char(f_key)
-
     return ListData(
-        signature=stats.get("signature", "Unknown Signature") or "Unknown Signature",
-        name=stats.get("name", "Unknown List") or "Unknown List",
-        faction=f_label,
-        faction_key=f_key,
-        faction_xws=stats.get("faction_xws", f_key),
-        icon_char=icon_char,
+        **_list_fields(stats),
         points=calculated_points,
-        original_points=points,
-        count=count,
-        entries=count,
-        entries_count=count,
-        games=games,
-        wins=wins,
-        win_rate=win_rate,
         total_loadout=total_loadout,
         pilots=rich_pilots
     )
+
+
+_LIST_DATA_ADAPTER = TypeAdapter(list[ListData])
+
+
+def enrich_lists_batch(
+    lists: Iterable[dict], source: DataSource = DataSource.XWA
+) -> list[ListData]:
+    """Enrich many aggregated list rows at once.
+
+    Same output as `[enrich_list_data(l, source) for l in lists]`, but every
+    distinct pilot and upgrade ID is resolved against the catalog once per
+    batch, and the lists are built as plain dicts and turned into models
+    by a single validation call. (`model_construct` was measured: it is
+    plain Python and ~3x slower per model than pydantic-core validation.)
+    """
+    lists = list(lists)
+    pilot_index = load_alias_index(source, "pilots")
+    upgrade_index = load_alias_index(source, "upgrades")
+    # Slots of flat upgrade lists come from the XWA catalog, as in
+    # get_upgrade_slot.
+    slot_index = load_alias_index(DataSource.XWA, "upgrades")
+    count_upgrades = source == DataSource.LEGACY
+
+    factions: dict = {}
+    # pid -> (ship_xws, faction, catalog cost or None, loadout, initiative)
+    pilots: dict = {}
+    upgrade_costs: dict = {}
+    slots: dict = {}
+
+    def _faction(f_raw):
+        resolved = factions.get(f_raw)
+        if resolved is None:
+            resolved = factions[f_raw] = _resolve_faction(f_raw)
+        return resolved
+
+    def _pilot(pid):
+        resolved = pilots.get(pid)
+        if resolved is None:
+            info = pilot_index.get(pid) or {}
+            cost = info.get("cost")
+            resolved = pilots[pid] = (
+                info.get("ship_xws"),
+                info.get("faction"),
+                _to_int(cost) if cost else None,
+                _to_int(info.get("loadout", 0)),
+                _to_int(info.get("initiative") or 0),
+            )
+        return resolved
+
+    def _cost(item_id) -> int:
+        cost = upgrade_costs.get(item_id)
+        if cost is None:
+            cost = upgrade_costs[item_id] = _upgrade_cost(upgrade_index.get(item_id) or {})
+        return cost
+
+    def _slot(item_id) -> str:
+        slot = slots.get(item_id)
+        if slot is None:
+            slot = slots[item_id] = _norm_slot(slot_index.slot(item_id))
+        return slot
+
+    out = []
+    for stats in lists:
+        rich_pilots = []
+        total_loadout = 0
+        calculated_points = 0
+        for p in stats.get("pilots", []):
+            pid = p.get("id") or p.get("xws") or p.get("name")
+            ship_xws, faction, cost, loadout, initiative = _pilot(pid)
+            pilot_points = cost if cost is not None else _to_int(p.get("points", 0))
+            total_loadout += loadout
+            calculated_points += pilot_points
+
+            rich_upgrades = []
+            upgrades_data = p.get("upgrades", {})
+            if isinstance(upgrades_data, dict):
+                for slot, items in upgrades_data.items():
+                    if not isinstance(items, list):
+                        continue
+                    norm_slot = _norm_slot(slot)
+                    for raw_item in items:
+                        item_id = _norm_upgrade_id(raw_item)
+                        if not item_id:
+                            continue
+                        if count_upgrades:
+                            calculated_points += _cost(item_id)
+                        rich_upgrades.append({"xws": item_id, "slot_xws": norm_slot})
+            elif isinstance(upgrades_data, list):
+                for raw_item in upgrades_data:
+                    item_id = _norm_upgrade_id(raw_item)
+                    if not item_id:
+                        continue
+                    if count_upgrades:
+                        calculated_points += _cost(item_id)
+                    rich_upgrades.append({"xws": item_id, "slot_xws": _slot(item_id)})
+
+            rich_pilots.append({
+                "xws": pid,
+                "ship_xws": ship_xws or p.get("ship", ""),
+                "faction_xws": faction or p.get("faction", ""),
+                "cost": pilot_points,
+                "initiative": initiative,
+                "upgrades": rich_upgrades,
+            })
+
+        out.append({
+            **_list_fields(stats, _faction),
+            "points": calculated_points,
+            "total_loadout": total_loadout,
+            "pilots": rich_pilots,
+        })
+    return _LIST_DATA_ADAPTER.validate_python(out)
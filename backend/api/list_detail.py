@@ -1,13 +1,14 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query
 from sqlmodel import Session, select, or_
 from sqlalchemy import text
-from ..database import engine
+from ..database import read_engine
 from ..models import List
 from ..data_structures.data_source import parse_data_source
 from ..analytics.filter_helpers import format_filter_clause
+from ..admission import light_slot
 from .formatters import enrich_list_data
 
-router = APIRouter(prefix="/api/list", tags=["List Detail"])
+router = APIRouter(prefix="/api/list", tags=["List Detail"], dependencies=[Depends(light_slot)])
 
 
 @router.get("/{list_id:path}/stats")
@@ -23,7 +24,7 @@ def get_list_stats(
     `PlayerStanding.list_id`) or a `canonical_signature` / list `name`.
     Numeric IDs are tried first to keep the standings LIST button working.
     """
-    with Session(engine) as session:
+    with Session(read_engine()) as session:
         # 1. Try to find the list row by numeric id, then canonical_signature,
         # then name. Numeric id is the dominant case (standings LIST button).
         list_row = None
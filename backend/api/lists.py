@@ -1,12 +1,27 @@
-from fastapi import APIRouter, Query
-from ..analytics.lists import aggregate_list_stats, fetch_list_pilots
-from ..cache import get_cached_or_compute
+import os
+
+from fastapi import APIRouter, HTTPException, Query
+from ..analytics.lists import (
+    aggregate_list_page,
+    aggregate_list_stats,
+    count_list_stats,
+    decode_list_cursor,
+    fetch_list_pilots,
+)
+from ..cache import depends_on_catalog, get_cached_or_compute, get_sorted_permutation
 from ..data_structures.data_source import DataSource
 from ..data_structures.factions import Faction
+from .responses import cached_endpoint
 from .schemas import PaginatedListsResponse
 
 router = APIRouter(prefix="/api/lists", tags=["Lists"])
 
+_CACHE_PREFIX = depends_on_catalog("lists|")
+
+# SQL pushdown (ORDER BY / LIMIT / keyset cursor) for /api/lists. Set to "0"
+# to fall back to the cached full aggregation sorted and sliced in Python.
+LISTS_PUSHDOWN = os.getenv("LISTS_PUSHDOWN", "1") != "0"
+
 # Helper to match faction filter
 def _match_faction(f_enum: Faction, allowed_list: list[str]) -> bool:
     if not allowed_list: return True
@@ -24,7 +39,7 @@ def _build_cache_key(
     min_games, points_min, points_max, epic: bool = False,
 ) -> str:
     return (
-        f"lists|{data_source}|"
+        f"{_CACHE_PREFIX}{data_source}|"
         f"f={','.join(sorted(formats or []))}|"
         f"fa={','.join(sorted(factions or []))}|"
         f"s={','.join(sorted(ships or []))}|"
@@ -46,7 +61,7 @@ def _compute_lists(
     """Run the expensive aggregation + post-filter.
 
     Returns a list of rows in neutral games-desc order. The requested sort is
-    applied AFTER the cache lookup — see _sort_list_stats.
+    applied AFTER the cache lookup — see _list_sort_key.
     """
     try:
         ds_enum = DataSource(data_source)
@@ -94,22 +109,21 @@ def _compute_lists(
     return filtered_data
 
 
-def _sort_list_stats(data: list[dict], sort_metric: str, sort_direction: str) -> list[dict]:
-    reverse = sort_direction == "desc"
-
+def _list_sort_key(sort_metric: str):
     def get_win_rate(r):
         return r["wins"] / r["games"] if r["games"] > 0 else 0.0
 
     if sort_metric == "Win Rate":
-        return sorted(data, key=get_win_rate, reverse=reverse)
+        return get_win_rate
     elif sort_metric == "Points Cost":
-        return sorted(data, key=lambda x: x["points"], reverse=reverse)
+        return lambda x: x["points"]
     elif sort_metric in ("Entries", "Lists", "Popularity"):
-        return sorted(data, key=lambda x: x.get("count", 0), reverse=reverse)
-    return sorted(data, key=lambda x: x["games"], reverse=reverse)
+        return lambda x: x.get("count", 0)
+    return lambda x: x["games"]
 
 
 @router.get("", response_model=PaginatedListsResponse)
+@cached_endpoint(_CACHE_PREFIX, weight=2)
 def get_lists(
     page: int = Query(0, ge=0),
     size: int = Query(20, ge=1, le=100),
@@ -132,6 +146,7 @@ def get_lists(
     date_end: str | None = Query(None),
     player_count_min: int | None = Query(None),
     player_count_max: int | None = Query(None),
+    cursor: str | None = Query(None, description="Keyset cursor from a previous next_cursor"),
 ):
     filters = {
         "platforms": platforms,
@@ -155,6 +170,12 @@ def get_lists(
         min_games, points_min, points_max, epic=epic,
     )
 
+    if LISTS_PUSHDOWN:
+        return _get_lists_pushdown(
+            cache_key, data_source, filters, min_games, points_min, points_max,
+            sort_metric, sort_direction, page, size, cursor,
+        )
+
     def compute():
         return _compute_lists(
             data_source=data_source,
@@ -163,9 +184,16 @@ def get_lists(
 
     filtered_data = get_cached_or_compute(cache_key, compute)
     # Sort AFTER the cache lookup — the heavy aggregation is sort-independent.
-    filtered_data = _sort_list_stats(filtered_data, sort_metric, sort_direction)
+    # The order is a cached permutation, so a page is a slice lookup.
+    order = get_sorted_permutation(
+        cache_key,
+        (sort_metric, sort_direction),
+        filtered_data,
+        _list_sort_key(sort_metric),
+        reverse=(sort_direction == "desc"),
+    )
     total = len(filtered_data)
-    page_items = filtered_data[page * size : (page + 1) * size]
+    page_items = [filtered_data[i] for i in order[page * size : (page + 1) * size]]
 
     # Pilots are aggregated lazily (see analytics/lists.py): the stats rows
     # carry empty pilots, so attach them only for the page being returned.
@@ -180,3 +208,72 @@ def get_lists(
     ]
 
     return PaginatedListsResponse(items=items, total=total, page=page, size=size)
+
+
+def _get_lists_pushdown(
+    cache_key: str,
+    data_source: str,
+    filters: dict,
+    min_games: int,
+    points_min: int,
+    points_max: int,
+    sort_metric: str,
+    sort_direction: str,
+    page: int,
+    size: int,
+    cursor: str | None,
+) -> PaginatedListsResponse:
+    """
+    /api/lists via aggregate_list_page: only the requested page is sorted
+    out and returned by Postgres. The total is a separate COUNT cached per
+    filter set (shared by every sort/page), and each page is cached under
+    its own key.
+    """
+    try:
+        ds_enum = DataSource(data_source)
+    except ValueError:
+        ds_enum = DataSource.XWA
+    if cursor:
+        try:
+            decode_list_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    page_filters = {
+        **filters,
+        "min_games": min_games,
+        "points_min": points_min,
+        "points_max": points_max,
+    }
+    total = get_cached_or_compute(
+        f"{cache_key}|count",
+        lambda: count_list_stats(page_filters, data_source=ds_enum),
+    )
+    page_key = (
+        f"{cache_key}|page|{sort_metric}|{sort_direction}|{size}|"
+        f"{'c=' + cursor if cursor else f'p={page}'}"
+    )
+    page_rows, next_cursor = get_cached_or_compute(
+        page_key,
+        lambda: aggregate_list_page(
+            page_filters,
+            data_source=ds_enum,
+            sort_metric=sort_metric,
+            sort_direction=sort_direction,
+            limit=size,
+            cursor=cursor,
+            offset=page * size,
+        ),
+    )
+
+    # Attach pilots for the page only; copy rows (cached, shared).
+    signatures: list[str] = [row["signature"] for row in page_rows if row.get("signature")]
+    pilots_map = fetch_list_pilots(signatures) if signatures else {}
+    items = [
+        {**row, "pilots": pilots_map.get(row["signature"], [])}
+        for row in page_rows
+        if row.get("signature")
+    ]
+    return PaginatedListsResponse(
+        items=items, total=total, page=page, size=size, next_cursor=next_cursor,
+    )
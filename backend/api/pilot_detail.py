@@ -4,19 +4,25 @@ Pilot Detail API endpoints.
 Provides pilot info, compatible upgrade stats, temporal usage chart,
 and top upgrade configurations for a given pilot.
 """
-from fastapi import APIRouter, Query
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session
 from sqlalchemy import text
 
 from ..analytics.core import aggregate_card_stats
 from ..analytics.charts import get_card_usage_history
+from ..cache import depends_on_catalog, get_cached_or_compute
 from ..data_structures.sorting_order import SortingCriteria, SortDirection
 from ..data_structures.data_source import DataSource
 from ..utils.xwing_data.pilots import load_all_pilots
 from ..utils.xwing_data.upgrades import load_all_upgrades
-from ..database import engine
+from ..database import read_engine
+from ..admission import light_slot
+
+router = APIRouter(prefix="/api/pilot", tags=["Pilot Detail"], dependencies=[Depends(light_slot)])
 
-router = APIRouter(prefix="/api/pilot", tags=["Pilot Detail"])
+_CONFIGS_PREFIX = depends_on_catalog("pilot_configs|")
 
 
 @router.get("/{pilot_xws}")
@@ -68,19 +74,30 @@ def get_pilot_chart(
     data_source: str = Query("xwa"),
     formats: list[str] | None = Query(None),
     comparison: list[str] | None = Query(None),
+    granularity: str = Query("month", pattern="^(week|month|quarter)$"),
 ):
-    """Return monthly usage history for the pilot and optional comparisons."""
+    """Return usage history for the pilot and optional comparisons,
+    bucketed by week, month or quarter."""
     filters = {
         "allowed_formats": formats,
         "include_epic": False,
     }
-    chart_data = get_card_usage_history(
-        filters,
-        pilot_xws,
-        comparison or [],
-        is_upgrade=False,
+    comparisons = comparison or []
+    cache_key = (
+        f"pilot_chart|{pilot_xws}|{granularity}|"
+        f"{sorted(formats or [])}|{comparisons}"
+    )
+    chart_data = get_cached_or_compute(
+        cache_key,
+        lambda: get_card_usage_history(
+            filters,
+            pilot_xws,
+            comparisons,
+            is_upgrade=False,
+            granularity=granularity,
+        ),
     )
-    return {"data": chart_data, "series": [pilot_xws] + (comparison or [])}
+    return {"data": chart_data, "series": [pilot_xws] + comparisons}
 
 
 @router.get("/{pilot_xws}/configurations")
@@ -89,95 +106,79 @@ def get_pilot_configurations(
     data_source: str = Query("xwa"),
     formats: list[str] | None = Query(None),
     limit: int = Query(10, ge=1, le=50),
+    date_start: str | None = Query(None, description="YYYY-MM-DD, applied at month granularity"),
+    date_end: str | None = Query(None, description="YYYY-MM-DD, applied at month granularity"),
 ):
     """
     Return top upgrade configurations for this pilot.
 
-    Uses a SQL-side filter on the joined list table — we only fetch
-    rows whose list_json contains the requested pilot, then aggregate
-    upgrade combos and wins in Python (still N matches, but no full
-    table scan).
+    Reads the pre-aggregated `pilot_config` table (one row per pilot,
+    upgrade signature, format, source and month — see analytics/rollups.py),
+    so this is an indexed top-N query instead of unnesting every list that
+    contains the pilot. Date windows are applied to whole months.
     """
     ds = DataSource(data_source) if data_source in ("xwa", "legacy") else DataSource.XWA
+    try:
+        start = date.fromisoformat(date_start) if date_start else None
+        end = date.fromisoformat(date_end) if date_end else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {e}")
+
+    cache_key = (
+        f"{_CONFIGS_PREFIX}{pilot_xws}|{ds.value}|{','.join(sorted(formats or []))}"
+        f"|{limit}|{start}|{end}"
+    )
+    return get_cached_or_compute(
+        cache_key,
+        lambda: _compute_pilot_configurations(pilot_xws, ds, formats, limit, start, end),
+    )
+
+
+def _compute_pilot_configurations(
+    pilot_xws: str,
+    ds: DataSource,
+    formats: list[str] | None,
+    limit: int,
+    start: date | None,
+    end: date | None,
+) -> dict:
     all_upgrades = load_all_upgrades(ds)
 
-    config_stats: dict[str, dict] = {}
-
-    with Session(engine) as session:
-        params: dict = {"pilot_xws": pilot_xws}
-        fmt_clause = ""
-        if formats:
-            fmt_clause = " AND t.format = ANY(:formats)"
-            params["formats"] = list(formats)
-
-        # Filter at the SQL level via the list table JOIN and the
-        # list_json->'pilots' containment check. We do this in raw SQL
-        # (matches the pattern in analytics/core.py) so the query planner
-        # can use the playerstanding.list_id index.
-        sql = text(
-            f"""
-            SELECT
-                ps.swiss_wins, ps.swiss_losses, ps.swiss_draws,
-                ps.cut_wins, ps.cut_losses, ps.cut_draws,
-                p
-            FROM playerstanding ps
-            JOIN list l ON l.id = ps.list_id
-            JOIN tournament t ON t.id = ps.tournament_id
-            JOIN jsonb_array_elements(l.list_json::jsonb->'pilots') p ON true
-            WHERE p->>'id' = :pilot_xws{fmt_clause}
-            """
-        )
+    params: dict = {"pilot_xws": pilot_xws, "limit": limit}
+    where = ["pilot_xws = :pilot_xws"]
+    if formats:
+        where.append("format = ANY(:formats)")
+        params["formats"] = list(formats)
+    if start:
+        # Month rows are keyed by their first day, so compare against the
+        # first day of the start month.
+        where.append("month >= :month_start")
+        params["month_start"] = start.replace(day=1)
+    if end:
+        where.append("month <= :month_end")
+        params["month_end"] = end
+
+    # COUNT(*) OVER () is evaluated before LIMIT: it is the number of
+    # distinct configurations, returned as `total`.
+    sql = text(f"""
+        SELECT upgrade_signature, SUM(entries) AS count, SUM(wins) AS wins,
+               COUNT(*) OVER () AS total
+        FROM pilot_config
+        WHERE {" AND ".join(where)}
+        GROUP BY upgrade_signature
+        ORDER BY count DESC, upgrade_signature
+        LIMIT :limit
+    """)
+    with Session(read_engine()) as session:
         rows = session.execute(sql, params).fetchall()
 
-        for row in rows:
-            swiss_wins = row[0] or 0
-            swiss_losses = row[1] or 0
-            swiss_draws = row[2] or 0
-            cut_wins = row[3] or 0
-            cut_losses = row[4] or 0
-            cut_draws = row[5] or 0
-
-            pilot_obj = row[6]
-            if not pilot_obj or not isinstance(pilot_obj, dict):
-                continue
-
-            # Extract upgrade combo from the JSONB pilot element.
-            raw_upgrades = pilot_obj.get("upgrades", {}) or {}
-            upgrade_ids = []
-            if isinstance(raw_upgrades, dict):
-                for slot_list in raw_upgrades.values():
-                    if isinstance(slot_list, list):
-                        upgrade_ids.extend(str(x) for x in slot_list)
-            elif isinstance(raw_upgrades, list):
-                upgrade_ids.extend(str(x) for x in raw_upgrades)
-            upgrade_ids.sort()
-
-            key = "|".join(upgrade_ids)
-
-            if key not in config_stats:
-                config_stats[key] = {
-                    "upgrade_ids": upgrade_ids,
-                    "count": 0,
-                    "wins": 0,
-                }
-            config_stats[key]["count"] += 1
-            # Win detection: a player wins if they won at least one game in
-            # this match (swiss + cut wins > 0). This is the closest we can
-            # get to a per-match win indicator without a `winner` column.
-            # The old code attempted to use `row.winner` and `swiss_standing`
-            # but neither existed on PlayerStanding, so wins were always 0.
-            total_wins = swiss_wins + cut_wins
-            if total_wins > 0:
-                config_stats[key]["wins"] += total_wins
-
-    # Sort by count desc, take top N
-    sorted_configs = sorted(config_stats.values(), key=lambda x: x["count"], reverse=True)[:limit]
-
     # Enrich with upgrade names/images
     results = []
-    for cfg in sorted_configs:
+    for signature, count, wins, _total in rows:
+        count = int(count or 0)
+        wins = int(wins or 0)
         enriched_upgrades = []
-        for uid in cfg["upgrade_ids"]:
+        for uid in (signature.split("|") if signature else []):
             info = all_upgrades.get(uid, {})
             enriched_upgrades.append({
                 "xws": uid,
@@ -185,12 +186,13 @@ def get_pilot_configurations(
                 "type": info.get("type", ""),
                 "image": info.get("image", ""),
             })
-        wr = round((cfg["wins"] / cfg["count"]) * 100, 1) if cfg["count"] > 0 else 0
+        wr = round((wins / count) * 100, 1) if count > 0 else 0
         results.append({
             "upgrades": enriched_upgrades,
-            "count": cfg["count"],
-            "wins": cfg["wins"],
+            "count": count,
+            "wins": wins,
             "win_rate": wr,
         })
 
-    return {"configurations": results, "total": len(config_stats)}
+    total = int(rows[0][3]) if rows else 0
+    return {"configurations": results, "total": total}
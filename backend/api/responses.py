@@ -0,0 +1,324 @@
+"""
+Fast JSON responses for payloads the API builds itself.
+
+For a route with a `response_model`, FastAPI validates whatever the
+endpoint returns against that model and then serializes it (older
+versions through jsonable_encoder and stdlib json). Our endpoints already
+return models they constructed (and so validated) themselves, or cached
+ones, so that second pass is pure overhead on the largest payloads
+(meta snapshot, list pages, tournament detail with embedded list_json).
+
+Endpoints keep `response_model` for the OpenAPI schema but return
+`json_response(payload)`: a ready Response is passed through by FastAPI
+untouched. Encoding:
+
+  - pydantic models (and lists of them): pydantic-core's Rust serializer,
+    same output as `model_dump_json`;
+  - anything else: orjson when installed, else pydantic-core as well.
+
+Every response carries `Server-Timing: serialize;desc=<encoder>;dur=<ms>`,
+visible in the browser devtools, so the encode cost per endpoint can be
+compared directly.
+
+`streaming_json_response` sends a large object as it is encoded: list
+fields longer than `chunk_items` are encoded and sent a chunk of items at
+a time, so the full body never sits in memory at once. Values wrapped in
+`RawJSON` (JSON the database already produced, e.g. `list_json::text`),
+whether a field or a value of dicts inside a list field, are copied into
+the body as they are, without being decoded and re-encoded.
+
+`cached_endpoint` turns a sync endpoint into an async one with a response
+cache: the encoded body is cached (backend/cache.py, so data_version and
+prefix invalidation apply) under the endpoint's cache prefix, the
+request's path and the parameter values the endpoint was called with
+(undeclared query parameters do not split the cache). Hits are answered on the event loop without a
+thread or a database round trip; misses run the original function and the
+encoding in an API worker thread (see backend/database.py).
+
+A miss runs inside a `QueryScope` with the endpoint's query profile
+(statement_timeout, work_mem, jit; see database.QUERY_PROFILES). While it
+runs, the client connection is polled: when the client goes away, the
+running statement is cancelled on the server and the computation is
+abandoned (other requests waiting on the same key recompute it). It also
+holds `weight` slots of the heavy admission limiter; when none are free
+within the short queue wait it fails fast with a 503.
+
+With a latency budget (LATENCY_BUDGET_SECONDS, or `budget=`), a miss that
+is still computing when the budget runs out is answered with the value
+the same key had before the last data_version change or catalog reload,
+marked `X-Cache-Status: stale` plus `X-Stale-Data-Version`; the
+computation keeps running and fills the cache. Without such a value the
+request waits as before.
+"""
+import asyncio
+import functools
+import inspect
+import os
+import time
+from collections.abc import Callable, Iterator
+from enum import Enum
+
+import pydantic_core
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from ..admission import heavy
+from ..cache import (
+    ComputeAbandoned,
+    get_cached_or_compute_async,
+    last_known_good,
+    peek,
+    retain_last_known_good,
+)
+from ..database import QueryScope
+
+try:
+    import orjson
+except ImportError:  # optional: pydantic-core serializes everything too
+    orjson = None
+
+ENCODER = "orjson" if orjson is not None else "pydantic-core"
+
+DISCONNECT_POLL_SECONDS = 0.5
+# 0 = off. Otherwise a cache miss still computing after this many seconds
+# is answered with the key's last-known-good value, marked stale.
+LATENCY_BUDGET_SECONDS = float(os.getenv("LATENCY_BUDGET_SECONDS", "0"))
+_MISS = object()
+# nginx's "client closed request"; nobody receives it, but it keeps these
+# out of the 5xx counts in the access log.
+CLIENT_CLOSED_REQUEST = 499
+
+
+def _orjson_default(obj):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    return pydantic_core.to_jsonable_python(obj)
+
+
+def encode_json(content) -> bytes:
+    """Compact UTF-8 JSON for `content` (models, dicts, lists, scalars)."""
+    if isinstance(content, BaseModel) or (
+        isinstance(content, list) and content and isinstance(content[0], BaseModel)
+    ):
+        return pydantic_core.to_json(content)
+    if orjson is not None:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+    return pydantic_core.to_json(content)
+
+
+def server_timing(dur_seconds: float, name: str = "serialize", desc: str = ENCODER) -> str:
+    return f'{name};desc="{desc}";dur={dur_seconds * 1000:.2f}'
+
+
+def json_response(
+    content, status_code: int = 200, headers: dict[str, str] | None = None
+) -> Response:
+    """Encode `content` now, skipping FastAPI's response-model pass."""
+    start = time.perf_counter()
+    body = encode_json(content)
+    response = Response(
+        content=body, status_code=status_code, headers=headers, media_type="application/json"
+    )
+    response.headers["Server-Timing"] = server_timing(time.perf_counter() - start)
+    return response
+
+
+class RawJSON(bytes):
+    """An already-encoded JSON value, written to the body unchanged by
+    iter_json. The caller vouches that it is valid JSON."""
+
+
+def _encode_value(value) -> bytes:
+    """encode_json, except RawJSON values and dicts holding them."""
+    if isinstance(value, RawJSON):
+        return value
+    if not isinstance(value, dict):
+        return encode_json(value)
+    out = []
+    plain: dict = {}
+    for key, item in value.items():
+        if isinstance(item, RawJSON):
+            if plain:
+                out.append(encode_json(plain)[1:-1])
+                plain = {}
+            out.append(encode_json(key) + b":" + item)
+        else:
+            plain[key] = item
+    if plain:
+        out.append(encode_json(plain)[1:-1])
+    return b"{" + b",".join(out) + b"}"
+
+
+def _encode_items(items: list) -> bytes:
+    """Array items without the brackets; dict items may hold RawJSON."""
+    if isinstance(items[0], dict):
+        return b",".join(_encode_value(item) for item in items)
+    return encode_json(items)[1:-1]
+
+
+def _fields(content) -> dict:
+    if isinstance(content, BaseModel):
+        return {name: getattr(content, name) for name in type(content).model_fields}
+    return content
+
+
+def iter_json(content, chunk_items: int = 200) -> Iterator[bytes]:
+    """JSON for a model or dict, yielded field by field; long list fields
+    are split into chunks of `chunk_items` items."""
+    yield b"{"
+    for i, (key, value) in enumerate(_fields(content).items()):
+        prefix = (b"," if i else b"") + encode_json(key) + b":"
+        if isinstance(value, list) and len(value) > chunk_items:
+            yield prefix + b"["
+            for start in range(0, len(value), chunk_items):
+                chunk = _encode_items(value[start:start + chunk_items])
+                yield (b"," if start else b"") + chunk
+            yield b"]"
+        elif isinstance(value, list) and value:
+            yield prefix + b"[" + _encode_items(value) + b"]"
+        else:
+            yield prefix + _encode_value(value)
+    yield b"}"
+
+
+def streaming_json_response(
+    content, status_code: int = 200, chunk_items: int = 200
+) -> StreamingResponse:
+    """Stream a large model/dict. Headers go out before the body is encoded,
+    so there is no Server-Timing header on these."""
+    return StreamingResponse(
+        iter_json(content, chunk_items),
+        status_code=status_code,
+        media_type="application/json",
+    )
+
+
+def _key_value(value) -> str:
+    if isinstance(value, Enum):
+        return str(value.value)
+    if isinstance(value, (list, tuple, set)):
+        return ",".join(sorted(_key_value(v) for v in value))
+    return str(value)
+
+
+def _request_key(prefix: str, path: str, arguments: dict) -> str:
+    """
+    Response cache key from the arguments FastAPI resolved for the
+    endpoint, not from the raw query string: parameters the endpoint does
+    not declare (cache busters, tracking tags) never reach it and so do
+    not make a new key, and an omitted parameter and its spelled-out
+    default share one.
+    """
+    query = "&".join(f"{k}={_key_value(v)}" for k, v in sorted(arguments.items()))
+    return f"{prefix}resp|{path}?{query}"
+
+
+def _consume(task: asyncio.Future) -> None:
+    if not task.cancelled():
+        task.exception()  # retrieved, so asyncio does not log it
+
+
+def _kept(entry: tuple) -> bool:
+    return entry[2]
+
+
+async def _compute_within_budget(key: str, compute, budget: float):
+    """(value, None), or (last-known-good value, its data_version) when
+    the computation is still running after `budget` seconds and the key
+    had a value before. The computation then finishes in the background
+    and fills the cache for the next request."""
+    if not budget or peek(key, _MISS) is not _MISS:
+        return await get_cached_or_compute_async(key, compute, _kept), None
+    task = asyncio.ensure_future(get_cached_or_compute_async(key, compute, _kept))
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), budget), None
+    except asyncio.TimeoutError:
+        fallback = last_known_good(key)
+        if fallback is None:
+            return await task, None
+        task.add_done_callback(_consume)
+        value, version = fallback
+        return value, version or "unknown"
+
+
+async def _cancel_on_disconnect(request: Request, scope: QueryScope) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+    scope.cancel()
+
+
+def cached_endpoint(
+    prefix: str,
+    cacheable: Callable[[object], bool] | None = None,
+    profile: str = "aggregate",
+    weight: int = 1,
+    budget: float | None = None,
+):
+    """Decorator: serve the sync endpoint below it as an async endpoint
+    whose encoded responses are cached under `prefix`.
+
+    Use between `@router.get(...)` and the function. The function keeps its
+    FastAPI parameters and returns a model or plain data, as usual. A
+    result for which `cacheable(result)` is false is served to the request
+    that computed it but never cached (e.g. a degraded meta snapshot). `profile` names the query
+    profile its queries run with; `weight` is its cost in heavy admission
+    slots (backend/admission.py), taken only while computing a miss.
+    `budget` overrides LATENCY_BUDGET_SECONDS for this endpoint.
+    """
+    budget_seconds = LATENCY_BUDGET_SECONDS if budget is None else budget
+    if budget_seconds:
+        retain_last_known_good(f"{prefix}resp|")
+
+    def decorate(fn):
+        signature = inspect.signature(fn)
+        request_param = inspect.Parameter(
+            "_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request
+        )
+
+        @functools.wraps(fn)
+        async def endpoint(*args, _request: Request, **kwargs):
+            key = _request_key(
+                prefix, _request.url.path, signature.bind(*args, **kwargs).arguments
+            )
+            scope = QueryScope(profile)
+
+            def compute():
+                with heavy.slot(weight), scope:
+                    try:
+                        content = fn(*args, **kwargs)
+                    except Exception as e:
+                        if scope.cancelled:
+                            raise ComputeAbandoned(key) from e
+                        raise
+                start = time.perf_counter()
+                body = encode_json(content)
+                keep = cacheable is None or cacheable(content)
+                return body, time.perf_counter() - start, keep
+
+            start = time.perf_counter()
+            watcher = asyncio.create_task(_cancel_on_disconnect(_request, scope))
+            try:
+                (body, encode_dur, _keep), stale_version = await _compute_within_budget(
+                    key, compute, budget_seconds
+                )
+            except ComputeAbandoned:
+                return Response(status_code=CLIENT_CLOSED_REQUEST)
+            finally:
+                watcher.cancel()
+            response = Response(content=body, media_type="application/json")
+            response.headers["Server-Timing"] = ", ".join((
+                server_timing(encode_dur),
+                server_timing(time.perf_counter() - start, "total", "cached endpoint"),
+            ))
+            if stale_version is not None:
+                response.headers["X-Cache-Status"] = "stale"
+                response.headers["X-Stale-Data-Version"] = stale_version
+            return response
+
+        endpoint.__signature__ = signature.replace(
+            parameters=[*signature.parameters.values(), request_param]
+        )
+        return endpoint
+
+    return decorate
@@ -136,6 +136,9 @@ class MetaSnapshotResponse(BaseModel):
     date_range: str
     total_tournaments: int
     total_players: int
+    # Snapshot parts that failed or ran out of time (parallel mode); their
+    # breakdowns are served empty.
+    degraded: list[str] = []
 
 
 class PaginatedTournamentsResponse(BaseModel):
@@ -150,6 +153,8 @@ class PaginatedListsResponse(BaseModel):
     total: int
     page: int
     size: int
+    # Keyset cursor for the next page (pushdown path); None on the last page.
+    next_cursor: str | None = None
 
 
 class PaginatedPilotsResponse(BaseModel):
@@ -3,7 +3,7 @@ Ship Detail API endpoints.
 
 Provides ship info, pilot breakdown, top lists, and top squadrons.
 """
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query
 from collections import defaultdict
 
 from ..analytics.ships import aggregate_ship_stats
@@ -13,9 +13,11 @@ from ..analytics.core import aggregate_card_stats
 from ..data_structures.sorting_order import SortingCriteria, SortDirection
 from ..data_structures.data_source import DataSource
 from ..utils.xwing_data.ships import load_all_ships
-from .formatters import enrich_list_data
+from ..admission import light_slot
+from .formatters import enrich_lists_batch
+from .responses import json_response
 
-router = APIRouter(prefix="/api/ship", tags=["Ship Detail"])
+router = APIRouter(prefix="/api/ship", tags=["Ship Detail"], dependencies=[Depends(light_slot)])
 
 
 @router.get("/{ship_xws}")
@@ -96,7 +98,7 @@ def get_ship_lists(
         for l in top
         if l.get("signature")
     ]
-    return {"lists": [enrich_list_data(l, source=ds) for l in enriched]}
+    return json_response({"lists": enrich_lists_batch(enriched, source=ds)})
 
 
 @router.get("/{ship_xws}/squadrons")
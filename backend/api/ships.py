@@ -1,13 +1,17 @@
 from fastapi import APIRouter, Query, Depends
 from ..analytics.ships import aggregate_ship_stats
+from ..analytics.filter_helpers import with_exact_counts
 from ..data_structures.sorting_order import SortingCriteria, SortDirection
 from ..data_structures.data_source import DataSource
+from .responses import cached_endpoint
 from .schemas import PaginatedShipsResponse
 from ..utils.xwing_data.ships import load_all_ships
-from ..cache import get_cached_or_compute
+from ..cache import depends_on_catalog, get_cached_or_compute, get_sorted_permutation
 
 router = APIRouter(prefix="/api/ships", tags=["Ships"])
 
+_CACHE_PREFIX = depends_on_catalog("ships|")
+
 
 def _compute_ships(
     data_source: str,
@@ -17,7 +21,7 @@ def _compute_ships(
 
     The heavy SQL aggregation is sort-independent, so it always runs with a
     neutral sort (Lists desc). The caller applies the requested sort to the
-    cached list before paginating — see _sort_ship_stats.
+    cached list before paginating — see _ship_sort_key.
     """
     try:
         ds_enum = DataSource(data_source)
@@ -32,7 +36,7 @@ def _compute_ships(
     )
 
 
-def _sort_ship_stats(data: list[dict], sort_metric: str, sort_direction: str) -> list[dict]:
+def _ship_sort_key(sort_metric: str):
     def sort_key(item):
         if sort_metric == "Squadrons":
             return (item.get("squadron_count", 0), item.get("games_count", 0))
@@ -46,7 +50,7 @@ def _sort_ship_stats(data: list[dict], sort_metric: str, sort_direction: str) ->
             return item.get("xws", "")
         return (item.get("list_count", 0), item.get("games_count", 0))
 
-    return sorted(data, key=sort_key, reverse=(sort_direction == "desc"))
+    return sort_key
 
 
 @router.get("/all")
@@ -73,6 +77,7 @@ def get_all_ships(data_source: str = Query("xwa")):
 
 
 @router.get("", response_model=PaginatedShipsResponse)
+@cached_endpoint(_CACHE_PREFIX)
 def get_ships(
     page: int = Query(0, ge=0),
     size: int = Query(20, ge=1, le=200),
@@ -92,6 +97,7 @@ def get_ships(
     date_end: str | None = Query(None),
     player_count_min: int | None = Query(None),
     player_count_max: int | None = Query(None),
+    approx: bool = Query(False, description="Approximate distinct counts (HyperLogLog) for the full ranking; the returned page is exact"),
 ):
     filters = {
         "allowed_formats": formats,
@@ -106,11 +112,12 @@ def get_ships(
         "date_end": date_end,
         "player_count_min": player_count_min,
         "player_count_max": player_count_max,
+        "approx_distinct": approx,
     }
 
     # page/size excluded — pagination is done AFTER caching.
     cache_key = (
-        f"ships|{data_source}"
+        f"{_CACHE_PREFIX}{data_source}"
         f"|{','.join(sorted(formats or []))}"
         f"|{','.join(sorted(factions or []))}"
         f"|{','.join(sorted(ships or []))}"
@@ -121,6 +128,7 @@ def get_ships(
         f"|{','.join(sorted(city or []))}"
         f"|{date_start or ''}|{date_end or ''}"
         f"|{player_count_min}|{player_count_max}"
+        f"|approx={approx}"
     )
 
     def compute():
@@ -131,8 +139,22 @@ def get_ships(
 
     data = get_cached_or_compute(cache_key, compute)
     # Sort AFTER the cache lookup — the heavy aggregation is sort-independent.
-    data = _sort_ship_stats(data, sort_metric, sort_direction)
+    # The order is a cached permutation, so a page is a slice lookup.
+    order = get_sorted_permutation(
+        cache_key,
+        (sort_metric, sort_direction),
+        data,
+        _ship_sort_key(sort_metric),
+        reverse=(sort_direction == "desc"),
+    )
     total = len(data)
-    items = data[page * size : (page + 1) * size]
+    items = [data[i] for i in order[page * size : (page + 1) * size]]
+    if approx:
+        items = with_exact_counts(
+            list(items), cache_key,
+            lambda ids: _compute_ships(
+                data_source, {**filters, "approx_distinct": False, "only_ships": ids}
+            ),
+        )
 
     return PaginatedShipsResponse(items=list(items), total=total, page=page, size=size)
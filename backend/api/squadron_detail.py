@@ -1,13 +1,74 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session
 from sqlalchemy import text
 
-from ..database import engine
+from ..database import read_engine, stream_rows
+from ..cache import depends_on_catalog, get_cached_or_compute
 from ..data_structures.data_source import parse_data_source
 from ..analytics.filter_helpers import format_filter_clause
-from .formatters import enrich_list_data
-
-router = APIRouter(prefix="/api/squadron", tags=["Squadron Detail"])
+from ..admission import light_slot
+from .formatters import enrich_lists_batch
+from .responses import json_response
+
+router = APIRouter(prefix="/api/squadron", tags=["Squadron Detail"], dependencies=[Depends(light_slot)])
+
+_BASE_PREFIX = depends_on_catalog("squadron_base|")
+
+# Per-list aggregates for one ship_list. {fmt_clause} is the format filter
+# fragment from format_filter_clause (leading " AND ").
+_SQUADRON_LISTS_CTE = """
+    WITH squadron_lists AS (
+        SELECT
+            l.id AS list_id,
+            COUNT(*) AS entries,
+            SUM(
+                COALESCE(ps.swiss_wins, 0) + COALESCE(ps.swiss_losses, 0) +
+                COALESCE(ps.swiss_draws, 0) + COALESCE(ps.cut_wins, 0) +
+                COALESCE(ps.cut_losses, 0) + COALESCE(ps.cut_draws, 0)
+            ) AS games,
+            SUM(COALESCE(ps.swiss_wins, 0) + COALESCE(ps.cut_wins, 0)) AS wins
+        FROM playerstanding ps
+        JOIN list l ON l.id = ps.list_id
+        JOIN tournament t ON t.id = ps.tournament_id
+        WHERE l.ship_list = :ship_sig{fmt_clause}
+        GROUP BY l.id
+    )
+"""
+
+# One row per list, without list_json. `has_json` / `has_pilots` carry the
+# checks the endpoints used to make on the decoded JSON.
+_LIST_ROWS_SQL = _SQUADRON_LISTS_CTE + """
+    SELECT
+        sl.list_id, l.canonical_signature, l.faction, l.faction_xws_normalized,
+        l.name, l.points, sl.entries, sl.games, sl.wins,
+        jsonb_typeof(l.list_json) = 'object' AS has_json,
+        COALESCE(jsonb_typeof(l.list_json->'pilots') = 'array'
+                 AND jsonb_array_length(l.list_json->'pilots') > 0, false) AS has_pilots
+    FROM squadron_lists sl
+    JOIN list l ON l.id = sl.list_id
+    ORDER BY sl.games DESC, sl.list_id
+"""
+
+# Pilot breakdown: every pilot entry of every list adds that list's games
+# and wins (a pilot fielded twice in a list counts twice, as before).
+# Pilots without an id fall back to their name.
+_PILOT_ROWS_SQL = _SQUADRON_LISTS_CTE + """
+    SELECT
+        COALESCE(NULLIF(p->>'id', ''), NULLIF(p->>'name', ''), 'unknown') AS pilot_xws,
+        (array_agg(p->>'ship'))[1] AS ship_xws,
+        (array_agg(p->>'name'))[1] AS name,
+        (array_agg(p->'points'))[1] AS cost,
+        SUM(sl.games) AS games,
+        SUM(sl.wins) AS wins
+    FROM squadron_lists sl
+    JOIN list l ON l.id = sl.list_id
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(l.list_json->'pilots') = 'array'
+             THEN l.list_json->'pilots' ELSE '[]'::jsonb END
+    ) p
+    GROUP BY 1
+    ORDER BY games DESC
+"""
 
 
 def _normalize_ship_signature(signature: str) -> str:
@@ -20,6 +81,56 @@ def _normalize_ship_signature(signature: str) -> str:
     return signature.replace(" ", "")
 
 
+def _squadron_base(ship_sig: str, allowed_formats: list[str] | None) -> dict:
+    """
+    Cached aggregates shared by the three squadron detail endpoints.
+
+    Holds the per-list rows (games desc, no list_json) and the SQL-side
+    pilot breakdown for one (ship_list, formats) pair. Only aggregated rows
+    leave the database; /lists fetches list_json for its top 20 alone.
+    """
+    formats_key = ",".join(sorted(allowed_formats or []))
+    return get_cached_or_compute(
+        f"{_BASE_PREFIX}{ship_sig}|{formats_key}",
+        lambda: _compute_squadron_base(ship_sig, allowed_formats),
+    )
+
+
+def _compute_squadron_base(ship_sig: str, allowed_formats: list[str] | None) -> dict:
+    params: dict = {"ship_sig": ship_sig}
+    fmt_clause = format_filter_clause(allowed_formats, params)
+
+    with Session(read_engine()) as session:
+        lists = [
+            {
+                "list_id": row[0],
+                "signature": row[1],
+                "faction": row[2],
+                "faction_xws": row[3],
+                "name": row[4],
+                "points": row[5],
+                "popularity": int(row[6] or 0),
+                "games": int(row[7] or 0),
+                "wins": int(row[8] or 0),
+                "has_json": bool(row[9]),
+                "has_pilots": bool(row[10]),
+            }
+            for row in stream_rows(session, text(_LIST_ROWS_SQL.format(fmt_clause=fmt_clause)), params)
+        ]
+        pilots = [
+            {
+                "pilot_xws": row[0],
+                "ship_xws": row[1] or "unknown",
+                "name": row[2] or row[0],
+                "cost": row[3] if row[3] is not None else 0,
+                "games": int(row[4] or 0),
+                "wins": int(row[5] or 0),
+            }
+            for row in stream_rows(session, text(_PILOT_ROWS_SQL.format(fmt_clause=fmt_clause)), params)
+        ] if lists else []
+    return {"lists": lists, "pilots": pilots}
+
+
 @router.get("/{signature:path}/stats")
 def get_squadron_stats(
     signature: str,
@@ -29,54 +140,29 @@ def get_squadron_stats(
     """
     Get aggregated statistics for a specific squadron signature.
 
-    Uses the normalized `list.ship_list` field for a SQL-side filter,
-    so we only process rows that match the requested squadron.
+    Totals are summed from the cached per-list rows of _squadron_base.
     """
     ship_sig = _normalize_ship_signature(signature)
+    lists = _squadron_base(ship_sig, allowed_formats)["lists"]
 
-    with Session(engine) as session:
-        # Pre-computed faction lives on the list row.
-        list_row = session.execute(
-            text("SELECT faction FROM list WHERE ship_list = :ship_sig LIMIT 1"),
-            {"ship_sig": ship_sig},
-        ).first()
-        faction = list_row[0] if list_row and list_row[0] else "Unknown"
-
-        params: dict = {"ship_sig": ship_sig}
-        fmt_clause = format_filter_clause(allowed_formats, params)
-
-        sql = text(
-            f"""
-            SELECT
-                COUNT(*) as count,
-                SUM(
-                    COALESCE(ps.swiss_wins, 0) + COALESCE(ps.swiss_losses, 0) +
-                    COALESCE(ps.swiss_draws, 0) + COALESCE(ps.cut_wins, 0) +
-                    COALESCE(ps.cut_losses, 0) + COALESCE(ps.cut_draws, 0)
-                ) as games,
-                SUM(COALESCE(ps.swiss_wins, 0) + COALESCE(ps.cut_wins, 0)) as wins
-            FROM playerstanding ps
-            JOIN list l ON l.id = ps.list_id
-            JOIN tournament t ON t.id = ps.tournament_id
-            WHERE l.ship_list = :ship_sig{fmt_clause}
-            """
-        )
-        row = session.execute(sql, params).first()
-        count = int(row[0] or 0) if row else 0
-        games = int(row[1] or 0) if row else 0
-        wins = int(row[2] or 0) if row else 0
-
-        if games == 0:
-            raise HTTPException(status_code=404, detail="Squadron not found or has no games")
-
-        return {
-            "signature": signature,
-            "faction": faction,
-            "games": games,
-            "wins": wins,
-            "win_rate": round(wins / games * 100, 1),
-            "popularity": count
-        }
+    count = sum(item["popularity"] for item in lists)
+    games = sum(item["games"] for item in lists)
+    wins = sum(item["wins"] for item in lists)
+
+    if games == 0:
+        raise HTTPException(status_code=404, detail="Squadron not found or has no games")
+
+    # Pre-computed faction lives on the list row.
+    faction = lists[0]["faction"] or "Unknown"
+
+    return {
+        "signature": signature,
+        "faction": faction,
+        "games": games,
+        "wins": wins,
+        "win_rate": round(wins / games * 100, 1),
+        "popularity": count
+    }
 
 
 @router.get("/{signature:path}/pilots")
@@ -88,69 +174,17 @@ def get_squadron_pilots(
     """
     Get pilot breakdown for a specific squadron signature.
 
-    Uses JOIN on the list table so we only process rows that match
-    the requested ship composition, and reads pilots directly from
-    list.list_json (one row per signature, not N rows in playerstanding).
+    The per-pilot games/wins are grouped in SQL (pilots unnested from
+    list.list_json), so no list JSON is transferred.
     """
     ship_sig = _normalize_ship_signature(signature)
+    base = _squadron_base(ship_sig, allowed_formats)
 
-    with Session(engine) as session:
-        params: dict = {"ship_sig": ship_sig}
-        fmt_clause = format_filter_clause(allowed_formats, params)
-
-        # GROUP BY list_id so we de-duplicate the JSON work; aggregate stats
-        # from playerstanding in SQL.
-        sql = text(
-            f"""
-            SELECT
-                l.list_json,
-                COUNT(*) as count,
-                SUM(
-                    COALESCE(ps.swiss_wins, 0) + COALESCE(ps.swiss_losses, 0) +
-                    COALESCE(ps.swiss_draws, 0) + COALESCE(ps.cut_wins, 0) +
-                    COALESCE(ps.cut_losses, 0) + COALESCE(ps.cut_draws, 0)
-                ) as games,
-                SUM(COALESCE(ps.swiss_wins, 0) + COALESCE(ps.cut_wins, 0)) as wins
-            FROM playerstanding ps
-            JOIN list l ON l.id = ps.list_id
-            JOIN tournament t ON t.id = ps.tournament_id
-            WHERE l.ship_list = :ship_sig{fmt_clause}
-            GROUP BY l.id, l.list_json
-            """
-        )
-        rows = session.execute(sql, params).fetchall()
-
-    pilot_stats: dict[str, dict] = {}
-    total_games = 0
-
-    for row in rows:
-        list_json = row[0]
-        if not list_json or not isinstance(list_json, dict):
-            continue
-        pilots = list_json.get("pilots", [])
-        if not pilots:
-            continue
-
-        games = int(row[2] or 0)
-        wins = int(row[3] or 0)
-        total_games += games
-
-        for p in pilots:
-            p_id = p.get("id") or p.get("name") or "unknown"
-            if p_id not in pilot_stats:
-                pilot_stats[p_id] = {
-                    "pilot_xws": p_id,
-                    "ship_xws": p.get("ship") or "unknown",
-                    "name": p.get("name", p_id),
-                    "cost": p.get("points", 0),
-                    "games": 0,
-                    "wins": 0
-                }
-            pilot_stats[p_id]["games"] += games
-            pilot_stats[p_id]["wins"] += wins
+    # Share of games counts only lists that actually have pilots.
+    total_games = sum(item["games"] for item in base["lists"] if item["has_pilots"])
 
     results = []
-    for p_id, stats in pilot_stats.items():
+    for stats in base["pilots"]:
         w_g = stats["games"]
         win_rate = round(stats["wins"] / w_g * 100, 1) if w_g > 0 else 0.0
         percent_of_squadron = round(w_g / total_games * 100, 1) if total_games > 0 else 0.0
@@ -165,7 +199,6 @@ def get_squadron_pilots(
             "percent_of_squadron": percent_of_squadron
         })
 
-    results.sort(key=lambda x: x["games"], reverse=True)
     return results
 
 
@@ -178,72 +211,46 @@ def get_squadron_lists(
     """
     Get top performing lists that use exactly this squadron signature.
 
-    Filters the list table by ship_list at the SQL level instead of
-    fetching all lists and re-computing ship signatures in Python.
+    Ranks the cached per-list rows, then loads list_json for the top 20
+    only.
     """
     ds_enum = parse_data_source(data_source)
 
     ship_sig = _normalize_ship_signature(signature)
-
-    with Session(engine) as session:
-        params: dict = {"ship_sig": ship_sig}
-        fmt_clause = format_filter_clause(allowed_formats, params)
-
-        sql = text(
-            f"""
-            SELECT
-                l.canonical_signature,
-                l.faction,
-                l.faction_xws_normalized,
-                l.name,
-                l.points,
-                l.list_json,
-                COUNT(*) as games,
-                SUM(
-                    COALESCE(ps.swiss_wins, 0) + COALESCE(ps.swiss_losses, 0) +
-                    COALESCE(ps.swiss_draws, 0) + COALESCE(ps.cut_wins, 0) +
-                    COALESCE(ps.cut_losses, 0) + COALESCE(ps.cut_draws, 0)
-                ) as total_games,
-                SUM(COALESCE(ps.swiss_wins, 0) + COALESCE(ps.cut_wins, 0)) as wins
-            FROM playerstanding ps
-            JOIN list l ON l.id = ps.list_id
-            JOIN tournament t ON t.id = ps.tournament_id
-            WHERE l.ship_list = :ship_sig{fmt_clause}
-            GROUP BY l.id, l.canonical_signature, l.faction, l.faction_xws_normalized,
-                     l.name, l.points, l.list_json
-            """
-        )
-        rows = session.execute(sql, params).fetchall()
-
-    squadron_lists = []
-    for row in rows:
-        list_json = row[5]
+    top = [item for item in _squadron_base(ship_sig, allowed_formats)["lists"] if item["has_json"]][:20]
+    if not top:
+        return []
+
+    with Session(read_engine()) as session:
+        rows = session.execute(
+            text("SELECT id, list_json FROM list WHERE id = ANY(:ids)"),
+            {"ids": [item["list_id"] for item in top]},
+        ).fetchall()
+    list_json_by_id = {row[0]: row[1] for row in rows}
+
+    raw_lists = []
+    for item in top:
+        list_json = list_json_by_id.get(item["list_id"])
         if not list_json or not isinstance(list_json, dict):
             continue
-        # enrich_list_data expects upgrades in the original format:
+        # enrich_lists_batch expects upgrades in the original format:
         # {"slot_xws": [upgrade_xws, ...], ...} (slot → list of upgrade IDs).
         # The raw list_json already has this format, so we can pass it through
         # without reformatting.
-        # Row tuple layout (from the SQL above):
-        #   [0]=canonical_signature, [1]=faction, [2]=faction_xws_normalized,
-        #   [3]=name, [4]=points, [5]=list_json,
-        #   [6]=COUNT(*) (number of playerstanding rows — popularity),
-        #   [7]=SUM(total_games) (rounds played),
-        #   [8]=SUM(wins)
-        # NB: a previous version had `wins` and `games` swapped here, which
-        # inflated win_rate (it divided row count into total rounds).
+        # `games` is the rounds played and `popularity` the number of
+        # playerstanding rows (a previous version had them swapped, which
+        # inflated win_rate).
         l_data = {
-            "signature": row[0],
-            "name": row[3] or "",
-            "points": row[4] or 0,
+            "signature": item["signature"],
+            "name": item["name"] or "",
+            "points": item["points"] or 0,
             "original_points": 0,
-            "faction_xws": row[2] or "unknown",
+            "faction_xws": item["faction_xws"] or "unknown",
             "pilots": list_json.get("pilots", []),
-            "wins": int(row[8] or 0),
-            "games": int(row[7] or 0),
-            "popularity": int(row[6] or 0),
+            "wins": item["wins"],
+            "games": item["games"],
+            "popularity": item["popularity"],
         }
-        squadron_lists.append(enrich_list_data(l_data, source=ds_enum))
+        raw_lists.append(l_data)
 
-    squadron_lists.sort(key=lambda x: x.games, reverse=True)
-    return squadron_lists[:20]
+    return json_response(enrich_lists_batch(raw_lists, source=ds_enum))
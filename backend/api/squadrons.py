@@ -2,11 +2,14 @@ from fastapi import APIRouter, Query
 from ..analytics.squadrons import aggregate_squadron_stats
 from ..data_structures.data_source import DataSource
 from ..data_structures.sorting_order import SortingCriteria, SortDirection
-from ..cache import get_cached_or_compute
+from ..cache import depends_on_catalog, get_cached_or_compute, get_sorted_permutation
 from ..utils.xwing_data.ships import load_all_ships
+from .responses import cached_endpoint
 
 router = APIRouter(prefix="/api/squadrons", tags=["Squadrons"])
 
+_CACHE_PREFIX = depends_on_catalog("squadrons|")
+
 
 def _compute_squadrons(
     data_source: str,
@@ -16,7 +19,7 @@ def _compute_squadrons(
 
     Returns a dict with `filtered` (full list in neutral games-desc order)
     and `total` for the caller to sort, paginate, and enrich. Sorting is
-    applied AFTER the cache lookup — see _sort_squadron_stats.
+    applied AFTER the cache lookup — see _squadron_sort_key.
     """
     try:
         ds_enum = DataSource(data_source)
@@ -46,18 +49,18 @@ def _compute_squadrons(
     return {"filtered": filtered_data, "total": total}
 
 
-def _sort_squadron_stats(data: list[dict], sort_metric: str, sort_direction: str) -> list[dict]:
-    reverse = sort_direction == "desc"
+def _squadron_sort_key(sort_metric: str):
     if sort_metric == "Win Rate":
-        return sorted(data, key=lambda x: x["win_rate"], reverse=reverse)
+        return lambda x: x["win_rate"]
     elif sort_metric == "Lists":
-        return sorted(data, key=lambda x: x.get("different_lists_count", 0), reverse=reverse)
+        return lambda x: x.get("different_lists_count", 0)
     elif sort_metric == "Entries":
-        return sorted(data, key=lambda x: x.get("popularity", x.get("count", 0)), reverse=reverse)
-    return sorted(data, key=lambda x: x["games"], reverse=reverse)
+        return lambda x: x.get("popularity", x.get("count", 0))
+    return lambda x: x["games"]
 
 
 @router.get("")
+@cached_endpoint(_CACHE_PREFIX, weight=2)
 def get_squadrons(
     page: int = Query(0, ge=0),
     size: int = Query(20, ge=1, le=100),
@@ -101,7 +104,7 @@ def get_squadrons(
     # page/size excluded — pagination is done AFTER caching.
     # sort_metric/sort_direction excluded — sorting is done AFTER caching.
     cache_key = (
-        f"squadrons|{data_source}|"
+        f"{_CACHE_PREFIX}{data_source}|"
         f"{','.join(sorted(formats or []))}|"
         f"{','.join(sorted(factions or []))}|"
         f"{','.join(sorted(ships or []))}|"
@@ -123,11 +126,19 @@ def get_squadrons(
     cached = get_cached_or_compute(cache_key, compute)
 
     # Sort AFTER the cache lookup — the heavy aggregation is sort-independent.
-    filtered = _sort_squadron_stats(cached["filtered"], sort_metric, sort_direction)
+    # The order is a cached permutation, so a page is a slice lookup.
+    filtered = cached["filtered"]
+    order = get_sorted_permutation(
+        cache_key,
+        (sort_metric, sort_direction),
+        filtered,
+        _squadron_sort_key(sort_metric),
+        reverse=(sort_direction == "desc"),
+    )
 
     # Paginate + enrich AFTER cache (only enriches the current page slice)
     total = cached["total"]
-    items_raw = filtered[page * size : (page + 1) * size]
+    items_raw = [filtered[i] for i in order[page * size : (page + 1) * size]]
 
     all_ships = load_all_ships(DataSource(data_source) if data_source in ("xwa", "legacy") else DataSource.XWA)
     items = []
@@ -1,12 +1,16 @@
+import functools
 from datetime import date
 from fastapi import APIRouter, Query, HTTPException
 from sqlmodel import Session, select, func
-from sqlalchemy import text
-from ..database import engine
-from ..models import Tournament, PlayerStanding, Match
+from sqlalchemy import Date, text
+from sqlalchemy.sql.elements import TextClause
+from ..analytics.dialects import PostgresSQL, sql_dialect
+from ..database import read_engine, run_batch, run_db
+from ..models import Tournament, PlayerStanding
 from ..data_structures.formats import Format
 from ..data_structures.source import Source
 from ..data_structures.factions import Faction
+from .responses import RawJSON, cached_endpoint, streaming_json_response
 from .schemas import (
     PaginatedTournamentsResponse,
     TournamentData,
@@ -37,7 +41,7 @@ def get_locations():
     """
     Get all unique available locations structured as Continent -> Country -> list of Cities.
     """
-    with Session(engine) as session:
+    with Session(read_engine()) as session:
         continent_col = Tournament.location["continent"].as_string()  # pyright: ignore[reportIndexIssue,reportOptionalSubscript]
         country_col = Tournament.location["country"].as_string()  # pyright: ignore[reportIndexIssue,reportOptionalSubscript]
         city_col = Tournament.location["city"].as_string()  # pyright: ignore[reportIndexIssue,reportOptionalSubscript]
@@ -76,6 +80,7 @@ def get_locations():
         return result
 
 @router.get("", response_model=PaginatedTournamentsResponse)
+@cached_endpoint("tournaments|")
 def get_tournaments(
     page: int = Query(0, ge=0),
     size: int = Query(20, ge=1, le=100),
@@ -92,7 +97,7 @@ def get_tournaments(
     player_count_min: int | None = Query(None),
     player_count_max: int | None = Query(None),
 ):
-    with Session(engine) as session:
+    with Session(read_engine()) as session:
         query = select(Tournament)
         
         if search:
@@ -146,15 +151,22 @@ def get_tournaments(
         # Paginate
         results = session.exec(query.offset(page * size).limit(size)).all()
         
+        # Tournaments without a stored player_count are counted from their
+        # standings, all in one query rather than one per row.
+        uncounted = [t.id for t in results if t.player_count == 0]
+        standing_counts: dict[int, int] = {}
+        if uncounted:
+            standing_counts = dict(session.exec(
+                select(PlayerStanding.tournament_id, func.count(PlayerStanding.id))  # pyright: ignore[reportArgumentType,reportAttributeAccessIssue]
+                .where(PlayerStanding.tournament_id.in_(uncounted))  # pyright: ignore[reportAttributeAccessIssue]
+                .group_by(PlayerStanding.tournament_id)
+            ).all())
+
         items = []
         for t in results:
             player_count = t.player_count
             if player_count == 0:
-                player_count = session.exec(
-                    select(func.count(PlayerStanding.id)).where(  # pyright: ignore[reportArgumentType,reportAttributeAccessIssue]
-                        PlayerStanding.tournament_id == t.id
-                    )
-                ).one_or_none() or 0
+                player_count = standing_counts.get(t.id, 0)  # pyright: ignore[reportArgumentType]
 
             loc_str = _get_location_string(t.location)
 
@@ -188,118 +200,141 @@ def get_tournaments(
         return PaginatedTournamentsResponse(items=items, total=total, page=page, size=size)
 
 @router.get("/{tournament_id}", response_model=TournamentDetailResponse)
-def get_tournament_detail(tournament_id: int):
+async def get_tournament_detail(tournament_id: int):
+    # Embedded list_json makes this the largest body; stream it.
+    return streaming_json_response(await run_db(_tournament_detail, tournament_id))
+
+
+# The three reads of the detail page are independent (player count and
+# match player names come from the standings, in SQL), so run_batch can
+# send them in one pipeline. `->>` also works on SQLite (>= 3.38); date
+# is typed so SQLite's text dates come back as dates too.
+_DETAIL_TOURNAMENT_SQL = text("""
+    SELECT id, name, date, format, source, url,
+           location->>'city' AS city, location->>'country' AS country
+    FROM tournament
+    WHERE id = :tournament_id
+""").columns(date=Date)
+
+# list_json is read as text and spliced into the body unparsed
+# (responses.RawJSON); the faction comes from the joined list row, or
+# from list_json->>'faction' for legacy rows without a list_id.
+_DETAIL_STANDINGS_SQL = """
+    SELECT ps.id, ps.player_name, ps.swiss_rank, ps.cut_rank,
+           ps.swiss_wins, ps.swiss_losses, ps.cut_wins, ps.cut_losses,
+           ps.list_id,
+           COALESCE(NULLIF(l.faction, ''), ps.list_json->>'faction') AS faction,
+           {list_json} AS list_json
+    FROM playerstanding ps
+    LEFT JOIN list l ON l.id = ps.list_id
+    WHERE ps.tournament_id = :tournament_id
+    ORDER BY ps.swiss_rank
+"""
+
+
+@functools.cache
+def _detail_standings_sql(dialect: PostgresSQL) -> TextClause:
+    return text(_DETAIL_STANDINGS_SQL.format(
+        list_json=dialect.json_text_if_array("ps.list_json", "pilots"),
+    ))
+
+_DETAIL_MATCHES_SQL = text("""
+    SELECT m.round_number, m.round_type, m.scenario, m.is_bye, m.winner_id,
+           m.player1_score, m.player2_score,
+           p1.player_name AS player1, p2.player_name AS player2
+    FROM match m
+    LEFT JOIN playerstanding p1 ON p1.id = m.player1_id AND p1.tournament_id = m.tournament_id
+    LEFT JOIN playerstanding p2 ON p2.id = m.player2_id AND p2.tournament_id = m.tournament_id
+    WHERE m.tournament_id = :tournament_id
+    ORDER BY m.round_number
+""")
+
+
+def _tournament_detail(session: Session, tournament_id: int) -> dict:
     from ..utils.xwing_data.parser import normalize_faction
-    
-    with Session(engine) as session:
-        t = session.exec(select(Tournament).where(Tournament.id == tournament_id)).first()
-        if not t:
-            raise HTTPException(status_code=404, detail="Tournament not found")
-            
-        player_count = session.exec(select(func.count(PlayerStanding.id)).where(PlayerStanding.tournament_id == t.id)).one_or_none() or 0  # pyright: ignore[reportArgumentType,reportAttributeAccessIssue]
-        loc_str = _get_location_string(t.location)
-        
-        fmt_str = t.format.lower() if t.format else "unknown"
-        try:
-            fmt = Format(fmt_str)
-        except ValueError:
-            fmt = Format.UNKNOWN
 
-        src_str = t.source.lower() if t.source else "unknown"
-        try:
-            src = Source(src_str)
-        except ValueError:
-            src = Source.UNKNOWN
+    params = {"tournament_id": tournament_id}
+    tournament_rows, all_results, matches_db = run_batch(session, [
+        (_DETAIL_TOURNAMENT_SQL, params),
+        (_detail_standings_sql(sql_dialect()), params),
+        (_DETAIL_MATCHES_SQL, params),
+    ])
+    if not tournament_rows:
+        raise HTTPException(status_code=404, detail="Tournament not found")
+    t = tournament_rows[0]
 
-        t_data = TournamentData(
-            id=t.id,  # pyright: ignore[reportArgumentType,reportAttributeAccessIssue]
-            name=t.name, 
-            date=t.date.strftime("%Y-%m-%d") if t.date else "Unknown",
-            players=player_count, 
-            format=fmt, 
-            source=src, 
-            location=loc_str, 
-            url=t.url or ""
-        )
+    # The row has the city/country attributes of a Location.
+    loc_str = _get_location_string(t)
 
-        query_p = select(PlayerStanding).where(PlayerStanding.tournament_id == tournament_id).order_by(PlayerStanding.swiss_rank)  # pyright: ignore[reportArgumentType,reportAttributeAccessIssue]
-        all_results = session.exec(query_p).all()
+    fmt_str = t.format.lower() if t.format else "unknown"
+    try:
+        fmt = Format(fmt_str)
+    except ValueError:
+        fmt = Format.UNKNOWN
 
-        # Pre-fetch faction from the joined list table for each row.
-        # list_id is set for the bulk of modern rows; legacy rows may be null
-        # and fall back to the original list_json read.
-        list_ids = [p.list_id for p in all_results if p.list_id is not None]
-        faction_by_list_id: dict[int, str] = {}
-        if list_ids:
-            faction_rows = session.execute(
-                text("SELECT id, faction FROM list WHERE id = ANY(:ids)"),
-                {"ids": list_ids},
-            ).fetchall()
-            faction_by_list_id = {r[0]: r[1] for r in faction_rows if r[1] is not None}
+    src_str = t.source.lower() if t.source else "unknown"
+    try:
+        src = Source(src_str)
+    except ValueError:
+        src = Source.UNKNOWN
 
-        players_swiss = []
-        players_cut = []
+    t_data = TournamentData(
+        id=t.id,
+        name=t.name,
+        date=t.date.strftime("%Y-%m-%d") if t.date else "Unknown",
+        players=len(all_results),
+        format=fmt,
+        source=src,
+        location=loc_str,
+        url=t.url or ""
+    )
 
-        for p in all_results:
-            # Read pre-computed faction from the list table when available.
-            list_faction = faction_by_list_id.get(p.list_id) if p.list_id is not None else None
-            if list_faction:
-                f_xws = normalize_faction(list_faction)
-            else:
-                # Fallback: parse faction from the legacy list_json.
-                raw_faction = (
-                    p.list_json.get("faction", "Unknown")
-                    if p.list_json and isinstance(p.list_json, dict)
-                    else "Unknown"
-                )
-                f_xws = normalize_faction(raw_faction)
+    players_swiss = []
+    players_cut = []
 
-            try:
-                faction_enum = Faction(f_xws)
-            except ValueError:
-                faction_enum = Faction.UNKNOWN
+    for p in all_results:
+        try:
+            faction_enum = Faction(normalize_faction(p.faction or "Unknown"))
+        except ValueError:
+            faction_enum = Faction.UNKNOWN
 
-            has_list = bool(p.list_json and isinstance(p.list_json, dict) and p.list_json.get("pilots"))
+        p_res = PlayerStandingData(
+            id=p.id,
+            name=p.player_name,
+            rank=p.swiss_rank if p.swiss_rank is not None else 0,
+            swiss_rank=p.swiss_rank if p.swiss_rank is not None else 0,
+            cut_rank=p.cut_rank,
+            wins=(p.swiss_wins or 0) + (p.cut_wins or 0),
+            losses=(p.swiss_losses or 0) + (p.cut_losses or 0),
+            faction=faction_enum,
+            list_id=p.list_id,
+        ).model_dump(mode="json")
+        if p.list_json is not None:
+            p_res["list_json"] = RawJSON(p.list_json.encode())
 
-            p_res = PlayerStandingData(
-                id=p.id,  # pyright: ignore[reportArgumentType,reportAttributeAccessIssue]
-                name=p.player_name,
-                rank=p.swiss_rank if p.swiss_rank is not None else 0,
-                swiss_rank=p.swiss_rank if p.swiss_rank is not None else 0,
-                cut_rank=p.cut_rank,
-                wins=(p.swiss_wins or 0) + (p.cut_wins or 0),
-                losses=(p.swiss_losses or 0) + (p.cut_losses or 0),
-                faction=faction_enum,
-                list_json=p.list_json if has_list else None,
-                list_id=p.list_id,
-            )
+        players_swiss.append(p_res)
+        if p.cut_rank is not None:
+            players_cut.append({**p_res, "rank": p.cut_rank})
 
-            players_swiss.append(p_res)
-            if p.cut_rank is not None:
-                p_cut = p_res.copy()
-                p_cut.rank = p.cut_rank
-                players_cut.append(p_cut)
-                
-        players_swiss.sort(key=lambda x: x.swiss_rank)
-        players_cut.sort(key=lambda x: x.cut_rank)
-        
-        matches_db = session.exec(select(Match).where(Match.tournament_id == tournament_id).order_by(Match.round_number)).all()  # pyright: ignore[reportArgumentType,reportAttributeAccessIssue]
-        player_map = {p.id: p.player_name for p in all_results}
-        
-        matches = [MatchData(
-            round=m.round_number or 0,
-            type=m.round_type or "",
-            player1=player_map.get(m.player1_id, "Unknown"),
-            player2=player_map.get(m.player2_id, "Bye") if not m.is_bye else "BYE",
-            score1=m.player1_score or 0,
-            score2=m.player2_score or 0,
-            winner_id=m.winner_id,
-            scenario=m.scenario or ""
-        ) for m in matches_db]
-        
-        return TournamentDetailResponse(
-            tournament=t_data,
-            players_swiss=players_swiss,
-            players_cut=players_cut,
-            matches=matches
-        )
+    players_swiss.sort(key=lambda x: x["swiss_rank"])
+    players_cut.sort(key=lambda x: x["cut_rank"])
+
+    matches = [MatchData(
+        round=m.round_number or 0,
+        type=m.round_type or "",
+        player1=m.player1 if m.player1 is not None else "Unknown",
+        player2=(m.player2 if m.player2 is not None else "Bye") if not m.is_bye else "BYE",
+        score1=m.player1_score or 0,
+        score2=m.player2_score or 0,
+        winner_id=m.winner_id,
+        scenario=m.scenario or ""
+    ) for m in matches_db]
+
+    # Shaped like TournamentDetailResponse; a dict because the players
+    # carry RawJSON, which the response models cannot hold.
+    return {
+        "tournament": t_data,
+        "players_swiss": players_swiss,
+        "players_cut": players_cut,
+        "matches": matches,
+    }
@@ -11,25 +11,64 @@ Usage:
         "lists|xwa|rebel|0",
         lambda: aggregate_list_stats(filters)
     )
+
+Async endpoints use `await get_cached_or_compute_async(key, fn)`: a hit is
+served on the event loop (no thread, no DB round trip), and only a miss
+or a due version check goes to a worker thread.
 """
 import threading
 import time
-from typing import Callable, TypeVar
+from array import array
+from collections.abc import Sequence
+from typing import Any, Callable, TypeVar
 
 T = TypeVar("T")
 
+_MISS = object()
+
 # Configuration
 CACHE_CHECK_INTERVAL = 5.0  # seconds between version checks
 MAX_CACHE_ENTRIES = 1000
+FOLLOWER_WAIT_SECONDS = 120.0  # a follower's wait for its leader, per attempt
 
 # Internal state
 _lock = threading.Lock()
 _cache: dict[str, object] = {}
 _cached_version: str | None = None
 _last_version_check: float = 0.0
+# Held while a data_version check queries the database (never with _lock)
+_version_check_lock = threading.Lock()
+# data_version seen on the primary but not yet on the read replicas
+_pending_version: str | None = None
+_pending_since: float = 0.0
 # In-flight computations: dedupe concurrent compute_fn() calls for the same key
 _in_flight: dict[str, threading.Event] = {}
 _in_flight_errors: dict[str, BaseException] = {}
+# Bumped by invalidate_prefix: a computation that started before a partial
+# invalidation may have read stale inputs, so its result is not cached.
+_partial_epoch = 0
+# Last-known-good values: entries under a registered prefix survive a
+# data_version change or prefix invalidation here, tagged with the
+# version they were computed for, until the key is recomputed.
+MAX_STALE_ENTRIES = 200
+_stale: dict[str, tuple[object, str | None]] = {}
+_stale_prefixes: tuple[str, ...] = ()
+# Key prefixes whose values are computed from the card catalog
+# (depends_on_catalog): a catalog hot reload drops exactly these.
+_catalog_prefixes: tuple[str, ...] = ()
+# Sort orders of cached aggregates (get_sorted_permutation): aggregate key
+# -> (the list they index, {sort: order}). Kept beside the aggregate's
+# entry, not in _cache, and dropped whenever that entry goes.
+_orders: dict[str, tuple[Sequence, dict[Any, array]]] = {}
+
+
+class ComputeAbandoned(Exception):
+    """
+    Raised by a compute_fn that stopped for a reason of its own caller
+    (its HTTP client went away). Unlike other errors it is not handed to
+    the followers waiting on the same key: they retry, and one of them
+    computes the value instead.
+    """
 
 
 def _get_db_version() -> str | None:
@@ -52,36 +91,97 @@ def _get_db_version() -> str | None:
         return None
 
 
+def _replicas_caught_up(db_version: str, now: float) -> bool:
+    """
+    With read replicas and REPLICA_LAG_AWARE, a new data_version is only
+    applied once the replicas report it too: clearing the cache earlier
+    would recompute (and cache until the next scrape) results from a
+    replica that has not replayed the new data. Gives up waiting after
+    REPLICA_MAX_LAG_SECONDS; by then a replica that far behind has been
+    taken out of rotation by its own lag check.
+    """
+    global _pending_version, _pending_since
+
+    from .database import REPLICA_LAG_AWARE, REPLICA_MAX_LAG_SECONDS, replicas_have_version
+
+    if not REPLICA_LAG_AWARE:
+        return True
+    if db_version != _pending_version:
+        _pending_version, _pending_since = db_version, now
+    if replicas_have_version(db_version) or now - _pending_since >= REPLICA_MAX_LAG_SECONDS:
+        _pending_version = None
+        return True
+    return False
+
+
+def _keep_stale(keys) -> None:
+    """Move the registered entries among `keys` to the last-known-good
+    store (caller holds _lock)."""
+    if not _stale_prefixes:
+        return
+    for key in keys:
+        if key.startswith(_stale_prefixes) and key in _cache:
+            _stale.pop(key, None)
+            _stale[key] = (_cache[key], _cached_version)
+    while len(_stale) > MAX_STALE_ENTRIES:
+        del _stale[next(iter(_stale))]
+
+
 def _check_version() -> bool:
     """
     Check if the database version changed since last check.
     If so, clear the cache. Returns True if cache was cleared.
+
+    The primary (and, lag-aware, the replicas) are queried outside _lock,
+    so cache hits never wait on the network; one thread runs the check at
+    a time and the others skip it.
     """
     global _cached_version, _last_version_check
 
-    now = time.monotonic()
-    if now - _last_version_check < CACHE_CHECK_INTERVAL:
-        return False  # Not time to check yet
+    if not _version_check_lock.acquire(blocking=False):
+        return False  # another thread is checking
+    try:
+        now = time.monotonic()
+        with _lock:
+            if now - _last_version_check < CACHE_CHECK_INTERVAL:
+                return False  # Not time to check yet
+            _last_version_check = now
+            seen_version = _cached_version
 
-    _last_version_check = now
-    db_version = _get_db_version()
+        db_version = _get_db_version()
+        if db_version is None or db_version == seen_version:
+            return False
+        if not _replicas_caught_up(db_version, now):
+            return False  # keep serving the old version until they have it
 
-    if db_version is not None and db_version != _cached_version:
-        _cache.clear()
-        _in_flight.clear()
-        _in_flight_errors.clear()
-        _cached_version = db_version
-        return True
-
-    return False
+        with _lock:
+            if _cached_version != seen_version:
+                return False  # applied meanwhile
+            _keep_stale(list(_cache))
+            _cache.clear()
+            _orders.clear()
+            _in_flight.clear()
+            _in_flight_errors.clear()
+            _cached_version = db_version
+            return True
+    finally:
+        _version_check_lock.release()
 
 
-def get_cached_or_compute(key: str, compute_fn: Callable[[], T]) -> T:
+def get_cached_or_compute(
+    key: str,
+    compute_fn: Callable[[], T],
+    cacheable: Callable[[T], bool] | None = None,
+) -> T:
     """
     Get a value from cache, or compute and cache it.
 
     Thread-safe. Checks for data version changes every 5 seconds.
     Cache is bounded to MAX_CACHE_ENTRIES via LRU eviction.
+
+    A result for which `cacheable(result)` is false (e.g. a degraded meta
+    snapshot) is returned to the caller that computed it but never stored
+    nor handed to the followers waiting on the key: they compute it again.
     """
     # Loop handles the case where we become a follower, wait for the leader,
     # but the leader's result isn't yet in _cache (race) or the leader failed
@@ -90,9 +190,8 @@ def get_cached_or_compute(key: str, compute_fn: Callable[[], T]) -> T:
     is_leader = False
     for _attempt in range(3):
         # Check for version change (at most every 5 seconds)
+        _check_version()
         with _lock:
-            _check_version()
-
             if key in _cache:
                 return _cache[key]  # type: ignore
 
@@ -111,7 +210,7 @@ def get_cached_or_compute(key: str, compute_fn: Callable[[], T]) -> T:
 
         assert event is not None
         # Follower: wait for the leader to finish
-        if event.wait(timeout=120):
+        if event.wait(timeout=FOLLOWER_WAIT_SECONDS):
             with _lock:
                 if key in _cache:
                     return _cache[key]  # type: ignore
@@ -123,32 +222,84 @@ def get_cached_or_compute(key: str, compute_fn: Callable[[], T]) -> T:
             continue
         # Timed out — loop and try again as a new leader
 
+    if not is_leader:
+        # Out of attempts while other threads kept leading: compute on our
+        # own event, registered only if no one else is leading the key, so
+        # the cleanup below never releases another leader's followers.
+        with _lock:
+            event = threading.Event()
+            _in_flight.setdefault(key, event)
+
     assert event is not None
+    started_epoch = _partial_epoch
     # Cache miss — compute outside the lock (computation may be slow)
     try:
         result = compute_fn()
     except BaseException as e:
         with _lock:
-            _in_flight_errors[key] = e
-            _in_flight.pop(key, None)
+            if _in_flight.get(key) is event:
+                if not isinstance(e, ComputeAbandoned):
+                    _in_flight_errors[key] = e
+                _in_flight.pop(key, None)
             event.set()
         raise
     else:
         with _lock:
-            # Evict oldest entries if cache is full
-            if len(_cache) >= MAX_CACHE_ENTRIES and key not in _cache:
-                # Remove the oldest entry (first inserted)
-                oldest_key = next(iter(_cache))
-                del _cache[oldest_key]
-            _cache[key] = result
+            if started_epoch == _partial_epoch and (cacheable is None or cacheable(result)):
+                # Evict oldest entries if cache is full
+                if len(_cache) >= MAX_CACHE_ENTRIES and key not in _cache:
+                    # Remove the oldest entry (first inserted)
+                    oldest_key = next(iter(_cache))
+                    del _cache[oldest_key]
+                    _orders.pop(oldest_key, None)
+                _cache[key] = result
+                _orders.pop(key, None)
+                _stale.pop(key, None)
             # Wake up waiters and clean up in-flight state
             event.set()
-            _in_flight.pop(key, None)
-            _in_flight_errors.pop(key, None)
+            if _in_flight.get(key) is event:
+                _in_flight.pop(key, None)
+                _in_flight_errors.pop(key, None)
 
         return result
 
 
+def peek(key: str, default: Any = None) -> Any:
+    """
+    The cached value for `key`, or `default` — without computing anything
+    and without touching the database.
+
+    Also returns `default` when a data_version check is due, so a caller
+    on the event loop never serves an entry past the check interval; the
+    slow path (get_cached_or_compute, in a thread) runs the check.
+    """
+    with _lock:
+        if time.monotonic() - _last_version_check >= CACHE_CHECK_INTERVAL:
+            return default
+        return _cache.get(key, default)
+
+
+async def get_cached_or_compute_async(
+    key: str,
+    compute_fn: Callable[[], T],
+    cacheable: Callable[[T], bool] | None = None,
+) -> T:
+    """
+    get_cached_or_compute for async endpoints.
+
+    Hits return immediately on the event loop. Misses (and due version
+    checks) run get_cached_or_compute in an API worker thread, so
+    in-flight deduplication and invalidation behave exactly as for the
+    sync callers.
+    """
+    value = peek(key, _MISS)
+    if value is not _MISS:
+        return value  # type: ignore
+    from .database import run_in_worker
+
+    return await run_in_worker(get_cached_or_compute, key, compute_fn, cacheable)
+
+
 def invalidate_cache():
     """
     Manually invalidate the entire cache.
@@ -156,15 +307,130 @@ def invalidate_cache():
     """
     with _lock:
         _cache.clear()
+        _orders.clear()
+        _stale.clear()
         _in_flight.clear()
         _in_flight_errors.clear()
 
 
+def invalidate_prefix(prefixes: tuple[str, ...]) -> int:
+    """
+    Drop every cached entry whose key starts with one of `prefixes`.
+
+    For inputs that change outside the data_version cycle, e.g. a
+    hot-reloaded card catalog: only the dependent endpoints recompute,
+    the rest of the cache survives. Returns the number of entries dropped.
+    """
+    global _partial_epoch
+    with _lock:
+        stale = [key for key in _cache if key.startswith(prefixes)]
+        _keep_stale(stale)
+        for key in stale:
+            del _cache[key]
+            _orders.pop(key, None)
+        _partial_epoch += 1
+        return len(stale)
+
+
+def discard(key: str) -> None:
+    """
+    Drop a single cached entry, if present.
+
+    For results that were served but must not be reused — e.g. a degraded
+    meta snapshot where some sub-aggregation failed or timed out. The next
+    request for the key recomputes it.
+    """
+    with _lock:
+        _cache.pop(key, None)
+        _orders.pop(key, None)
+
+
+def retain_last_known_good(prefix: str) -> None:
+    """
+    Keep entries under `prefix` as last-known-good values when they are
+    invalidated (see last_known_good). Only for small entries, e.g.
+    encoded responses: up to MAX_STALE_ENTRIES are kept.
+    """
+    global _stale_prefixes
+    with _lock:
+        if prefix not in _stale_prefixes:
+            _stale_prefixes = (*_stale_prefixes, prefix)
+
+
+def depends_on_catalog(prefix: str) -> str:
+    """
+    Register `prefix` as a family of keys computed from the card catalog
+    (card filters, epic ship exclusions, enriched lists, upgrade names), so
+    a catalog hot reload drops them (see catalog_dependent_prefixes).
+    Returns `prefix`, for the key builder declaring it to use.
+    """
+    global _catalog_prefixes
+    with _lock:
+        if prefix not in _catalog_prefixes:
+            _catalog_prefixes = (*_catalog_prefixes, prefix)
+    return prefix
+
+
+def catalog_dependent_prefixes() -> tuple[str, ...]:
+    """Every prefix registered with depends_on_catalog."""
+    return _catalog_prefixes
+
+
+def last_known_good(key: str) -> tuple[Any, str | None] | None:
+    """
+    (value, data_version) of the newest value `key` had before it was
+    invalidated, or None. For answering while the current value is still
+    being computed; the caller should mark it as stale.
+    """
+    with _lock:
+        return _stale.get(key)
+
+
+def get_sorted_permutation(
+    key: str,
+    sort: Any,
+    data: Sequence,
+    sort_key: Callable[[Any], Any],
+    reverse: bool = False,
+) -> Sequence[int]:
+    """
+    Cached sort order of `data`: the indexes of `data` in sorted order.
+
+    Cached aggregates are stored once, in a neutral order; endpoints that
+    offer several sorts page through them with `data[i] for i in
+    order[start:stop]` instead of re-sorting the whole list per request.
+    `key` is the cache key of the aggregate `data` belongs to and `sort`
+    names the sort (e.g. ("Games", "desc")). Same order as
+    sorted(data, key=sort_key, reverse=reverse), ties included.
+
+    Orders are kept with the aggregate's entry rather than in the cache
+    itself, so they never push aggregates out, and are dropped with it
+    (eviction, invalidation, discard). Orders computed from a list that is
+    no longer the cached one are replaced; while `key` is not cached the
+    order is computed but not kept.
+    """
+    with _lock:
+        entry = _orders.get(key)
+        if entry is not None and entry[0] is data and sort in entry[1]:
+            return entry[1][sort]
+
+    order = array("I", sorted(range(len(data)), key=lambda i: sort_key(data[i]), reverse=reverse))
+    with _lock:
+        if key in _cache:
+            entry = _orders.get(key)
+            if entry is None or entry[0] is not data:
+                entry = _orders[key] = (data, {})
+            entry[1][sort] = order
+    return order
+
+
 def cache_stats() -> dict:
     """Return cache statistics for debugging."""
     with _lock:
         return {
             "entries": len(_cache),
+            "sorted_aggregates": len(_orders),
+            "stale_entries": len(_stale),
             "version": _cached_version,
             "last_check": _last_version_check,
         }
@@ -1,13 +1,28 @@
+import importlib.util
+import itertools
+import logging
 import os
-from sqlalchemy import event
-from sqlmodel import create_engine, SQLModel
+import threading
+import time
+from collections.abc import Callable
+from functools import cached_property
+from contextvars import ContextVar
+from typing import TypeVar
+
+import anyio
+from anyio.lowlevel import RunVar
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, create_engine, SQLModel
 
 # Explicitly import models to ensure they are registered with SQLModel.metadata
-from .models import Tournament, PlayerStanding, TeamStanding, Match, TeamMatch, ScrapeMeta, Supporter, Contribution
+from .models import Tournament, PlayerStanding, TeamStanding, Match, TeamMatch, ScrapeMeta, Supporter, Contribution, ListCard, CardUsage, PilotConfig
 
 from dotenv import load_dotenv
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Default to local sqlite if no DATABASE_URL is provided
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATABASE_URL = os.getenv(
@@ -17,6 +32,29 @@ DATABASE_URL = os.getenv(
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
+# DB_DRIVER=psycopg runs postgresql:// URLs on psycopg 3 instead of
+# psycopg2: statements executed DB_PREPARE_THRESHOLD times on a connection
+# are prepared server-side (set it to "none" behind a transaction-mode
+# pooler such as pgbouncer), and run_batch pipelines independent
+# statements with binary results.
+DB_DRIVER = os.getenv("DB_DRIVER", "")
+DB_PREPARE_THRESHOLD = os.getenv("DB_PREPARE_THRESHOLD", "5")
+DB_PIPELINE = os.getenv("DB_PIPELINE", "1") != "0"
+
+
+def _sync_database_url(url: str) -> str:
+    if DB_DRIVER == "psycopg" and url.startswith("postgresql://"):
+        return "postgresql+psycopg://" + url.split("://", 1)[1]
+    return url
+
+
+def _psycopg_connect_args(url: str) -> dict:
+    if not url.startswith("postgresql+psycopg"):
+        return {}
+    threshold = DB_PREPARE_THRESHOLD.strip().lower()
+    return {"prepare_threshold": None if threshold in ("", "none") else int(threshold)}
+
+
 # SQLite-specific settings for concurrent access (e.g. parallel scraper workers).
 # WAL mode allows concurrent reads with one writer; a busy timeout makes
 # writers wait instead of immediately raising "database is locked".
@@ -27,8 +65,8 @@ if DATABASE_URL.startswith("sqlite"):
     }
 
 engine = create_engine(
-    DATABASE_URL,
-    connect_args=_sqlite_connect_args if _sqlite_connect_args else {},
+    _sync_database_url(DATABASE_URL),
+    connect_args=_sqlite_connect_args or _psycopg_connect_args(_sync_database_url(DATABASE_URL)),
     # pool_pre_ping verifies each connection is alive before use.
     # Essential for long-running scrapers: a tournament can take 10+ minutes
     # to scrape, and PostgreSQL/Supabase idle-timeout kills idle connections
@@ -52,3 +90,461 @@ if DATABASE_URL.startswith("sqlite"):
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+
+
+STREAM_BATCH_ROWS = int(os.getenv("STREAM_BATCH_ROWS", "2000"))
+
+
+def stream_rows(conn, statement, params: dict | None = None, batch_size: int = STREAM_BATCH_ROWS):
+    """
+    Iterate the rows of `statement` without materializing the result.
+
+    `conn` is a Session or a Connection; `statement` a text() or select().
+    Rows arrive `batch_size` at a time through a server-side cursor
+    (yield_per implies stream_results: a named cursor on psycopg2), so
+    memory stays at one batch whatever the result size. Consume the
+    iterator before running another statement on the same session, and
+    do not commit in between: that closes the cursor. ORM rows are
+    (entity, ...) tuples, as with session.execute().
+    """
+    result = conn.execute(statement, params or {}, execution_options={"yield_per": batch_size})
+    for batch in result.partitions():
+        yield from batch
+
+
+def _compiled(conn, statements: list) -> list[tuple[str, dict]]:
+    out = []
+    for statement, params in statements:
+        compiled = statement.compile(dialect=conn.dialect)
+        out.append((str(compiled), compiled.construct_params(params or {})))
+    return out
+
+
+def _pipelined(raw, statements: list[tuple[str, dict]]) -> list[list]:
+    from psycopg.rows import namedtuple_row
+
+    cursors = [raw.cursor(row_factory=namedtuple_row) for _ in statements]
+    try:
+        with raw.pipeline():
+            for cur, (sql, params) in zip(cursors, statements):
+                cur.execute(sql, params, binary=True)
+        return [cur.fetchall() for cur in cursors]
+    finally:
+        for cur in cursors:
+            cur.close()
+
+
+async def _pipelined_async(raw, statements: list[tuple[str, dict]]) -> list[list]:
+    from psycopg.rows import namedtuple_row
+
+    cursors = [raw.cursor(row_factory=namedtuple_row) for _ in statements]
+    try:
+        async with raw.pipeline():
+            for cur, (sql, params) in zip(cursors, statements):
+                await cur.execute(sql, params, binary=True)
+        return [await cur.fetchall() for cur in cursors]
+    finally:
+        for cur in cursors:
+            await cur.close()
+
+
+def run_batch(session, statements: list) -> list[list]:
+    """
+    Rows of each (text() statement, params) pair in `statements`.
+
+    The statements must not depend on each other's results. On psycopg 3
+    (DB_DRIVER=psycopg, or the async engine) they go to the server in one
+    pipeline, so the batch costs one network round trip instead of one
+    per statement, and results come back in binary format. Otherwise, or
+    with DB_PIPELINE=0, they run one after another. Rows allow attribute
+    access either way; values are what the driver returns (text()
+    statements apply no result types).
+    """
+    conn = session.connection()
+    if not DB_PIPELINE or conn.dialect.driver != "psycopg":
+        return [conn.execute(statement, params or {}).fetchall() for statement, params in statements]
+    compiled = _compiled(conn, statements)
+    raw = conn.connection.driver_connection
+    if conn.dialect.is_async:
+        # Inside AsyncSession.run_sync (run_db): await on its greenlet.
+        from sqlalchemy.util import await_only
+
+        return await_only(_pipelined_async(raw, compiled))
+    return _pipelined(raw, compiled)
+
+
+# ---------------------------------------------------------------------------
+# Read replicas.
+#
+# READ_DATABASE_URL holds one or more comma-separated replica URLs. The
+# analytics aggregations and the read-only detail routers take their
+# engine from `read_engine()`; writes (scraper, migrations, rollups, Ko-fi
+# webhook), the scrape_meta version check and the meta snapshot (which
+# creates temp tables, not allowed on a hot standby) stay on `engine`.
+#
+# Each replica is probed at most every REPLICA_CHECK_INTERVAL seconds:
+# a failed connection, or a replay lag above REPLICA_MAX_LAG_SECONDS,
+# takes it out of rotation until a later probe succeeds. With no healthy
+# replica, reads go to the primary.
+# ---------------------------------------------------------------------------
+
+READ_DATABASE_URLS = [
+    url.strip().replace("postgres://", "postgresql://", 1)
+    for url in os.getenv("READ_DATABASE_URL", "").split(",")
+    if url.strip()
+]
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", "10"))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "30"))
+# Cache invalidation waits for the replicas to have the new data_version
+# (see cache._check_version), so results recomputed right after a scrape
+# are not cached from a replica that has not replayed it yet.
+REPLICA_LAG_AWARE = os.getenv("REPLICA_LAG_AWARE", "1") != "0"
+
+# Replay lag in seconds; 0 when the replica has replayed all it received
+# (an idle primary has no new transactions, so the replay timestamp alone
+# would make a caught-up replica look ever more behind).
+_REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+_DATA_VERSION_SQL = text("SELECT value FROM scrape_meta WHERE key = 'data_version'")
+
+
+class _Replica:
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = create_engine(
+            _sync_database_url(url),
+            connect_args=_psycopg_connect_args(_sync_database_url(url)),
+            pool_pre_ping=True,
+            pool_size=10,
+            max_overflow=20,
+            pool_timeout=15,
+            pool_recycle=300,
+        )
+        self.healthy = True
+        self.lag: float | None = None
+        self.checked_at = 0.0
+        self._checking = False
+
+    def check(self) -> None:
+        """Probe connectivity and replay lag; updates `healthy`."""
+        try:
+            with self.engine.connect() as conn:
+                if self.url.startswith("postgresql"):
+                    self.lag = float(conn.execute(_REPLICA_LAG_SQL).scalar() or 0)
+                else:
+                    conn.execute(text("SELECT 1"))
+                    self.lag = 0.0
+            self.healthy = self.lag <= REPLICA_MAX_LAG_SECONDS
+            if not self.healthy:
+                logger.warning("Read replica lagging %.1fs, reading from primary", self.lag)
+        except Exception as e:
+            if self.healthy:
+                logger.warning("Read replica unavailable, reading from primary: %s", e)
+            self.healthy = False
+            self.lag = None
+
+    @cached_property
+    def async_engine(self):
+        """This replica through the async driver (see `async_engine`)."""
+        return _create_async_engine(self.url)
+
+    def check_if_due(self) -> None:
+        now = time.monotonic()
+        with _replica_lock:
+            if self._checking or now - self.checked_at < REPLICA_CHECK_INTERVAL:
+                return
+            self._checking = True
+        try:
+            self.check()
+        finally:
+            self.checked_at = time.monotonic()
+            self._checking = False
+
+    def check_in_background(self) -> None:
+        """check_if_due in a daemon thread, for callers on the event loop."""
+        if not self._checking and time.monotonic() - self.checked_at >= REPLICA_CHECK_INTERVAL:
+            threading.Thread(target=self.check_if_due, daemon=True, name="replica-check").start()
+
+
+_replicas = [_Replica(url) for url in READ_DATABASE_URLS]
+_replica_lock = threading.Lock()
+_next_replica = itertools.count()
+
+
+def _pick_replica(probe: Callable[[_Replica], None]) -> _Replica | None:
+    """Next healthy replica in round robin order, after `probe`-ing each
+    candidate; None when none is healthy."""
+    if not _replicas:
+        return None
+    start = next(_next_replica)
+    for i in range(len(_replicas)):
+        replica = _replicas[(start + i) % len(_replicas)]
+        probe(replica)
+        if replica.healthy:
+            return replica
+    return None
+
+
+def read_engine():
+    """Engine for read-only queries: a healthy replica (round robin), else
+    the primary."""
+    replica = _pick_replica(_Replica.check_if_due)
+    return replica.engine if replica is not None else engine
+
+
+def replicas_have_version(version: str) -> bool:
+    """True when every replica in rotation reports scrape_meta
+    data_version == `version` (trivially true without replicas)."""
+    for replica in _replicas:
+        if not replica.healthy:
+            continue
+        try:
+            with replica.engine.connect() as conn:
+                if conn.execute(_DATA_VERSION_SQL).scalar() != version:
+                    return False
+        except Exception:
+            replica.healthy = False
+    return True
+
+
+def replica_status() -> list[dict]:
+    """Health of each configured replica (host only, no credentials)."""
+    return [
+        {
+            "host": r.engine.url.host,
+            "healthy": r.healthy,
+            "lag_seconds": r.lag,
+        }
+        for r in _replicas
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Query profiles and cancellation.
+#
+# An API request runs its queries inside a `QueryScope(profile)`. When a
+# transaction begins on any engine (primary, replica) inside a scope, the
+# profile's settings are applied with SET LOCAL, so they end with the
+# transaction and never leak into the pool. Code outside a scope (the
+# scraper, migrations, scripts) keeps the server defaults.
+#
+# The scope also records the connections it has in a transaction, so
+# `cancel()` (called when the HTTP client disconnects) can send the
+# server a cancel request instead of letting an abandoned query hold a
+# pooled connection to the end. A cancelled or timed-out statement fails
+# with SQLSTATE 57014, which main.py turns into a structured 503.
+# ---------------------------------------------------------------------------
+
+QUERY_PROFILES_ENABLED = os.getenv("QUERY_PROFILES", "1") != "0"
+
+QUERY_PROFILES: dict[str, dict[str, str]] = {
+    # Cached aggregations (lists, cards, ships, squadrons): big GROUP BYs,
+    # enough work_mem to hash/sort in memory instead of spilling to disk.
+    # JIT compile time is rarely paid back at these row counts.
+    "aggregate": {"statement_timeout": "20s", "work_mem": "64MB", "jit": "off"},
+    # Meta snapshot: the widest scan, computed once per data version.
+    "snapshot": {"statement_timeout": "45s", "work_mem": "128MB", "jit": "on"},
+    # Detail pages: indexed lookups, should never run long.
+    "detail": {"statement_timeout": "5s", "jit": "off"},
+}
+
+QUERY_CANCELED = "57014"  # statement_timeout or a cancel request
+
+_query_scope: ContextVar["QueryScope | None"] = ContextVar("query_scope", default=None)
+
+
+class QueryScope:
+    """Profile and in-transaction connections of one request's queries.
+
+    Use as a context manager around the code that queries; the scope is
+    carried by a ContextVar, so it follows into worker threads started
+    with anyio.to_thread and into AsyncSession.run_sync.
+    """
+
+    def __init__(self, profile: str | None):
+        self.settings = QUERY_PROFILES.get(profile or "", {})
+        self.profile = profile
+        self.cancelled = False
+        self._connections: set = set()
+        self._lock = threading.Lock()
+        self._token = None
+
+    def __enter__(self) -> "QueryScope":
+        self._token = _query_scope.set(self)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        _query_scope.reset(self._token)
+
+    def cancel(self) -> None:
+        """Ask the server to cancel the statements running in this scope."""
+        with self._lock:
+            self.cancelled = True
+            connections = list(self._connections)
+        for dbapi_conn in connections:
+            # psycopg 2/3: cancel(); sqlite3: interrupt().
+            cancel = getattr(dbapi_conn, "cancel", None) or getattr(dbapi_conn, "interrupt", None)
+            if cancel is not None:
+                try:
+                    cancel()
+                except Exception as e:
+                    logger.debug("query cancel failed: %s", e)
+
+    def _track(self, dbapi_conn, active: bool) -> None:
+        with self._lock:
+            if active:
+                self._connections.add(dbapi_conn)
+            else:
+                self._connections.discard(dbapi_conn)
+
+
+def is_query_canceled(exc: BaseException) -> bool:
+    """True for a statement_timeout / cancel error (SQLSTATE 57014)."""
+    orig = getattr(exc, "orig", exc)
+    code = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+    return code == QUERY_CANCELED
+
+
+@event.listens_for(Engine, "begin")
+def _apply_query_profile(conn) -> None:
+    scope = _query_scope.get()
+    if scope is None:
+        return
+    dbapi_conn = conn.connection.dbapi_connection
+    scope._track(dbapi_conn, True)
+    if not (QUERY_PROFILES_ENABLED and scope.settings) or conn.dialect.name != "postgresql":
+        return
+    cursor = dbapi_conn.cursor()
+    try:
+        for name, value in scope.settings.items():
+            # Names and values come from QUERY_PROFILES above, not user input.
+            cursor.execute(f"SET LOCAL {name} = '{value}'")
+    finally:
+        cursor.close()
+
+
+@event.listens_for(Engine, "commit")
+@event.listens_for(Engine, "rollback")
+def _end_query_scope_transaction(conn) -> None:
+    scope = _query_scope.get()
+    if scope is not None and conn.connection.dbapi_connection is not None:
+        scope._track(conn.connection.dbapi_connection, False)
+
+
+# ---------------------------------------------------------------------------
+# Async access for the API's hot read endpoints.
+#
+# `async_engine` talks to the same Postgres through an async driver
+# (psycopg 3 or asyncpg, whichever is installed; SQLAlchemy's asyncio
+# support also needs greenlet). It is None for SQLite, when no driver is
+# installed, or with ASYNC_DB=0; `run_db` then falls back to a worker
+# thread with a regular Session. Each read replica has an async engine of
+# its own, and `read_async_engine` picks among them like `read_engine`.
+# Scripts and the scraper keep using the sync `engine`.
+# ---------------------------------------------------------------------------
+
+T = TypeVar("T")
+
+ASYNC_DB = os.getenv("ASYNC_DB", "1") != "0"
+# Worker threads for blocking work started from async endpoints (analytics
+# aggregations on a cache miss, sync DB fallback). Kept apart from AnyIO's
+# default pool, which serves the remaining sync endpoints, so slow
+# aggregations cannot starve the fast detail requests.
+API_WORKER_THREADS = int(os.getenv("API_WORKER_THREADS", "16"))
+
+
+def _async_database_url(url: str) -> str | None:
+    if not url.startswith("postgresql") or importlib.util.find_spec("greenlet") is None:
+        return None
+    scheme, rest = url.split("://", 1)
+    if "+" in scheme and scheme.split("+", 1)[1] in ("psycopg", "asyncpg"):
+        return url
+    if importlib.util.find_spec("psycopg") is not None:
+        return f"postgresql+psycopg://{rest}"
+    if importlib.util.find_spec("asyncpg") is not None:
+        # asyncpg spells libpq's sslmode as ssl.
+        return f"postgresql+asyncpg://{rest.replace('sslmode=', 'ssl=')}"
+    return None
+
+
+def _create_async_engine(database_url: str):
+    url = _async_database_url(database_url) if ASYNC_DB else None
+    if url is None:
+        return None
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    return create_async_engine(
+        url,
+        connect_args=_psycopg_connect_args(url),
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+        pool_timeout=15,
+        pool_recycle=300,
+    )
+
+
+async_engine = _create_async_engine(DATABASE_URL)
+
+
+def read_async_engine():
+    """Async counterpart of read_engine: a healthy replica's async engine
+    (round robin), else `async_engine`; None without an async driver.
+
+    Runs on the event loop, so replicas are picked by their last known
+    health; a due probe runs in a background thread.
+    """
+    if async_engine is None:
+        return None
+    replica = _pick_replica(_Replica.check_in_background)
+    if replica is not None and replica.async_engine is not None:
+        return replica.async_engine
+    return async_engine
+
+# Per event loop, like AnyIO's own default thread limiter.
+_worker_limiter: RunVar[anyio.CapacityLimiter] = RunVar("api_worker_limiter")
+
+
+def worker_limiter() -> anyio.CapacityLimiter:
+    """Capacity limiter for the API worker threads."""
+    try:
+        return _worker_limiter.get()
+    except LookupError:
+        limiter = anyio.CapacityLimiter(API_WORKER_THREADS)
+        _worker_limiter.set(limiter)
+        return limiter
+
+
+async def run_in_worker(fn: Callable[..., T], *args) -> T:
+    """Run blocking `fn(*args)` in an API worker thread."""
+    return await anyio.to_thread.run_sync(fn, *args, limiter=worker_limiter())
+
+
+def _with_session(fn: Callable[..., T], *args) -> T:
+    with Session(read_engine()) as session:
+        return fn(session, *args)
+
+
+async def run_db(fn: Callable[..., T], *args) -> T:
+    """Run `fn(session, *args)`, written against a sync Session, from an
+    async endpoint.
+
+    With the async engine the function runs through AsyncSession.run_sync:
+    the same ORM/text() code, but the driver awaits the network instead of
+    holding a thread. Otherwise it runs in an API worker thread. Either way
+    it reads from a healthy replica when one is configured, else the
+    primary. Queries run with the "detail" query profile.
+    """
+    with QueryScope("detail"):
+        bind = read_async_engine()
+        if bind is None:
+            return await run_in_worker(_with_session, fn, *args)
+        from sqlmodel.ext.asyncio.session import AsyncSession
+
+        async with AsyncSession(bind) as session:
+            return await session.run_sync(fn, *args)
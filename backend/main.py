@@ -1,15 +1,18 @@
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import Session, select, func
-from datetime import datetime, timedelta
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.exc import DBAPIError
+import logging
 import os
 import time
 
-from .database import engine, create_db_and_tables
-from .models import Tournament, PlayerStanding
+from .admission import AdmissionRejected, admission_stats
+from .database import engine, create_db_and_tables, is_query_canceled, replica_status
+from .analytics.dialects import prepare_embedded_db
 from .analytics.factions import get_meta_snapshot
 from .data_structures.data_source import DataSource
-from .cache import get_cached_or_compute
+from .cache import catalog_dependent_prefixes, depends_on_catalog, get_cached_or_compute, invalidate_prefix
+from .api.responses import cached_endpoint
 from .api.schemas import MetaSnapshotResponse
 from .api.tournaments import router as tournaments_router
 from .api.lists import router as lists_router
@@ -22,6 +25,8 @@ from .api.squadron_detail import router as squadron_detail_router
 from .api.list_detail import router as list_detail_router
 from .api.support import router as support_router
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="M3taCron Backend", version="1.0.0")
 
 # Include routers
@@ -36,6 +41,39 @@ app.include_router(squadron_detail_router)
 app.include_router(list_detail_router)
 app.include_router(support_router)
 
+@app.exception_handler(AdmissionRejected)
+async def on_admission_rejected(request: Request, exc: AdmissionRejected):
+    """Out of capacity: fail fast with a retry hint instead of queueing."""
+    return JSONResponse(
+        status_code=503,
+        content={
+            "detail": "Server busy; try again shortly.",
+            "code": "overloaded",
+            "limiter": exc.limiter,
+            "path": request.url.path,
+        },
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(DBAPIError)
+async def on_database_error(request: Request, exc: DBAPIError):
+    """A query that hit its profile's statement_timeout (SQLSTATE 57014)
+    is a load problem, not a bug: answer 503 with a retry hint. Any other
+    database error is logged and answered with a plain 500."""
+    if not is_query_canceled(exc):
+        logger.error("Database error on %s", request.url.path, exc_info=exc)
+        return PlainTextResponse("Internal Server Error", status_code=500)
+    return JSONResponse(
+        status_code=503,
+        content={
+            "detail": "Query took too long; try again or narrow the filters.",
+            "code": "query_timeout",
+            "path": request.url.path,
+        },
+        headers={"Retry-After": "5"},
+    )
+
 # Configure CORS for frontend access
 allowed_origins = [o.strip() for o in os.getenv("ALLOWED_ORIGINS", "*").split(",") if o.strip()]
 allow_all_origins = len(allowed_origins) == 1 and allowed_origins[0] == "*"
@@ -46,6 +84,7 @@ app.add_middleware(
     allow_credentials=not allow_all_origins,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Cache-Status", "X-Stale-Data-Version"],
 )
 
 @app.on_event("startup")
@@ -66,12 +105,70 @@ def on_startup():
     else:
         raise RuntimeError(f"Database startup failed after {retries} attempts: {last_error}")
 
+    # Load the card catalog off the request path (snapshot or JSON).
+    _warm_catalog()
+
+    # SQLite file: materialize the helper tables the analytics SQL joins.
+    prepare_embedded_db(engine)
+
     # Pre-warm the analytics cache so the first user request is instant.
     # Runs in a background thread so the server accepts traffic immediately.
     if os.getenv("PREWARM_CACHE", "true").lower() == "true":
         _prewarm_cache()
 
 
+# The snapshot enriches its top lists from the card catalog. The other
+# catalog-dependent prefixes are declared beside their key builders in
+# the api modules (cache.depends_on_catalog).
+META_SNAPSHOT_PREFIX = depends_on_catalog("meta_snapshot|")
+
+
+def _warm_catalog():
+    """Load both card catalogs, their filter and alias indexes in a daemon thread.
+
+    Reads the compiled snapshot when it is fresh (see
+    utils/xwing_data/catalog.py), otherwise parses the JSON and rewrites
+    the snapshot, so no user request pays for the parse. Also starts the
+    catalog watcher, which hot-reloads changed data and drops the
+    catalog-dependent cache entries.
+    """
+    import threading
+
+    from .analytics.catalog_index import get_catalog_index
+    from .utils.xwing_data.aliases import load_alias_index
+    from .utils.xwing_data.catalog import add_reload_listener, start_catalog_watcher, warm_catalog
+
+    def _build_indexes(source):
+        for mode in ("pilots", "upgrades"):
+            get_catalog_index(source, mode)
+            load_alias_index(source, mode)
+
+    def _on_reload(source):
+        # Runs in the watcher thread: rebuild the indexes before dropping
+        # the dependent cache entries, so recomputes find them ready.
+        _build_indexes(source)
+        dropped = invalidate_prefix(catalog_dependent_prefixes())
+        print(f"[catalog] {source.value} reloaded, {dropped} cache entries dropped")
+
+    def _run():
+        t0 = time.time()
+        try:
+            warm_catalog()
+            for source in DataSource:
+                _build_indexes(source)
+            print(f"[catalog] loaded in {time.time() - t0:.2f}s")
+        except Exception as e:
+            print(f"[catalog] warm-up FAILED ({e})")
+
+    threading.Thread(target=_run, daemon=True, name="catalog-warmup").start()
+
+    # Hot reload: watch the data directories and swap in rebuilt catalogs.
+    watch_seconds = float(os.getenv("CATALOG_WATCH_SECONDS", "60"))
+    if watch_seconds > 0:
+        add_reload_listener(_on_reload)
+        start_catalog_watcher(watch_seconds)
+
+
 def _prewarm_cache():
     """Hit the API endpoints via HTTP so cache keys exactly match what users request.
 
@@ -127,7 +224,25 @@ def read_root():
     return {"status": "Backend is running"}
 
 
+@app.get("/api/admission")
+def get_admission():
+    """Admission limiters: capacity, slots in use, queue depth, counters."""
+    return admission_stats()
+
+
+@app.get("/api/replicas")
+def get_replicas():
+    """Read replica health as last probed (empty without READ_DATABASE_URL)."""
+    return replica_status()
+
+
 @app.get("/api/meta-snapshot", response_model=MetaSnapshotResponse)
+@cached_endpoint(
+    META_SNAPSHOT_PREFIX,
+    cacheable=lambda snapshot: not snapshot.degraded,
+    profile="snapshot",
+    weight=4,
+)
 def get_snapshot(
     data_source: str = Query("xwa", description="Data source: xwa or legacy"),
     epic: bool = Query(False, description="Include epic content"),
@@ -136,45 +251,20 @@ def get_snapshot(
     def compute():
         allowed_formats = ["xwa"] if ds_enum == DataSource.XWA else ["legacy_x2po"]
 
-        # Runs the 5 aggregations + 2 count queries. Cached by (data_source, epic),
+        # Runs the snapshot aggregations (single pass by default, see
+        # analytics/factions.get_meta_snapshot). Cached by (data_source, epic),
         # so the dashboard (which hits this on every load / filter toggle)
         # only pays the cost once per data_version.
-        from .api.formatters import enrich_list_data
+        from .api.formatters import enrich_lists_batch
         snapshot = get_meta_snapshot(ds_enum, allowed_formats=allowed_formats, include_epic=epic)
 
         # Enrich list data with pilot/ship metadata (names, ship icons,
         # pack captions, upgrade names) before serving to the dashboard.
         raw_lists = snapshot.get("lists", [])
-        enriched_lists = [enrich_list_data(l, source=ds_enum) for l in raw_lists]
-
-        total_tournaments = 0
-        total_players = 0
-
-        try:
-            with Session(engine) as session:
-                start_date = datetime.now() - timedelta(days=90)
-
-                total_tournaments_query = (
-                    select(func.count(Tournament.id))
-                    .where(Tournament.date >= start_date)
-                    .where(Tournament.format.in_(allowed_formats))
-                )
-                res_tournaments = session.exec(total_tournaments_query).one_or_none()
-                total_tournaments = res_tournaments if res_tournaments else 0
-
-                total_players_query = (
-                    select(func.count(PlayerStanding.id))
-                    .join(Tournament)
-                    .where(Tournament.date >= start_date)
-                    .where(Tournament.format.in_(allowed_formats))
-                )
-                res_players = session.exec(total_players_query).one_or_none()
-                total_players = res_players if res_players else 0
-        except Exception as e:
-            # Fallback to 0 if database fails or is empty initially
-            print(f"Error reading DB: {e}")
+        enriched_lists = enrich_lists_batch(raw_lists, source=ds_enum)
 
-        return {
+        # Validated once here; requests serve the cached model as is.
+        return MetaSnapshotResponse(**{
             "factions": snapshot.get("factions", []),
             "ships": snapshot.get("ships", []),
             "lists": enriched_lists,
@@ -182,9 +272,11 @@ def get_snapshot(
             "upgrades": snapshot.get("upgrades", []),
             "last_sync": snapshot.get("last_sync", "Never"),
             "date_range": snapshot.get("date_range", "Unknown"),
-            "total_tournaments": total_tournaments,
-            "total_players": total_players,
-        }
+            "total_tournaments": snapshot.get("total_tournaments", 0),
+            "total_players": snapshot.get("total_players", 0),
+            "degraded": snapshot.get("degraded", []),
+        })
 
-    cached = get_cached_or_compute(f"meta_snapshot|{ds_enum.value}|{epic}", compute)
-    return MetaSnapshotResponse(**cached)
+    cache_key = f"{META_SNAPSHOT_PREFIX}{ds_enum.value}|{epic}"
+    # A degraded snapshot is served to this request only, never cached.
+    return get_cached_or_compute(cache_key, compute, cacheable=lambda s: not s.degraded)
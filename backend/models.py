@@ -10,7 +10,7 @@ Defines:
 import logging
 from sqlmodel import Field, Relationship, SQLModel
 from datetime import date as date_type, datetime
-from sqlalchemy import JSON, Boolean, Column, Computed, String
+from sqlalchemy import JSON, Boolean, Column, Computed, Index, String
 from sqlalchemy.dialects.postgresql import JSONB
 
 # JSONB is Postgres-only; fall back to generic JSON on other backends
@@ -119,6 +119,77 @@ class List(SQLModel, table=True):
     created_at: datetime | None = Field(default=None)
 
 
+class ListCard(SQLModel, table=True):
+    """
+    Flattened card membership of a `list` row: one row per distinct pilot or
+    upgrade XWS id appearing in the list.
+
+    Populated by the scraper alongside the `list` insert (see
+    `analytics.rollups.populate_list_cards`) and backfilled by
+    `backend/scripts/migrate_rollups.py`. Lets chart queries answer
+    "which lists contain card X (and card Y)" with an index lookup instead
+    of parsing every list_json.
+    """
+    __tablename__ = "list_card"
+
+    list_id: int = Field(foreign_key="list.id", primary_key=True)
+    card_kind: str = Field(primary_key=True)  # "pilot" | "upgrade"
+    card_xws: str = Field(primary_key=True)
+
+    __table_args__ = (
+        # Card-first lookup for the co-presence self-join in charts.py.
+        Index("ix_list_card_card", "card_kind", "card_xws", "list_id"),
+    )
+
+
+class CardUsage(SQLModel, table=True):
+    """
+    Per-card usage cube: counted player standings per
+    (day, format, source, card_kind, card_xws).
+
+    Stored at day grain (tournaments are dated by day) so week, month and
+    quarter charts all roll up exactly with date_trunc. Rebuilt wholesale by
+    `analytics.rollups.refresh_card_usage` at the end of every scrape.
+    """
+    __tablename__ = "card_usage"
+
+    day: date_type = Field(primary_key=True)
+    format: str = Field(primary_key=True)  # tournament.format, 'unknown' when NULL
+    source: str = Field(primary_key=True)
+    card_kind: str = Field(primary_key=True)
+    card_xws: str = Field(primary_key=True)
+    entries: int = Field(default=0)
+
+    __table_args__ = (
+        Index("ix_card_usage_card_day", "card_kind", "card_xws", "day"),
+    )
+
+
+class PilotConfig(SQLModel, table=True):
+    """
+    Pilot loadout aggregate: entries and wins per
+    (pilot_xws, upgrade_signature, format, source, month).
+
+    `upgrade_signature` is the pilot's upgrade xws ids sorted (byte order) and
+    joined with "|" ("" for no upgrades). `month` is the first day of the
+    tournament month. Rebuilt by `analytics.rollups.refresh_pilot_config` at
+    the end of every scrape; read by /api/pilot/{xws}/configurations.
+    """
+    __tablename__ = "pilot_config"
+
+    pilot_xws: str = Field(primary_key=True)
+    upgrade_signature: str = Field(primary_key=True)
+    format: str = Field(primary_key=True)  # tournament.format, 'unknown' when NULL
+    source: str = Field(primary_key=True)
+    month: date_type = Field(primary_key=True)
+    entries: int = Field(default=0)
+    wins: int = Field(default=0)
+
+    __table_args__ = (
+        Index("ix_pilot_config_pilot_month", "pilot_xws", "month"),
+    )
+
+
 class PlayerStanding(SQLModel, table=True):
     """
     A player's performance in a tournament.
@@ -0,0 +1,38 @@
+"""
+Build the compiled xwing-data catalog snapshot (both data sources).
+
+Parses external_data/xwing-data2*/data once and writes the binary snapshot
+read by backend/utils/xwing_data/catalog.py. Run after updating
+external_data; the Docker image runs it at build time. A stale or missing
+snapshot is not an error: the API falls back to parsing the JSON and
+rewrites the snapshot from its startup warm-up thread.
+
+Usage: python -m backend.scripts.build_catalog_snapshot [output_path]
+"""
+
+import logging
+import sys
+from pathlib import Path
+
+from ..data_structures.data_source import DataSource
+from ..utils.xwing_data.catalog import build_snapshot, load_catalog
+
+logging.basicConfig(level=logging.INFO, format="%(message)s", handlers=[logging.StreamHandler(sys.stdout)])
+log = logging.getLogger(__name__)
+
+
+def main():
+    output = Path(sys.argv[1]) if len(sys.argv) > 1 else None
+    path = build_snapshot(output)
+    log.info(f"Wrote {path} ({path.stat().st_size} bytes)")
+    if output is None:
+        for source in DataSource:
+            catalog = load_catalog(source)
+            log.info(
+                f"  {source.value}: {len(catalog['pilots'])} pilots, "
+                f"{len(catalog['ships'])} ships, {len(catalog['upgrades'])} upgrades"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Measure statement-text reuse and planning time of the list aggregation.
+
+Runs the WHERE clause of analytics.lists over a set of filter
+combinations that differ only in their values (dates, how many ships or
+factions are selected) and reports:
+
+  - how many distinct statement texts they produce (1 per filter shape
+    with the canonical builder in analytics/filter_helpers.py);
+  - with --explain (PostgreSQL only), the planning time of each, from
+    `EXPLAIN (SUMMARY, FORMAT JSON)`, first run versus repeated runs of
+    the same text within one connection.
+
+Usage:
+    python -m backend.scripts.measure_query_planning [--explain] [--repeat 5]
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+
+from sqlalchemy import text
+
+from ..analytics.lists import _grouped_lists_sql, _list_where_sql
+from ..data_structures.data_source import DataSource
+from ..database import engine
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)],
+)
+log = logging.getLogger(__name__)
+
+SHIPS = ["t65xwing", "rz1awing", "btla4ywing", "t70xwing", "tielnfighter"]
+FACTIONS = ["Rebel Alliance", "Galactic Empire", "Scum and Villainy"]
+
+# Same filter shape (date range + factions + ships), different values.
+COMBINATIONS = [
+    {
+        "date_start": f"2025-{month:02d}-01",
+        "date_end": "2025-12-31",
+        "factions": FACTIONS[:n_factions],
+        "ships": SHIPS[:n_ships],
+        "epic": True,
+    }
+    for month in (1, 6)
+    for n_factions in (1, 3)
+    for n_ships in (1, 2, 5)
+]
+
+
+def _statement(filters: dict) -> tuple[str, dict]:
+    params: dict = {}
+    where_sql = _list_where_sql(filters, DataSource.XWA, params)
+    return _grouped_lists_sql(where_sql, filters, params), params
+
+
+def _planning_ms(conn, sql: str, params: dict) -> float:
+    plan = conn.execute(text(f"EXPLAIN (SUMMARY, FORMAT JSON) {sql}"), params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Planning Time"]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--explain", action="store_true",
+                        help="EXPLAIN each statement (PostgreSQL only)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="EXPLAIN runs per combination")
+    args = parser.parse_args()
+
+    statements = [_statement(filters) for filters in COMBINATIONS]
+    texts = {sql for sql, _ in statements}
+    log.info(f"{len(COMBINATIONS)} filter combinations -> {len(texts)} distinct statement text(s)")
+
+    if not args.explain:
+        return 0
+    if engine.dialect.name != "postgresql":
+        log.error("--explain needs PostgreSQL (DATABASE_URL)")
+        return 1
+
+    first, repeated = [], []
+    with engine.connect() as conn:
+        for sql, params in statements:
+            runs = [_planning_ms(conn, sql, params) for _ in range(max(args.repeat, 1))]
+            first.append(runs[0])
+            repeated.extend(runs[1:])
+    log.info(f"planning time, first run:   median {statistics.median(first):.2f} ms")
+    if repeated:
+        log.info(f"planning time, repeat runs: median {statistics.median(repeated):.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
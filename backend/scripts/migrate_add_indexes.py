@@ -42,6 +42,13 @@ INDEXES: list[tuple[str, str, str]] = [
     ("ix_list_faction_xws_normalized", "list", "faction_xws_normalized"),
 ]
 
+# (index_name, "ON ..." target) for indexes on expressions.
+EXPRESSION_INDEXES: list[tuple[str, str]] = [
+    # list.ship_list as an array: serves the `@>` ship filter of the lists
+    # and squadrons pages (filter_helpers.ship_list_filter_clause).
+    ("ix_list_ship_array", "list USING gin ((string_to_array(ship_list, ',')))"),
+]
+
 
 def migrate() -> None:
     with Session(engine) as session:
@@ -57,6 +64,11 @@ def migrate() -> None:
             session.commit()
             log.info(f"   {index_name} ON {table}({column}) ✓")
 
+        for index_name, target in EXPRESSION_INDEXES:
+            session.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {target}"))
+            session.commit()
+            log.info(f"   {index_name} ON {target} ✓")
+
         log.info("Migration complete. All indexes are in place.")
 
 
@@ -12,7 +12,7 @@ import sys
 from sqlalchemy import text
 from sqlmodel import Session
 
-from ..database import engine
+from ..database import engine, stream_rows
 from ..utils.list_keys import get_list_key, get_ship_list
 
 logging.basicConfig(level=logging.INFO, format="%(message)s", handlers=[logging.StreamHandler(sys.stdout)])
@@ -61,21 +61,22 @@ def migrate():
         seen: dict[str, dict] = {}
         BATCH = 5000
 
-        for offset in range(0, total, BATCH):
-            rows = session.execute(text(
-                "SELECT list_json FROM playerstanding "
-                "WHERE list_json IS NOT NULL AND list_json::text != '{}' "
-                "ORDER BY id LIMIT :lim OFFSET :off"
-            ), {"lim": BATCH, "off": offset}).fetchall()
-            if not rows:
-                break
-            for (lj,) in rows:
-                if not lj or not isinstance(lj, dict):
-                    continue
-                sig = get_list_key(lj)
-                if sig and sig not in seen:
-                    seen[sig] = lj
-            log.info(f"   {min(offset+BATCH, total)}/{total} scanned, {len(seen)} unique")
+        # One server-side cursor instead of LIMIT/OFFSET pages, which
+        # rescan every skipped row.
+        scanned = 0
+        for (lj,) in stream_rows(session, text(
+            "SELECT list_json FROM playerstanding "
+            "WHERE list_json IS NOT NULL AND list_json::text != '{}' "
+            "ORDER BY id"
+        ), batch_size=BATCH):
+            scanned += 1
+            if scanned % BATCH == 0:
+                log.info(f"   {scanned}/{total} scanned, {len(seen)} unique")
+            if not lj or not isinstance(lj, dict):
+                continue
+            sig = get_list_key(lj)
+            if sig and sig not in seen:
+                seen[sig] = lj
 
         log.info(f"   Found {len(seen)} unique lists.")
 
@@ -114,20 +115,20 @@ def migrate():
         log.info("5. Populating list_id...")
         sig_to_id = {
             row[1]: row[0]
-            for row in session.execute(text("SELECT id, canonical_signature FROM list")).fetchall()
+            for row in stream_rows(session, text("SELECT id, canonical_signature FROM list"))
         }
         log.info(f"   Loaded {len(sig_to_id)} mappings")
 
         updated = 0
-        for offset in range(0, total, BATCH):
-            rows = session.execute(text(
+        # Read on a separate connection: the session commits per batch,
+        # which would close a server-side cursor opened on it. (Paging with
+        # OFFSET over "list_id IS NULL" also skipped rows as they were
+        # updated out of the filter.)
+        with engine.connect() as read_conn:
+            for ps_id, lj in stream_rows(read_conn, text(
                 "SELECT id, list_json FROM playerstanding "
-                "WHERE list_id IS NULL AND list_json IS NOT NULL "
-                "ORDER BY id LIMIT :lim OFFSET :off"
-            ), {"lim": BATCH, "off": offset}).fetchall()
-            if not rows:
-                break
-            for ps_id, lj in rows:
+                "WHERE list_id IS NULL AND list_json IS NOT NULL"
+            ), batch_size=BATCH):
                 if not lj or not isinstance(lj, dict):
                     continue
                 sig = get_list_key(lj)
@@ -137,8 +138,11 @@ def migrate():
                         "UPDATE playerstanding SET list_id = :lid WHERE id = :pid"
                     ), {"lid": lid, "pid": ps_id})
                     updated += 1
-            session.commit()
-            log.info(f"   {updated} matched so far")
+                    if updated % BATCH == 0:
+                        session.commit()
+                        log.info(f"   {updated} matched so far")
+        session.commit()
+        log.info(f"   {updated} matched")
 
         # Step 6: Verify
         log.info("6. Verification...")
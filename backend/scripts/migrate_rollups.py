@@ -0,0 +1,76 @@
+"""
+Migration: Create and backfill the rollup tables.
+
+Creates `list_card` (flattened card membership per list), `card_usage`
+(daily per-card usage cube) and `pilot_config` (pilot loadout aggregate),
+fills list_card from every existing `list` row, then builds the aggregates.
+The chart and pilot configuration endpoints read these instead of scanning
+every playerstanding list_json.
+
+Idempotent — tables are created only when missing, list_card inserts use
+ON CONFLICT DO NOTHING and the aggregates are rebuilt from scratch. Safe to
+re-run. After the backfill the scraper keeps all three tables current.
+
+Usage:
+    python -m backend.scripts.migrate_rollups
+"""
+
+import logging
+import sys
+
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel
+
+from ..analytics.rollups import populate_list_cards, refresh_card_usage, refresh_pilot_config
+from ..database import engine
+from ..models import CardUsage, ListCard, PilotConfig
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)],
+)
+log = logging.getLogger(__name__)
+
+BATCH = 5000
+
+
+def migrate() -> None:
+    log.info("1. Creating list_card / card_usage / pilot_config tables...")
+    SQLModel.metadata.create_all(
+        engine, tables=[ListCard.__table__, CardUsage.__table__, PilotConfig.__table__]
+    )
+
+    log.info("2. Backfilling list_card...")
+    with Session(engine) as session:
+        max_id = session.execute(text("SELECT COALESCE(MAX(id), 0) FROM list")).scalar() or 0
+        # Batch by id range (not OFFSET) so each batch is an index range scan.
+        for start in range(0, max_id + 1, BATCH):
+            ids = [
+                row[0]
+                for row in session.execute(
+                    text("SELECT id FROM list WHERE id >= :lo AND id < :hi"),
+                    {"lo": start, "hi": start + BATCH},
+                ).fetchall()
+            ]
+            populate_list_cards(session, ids)
+            # Commit per batch so partial progress is durable on long runs.
+            session.commit()
+            log.info(f"   lists < {min(start + BATCH, max_id + 1)}/{max_id + 1} ✓")
+
+        count = session.execute(text("SELECT COUNT(*) FROM list_card")).scalar()
+        log.info(f"   list_card: {count} rows")
+
+    log.info("3. Building card_usage cube...")
+    rows = refresh_card_usage()
+    log.info(f"   card_usage: {rows} rows ✓")
+
+    log.info("4. Building pilot_config...")
+    rows = refresh_pilot_config()
+    log.info(f"   pilot_config: {rows} rows ✓")
+
+    log.info("Migration complete!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -27,12 +27,13 @@ def _source_value(source: DataSource) -> str:
     return str(source).lower()
 
 
-def populate() -> None:
-    """Fill pilot_ship_mapping from the in-repo pilot data."""
+def populate(target=engine) -> None:
+    """Fill pilot_ship_mapping from the in-repo pilot data (on `target`,
+    default the configured engine)."""
     sources = [DataSource.XWA, DataSource.LEGACY]
     total_inserted = 0
 
-    with engine.begin() as conn:
+    with target.begin() as conn:
         for source in sources:
             pilots = load_all_pilots(source)
             source_key = _source_value(source)
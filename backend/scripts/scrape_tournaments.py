@@ -41,6 +41,7 @@ from urllib.parse import urlparse
 from sqlalchemy import func, text
 from sqlmodel import Session, create_engine, select
 
+from ..analytics.rollups import populate_list_cards, refresh_rollups
 from ..database import engine, create_db_and_tables
 from ..data_structures.round_types import RoundType
 from ..data_structures.source import Source
@@ -320,6 +321,10 @@ def _persist_list_rows(
     rows = session.execute(
         select_sql, {"sigs": list(sig_to_data.keys())}
     ).all()
+
+    # Keep the flattened card membership (list_card) in step with the list
+    # table so the usage cube can be rebuilt without re-parsing list_json.
+    populate_list_cards(session, [lid for lid, _ in rows])
     return {sig: lid for lid, sig in rows}
 
 
@@ -1165,6 +1170,15 @@ def main() -> int:
     elif args.sqlite_output and not all_saved_items:
         logger.info("No new tournaments saved; skipping SQLite artifact.")
 
+    # Rebuild rollups (card usage cube, pilot configs) before the version bump so the first
+    # request after cache invalidation already reads fresh rollups.
+    if total_saved:
+        try:
+            refresh_rollups()
+            print("[rollups] card usage cube and pilot configs refreshed")
+        except Exception as e:
+            print(f"[rollups] WARNING: Could not refresh rollups: {e}")
+
     # Bump data_version to invalidate API cache
     try:
         with engine.begin() as conn:
@@ -0,0 +1,43 @@
+import pytest
+
+from backend.api.formatters import enrich_list_data, enrich_lists_batch
+from backend.data_structures.data_source import DataSource
+from backend.utils.xwing_data.catalog import load_catalog
+
+
+pytestmark = pytest.mark.performance
+
+
+def _sample_lists(source: DataSource, count: int = 500) -> list[dict]:
+    """Meta-snapshot sized batch of lists drawn from the real catalog."""
+    catalog = load_catalog(source)
+    pilot_ids = list(catalog["pilots"])
+    upgrade_ids = list(catalog["upgrades"])
+    if not pilot_ids or not upgrade_ids:
+        pytest.skip("xwing-data catalog not available")
+    lists = []
+    for i in range(count):
+        pilots = []
+        for j in range(4):
+            pid = pilot_ids[(i * 7 + j * 13) % len(pilot_ids)]
+            ups = [upgrade_ids[(i * 11 + j * 5 + k) % len(upgrade_ids)] for k in range(3)]
+            pilots.append({"id": pid, "points": 5, "upgrades": {"talent": ups[:1], "crew": ups[1:]}})
+        lists.append({
+            "signature": f"sig-{i}", "faction_xws": "rebelalliance", "points": 20,
+            "games": 10, "wins": 5, "win_rate": 50.0, "count": 2, "pilots": pilots,
+        })
+    return lists
+
+
+@pytest.mark.parametrize("source", [DataSource.XWA, DataSource.LEGACY])
+def test_enrich_lists_validated(benchmark, source):
+    lists = _sample_lists(source)
+    result = benchmark(lambda: [enrich_list_data(l, source=source) for l in lists])
+    assert len(result) == len(lists)
+
+
+@pytest.mark.parametrize("source", [DataSource.XWA, DataSource.LEGACY])
+def test_enrich_lists_batch(benchmark, source):
+    lists = _sample_lists(source)
+    result = benchmark(lambda: enrich_lists_batch(lists, source=source))
+    assert len(result) == len(lists)
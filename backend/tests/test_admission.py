@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import admission
+from backend.admission import AdmissionRejected, WeightedLimiter
+from backend.main import app
+
+
+def test_weights_share_the_capacity():
+    limiter = WeightedLimiter("t", capacity=4, max_queue=0, max_wait=0.1)
+    assert limiter.acquire(3) == 3
+    with pytest.raises(AdmissionRejected):
+        limiter.acquire(2)  # no queue: fails fast
+    assert limiter.acquire(1) == 1
+    limiter.release(4)
+    assert limiter.acquire(10) == 4  # capped at the capacity
+    assert limiter.stats()["in_use"] == 4
+
+def test_queue_timeout_and_fifo_order():
+    limiter = WeightedLimiter("t", capacity=2, max_queue=2, max_wait=2)
+    limiter.acquire(2)
+    order = []
+
+    def waiter(name, weight):
+        with limiter.slot(weight):
+            order.append(name)
+
+    big = threading.Thread(target=waiter, args=("big", 2))
+    big.start()
+    while limiter.stats()["queued"] < 1:
+        time.sleep(0.01)
+    small = threading.Thread(target=waiter, args=("small", 1))
+    small.start()
+    while limiter.stats()["queued"] < 2:
+        time.sleep(0.01)
+
+    with pytest.raises(AdmissionRejected):
+        limiter.acquire(1)  # queue full
+    limiter.release(2)
+    big.join(timeout=2)
+    small.join(timeout=2)
+
+    assert order == ["big", "small"]
+    stats = limiter.stats()
+    assert (stats["in_use"], stats["queued"], stats["rejected"]) == (0, 0, 1)
+
+    slow = WeightedLimiter("t", capacity=1, max_queue=1, max_wait=0.05)
+    slow.acquire(1)
+    with pytest.raises(AdmissionRejected) as exc:
+        slow.acquire(1)
+    assert exc.value.retry_after == 1
+
+
+def test_rejection_is_a_503_and_stats_are_exposed(monkeypatch):
+    full = WeightedLimiter("light", capacity=1, max_queue=0, max_wait=0)
+    full.acquire(1)
+    monkeypatch.setattr(admission, "light", full)
+    client = TestClient(app)
+
+    response = client.get("/api/list/abc/stats")
+    assert response.status_code == 503
+    assert response.json()["code"] == "overloaded"
+    assert response.headers["Retry-After"] == "1"
+
+    names = [s["name"] for s in client.get("/api/admission").json()]
+    assert names == ["heavy", "light"]
@@ -0,0 +1,158 @@
+import threading
+import time
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.testclient import TestClient
+
+from backend import cache
+from backend.api.responses import cached_endpoint
+
+app = FastAPI()
+calls: list[tuple] = []
+
+
+@app.get("/items/{kind}")
+@cached_endpoint("test_items|")
+def get_items(kind: str, page: int = Query(0, ge=0), tags: list[str] | None = Query(None)):
+    calls.append((kind, page, tags))
+    if kind == "bad":
+        raise HTTPException(status_code=400, detail="bad kind")
+    return {"kind": kind, "page": page, "tags": tags}
+
+
+@app.get("/partial")
+@cached_endpoint("test_partial|", cacheable=lambda content: not content["degraded"])
+def get_partial():
+    calls.append(("partial",))
+    return {"degraded": True}
+
+
+def test_cached_endpoint_serves_hits_without_calling_the_function():
+    cache.invalidate_cache()
+    calls.clear()
+    client = TestClient(app)
+
+    first = client.get("/items/a?page=2&tags=y&tags=x")
+    assert first.status_code == 200
+    assert first.json() == {"kind": "a", "page": 2, "tags": ["y", "x"]}
+    assert "serialize;" in first.headers["Server-Timing"]
+
+    assert client.get("/items/a?tags=y&page=2&tags=x").json() == first.json()
+    assert client.get("/items/a?page=3").json()["page"] == 3
+    assert len(calls) == 2
+
+    assert client.get("/items/a?page=2&tags=x&tags=y&utm_source=z&_=123").json() == first.json()
+    assert len(calls) == 2
+
+    assert client.get("/items/a?page=-1").status_code == 422
+    assert client.get("/items/bad").status_code == 400
+    assert cache.invalidate_prefix(("test_items|",)) == 2
+
+
+def test_undeclared_and_default_parameters_share_the_key():
+    cache.invalidate_cache()
+    calls.clear()
+    client = TestClient(app)
+    client.get("/items/a")
+    client.get("/items/a?page=0")
+    client.get("/items/a?nocache=1")
+    assert len(calls) == 1
+
+
+def test_uncacheable_results_are_recomputed():
+    cache.invalidate_cache()
+    calls.clear()
+    client = TestClient(app)
+    client.get("/partial")
+    client.get("/partial")
+    assert len(calls) == 2
+
+
+def test_uncacheable_results_are_not_handed_to_waiting_followers():
+    cache.invalidate_cache()
+    computed = []
+
+    def compute():
+        computed.append(threading.current_thread().name)
+        time.sleep(0.2)
+        return {"degraded": len(computed) == 1}
+
+    def get():
+        results.append(
+            cache.get_cached_or_compute("test_follow|k", compute, lambda r: not r["degraded"])
+        )
+
+    results: list[dict] = []
+    leader = threading.Thread(target=get)
+    leader.start()
+    time.sleep(0.05)
+    get()  # follows the leader, then computes a clean value itself
+    leader.join()
+
+    assert len(computed) == 2
+    assert results == [{"degraded": True}, {"degraded": False}]
+    assert cache._cache["test_follow|k"] == {"degraded": False}
+
+
+def test_follower_out_of_attempts_leaves_the_leader_in_flight(monkeypatch):
+    cache.invalidate_cache()
+    monkeypatch.setattr(cache, "FOLLOWER_WAIT_SECONDS", 0.05)
+    key = "test_follow|slow"
+    release = threading.Event()
+    uncacheable = lambda r: False  # noqa: E731
+
+    def slow():
+        release.wait(5)
+        return "leader"
+
+    leader = threading.Thread(target=cache.get_cached_or_compute, args=(key, slow, uncacheable))
+    leader.start()
+    time.sleep(0.05)
+    leader_event = cache._in_flight[key]
+
+    # Times out three times behind the leader, then computes by itself.
+    assert cache.get_cached_or_compute(key, lambda: "follower", uncacheable) == "follower"
+    assert cache._in_flight[key] is leader_event
+    assert not leader_event.is_set()
+
+    release.set()
+    leader.join()
+    assert key not in cache._in_flight and key not in cache._cache
+
+
+def test_openapi_keeps_the_endpoint_parameters():
+    params = app.openapi()["paths"]["/items/{kind}"]["get"]["parameters"]
+    assert [p["name"] for p in params] == ["kind", "page", "tags"]
+
+
+slow = {"delay": 0.0, "value": 1}
+
+
+@app.get("/budget")
+@cached_endpoint("test_budget|", budget=0.2)
+def get_budgeted():
+    time.sleep(slow["delay"])
+    return {"value": slow["value"]}
+
+
+def test_over_budget_miss_serves_last_known_good_and_fills_the_cache():
+    cache.invalidate_cache()
+    with TestClient(app) as client:
+        assert client.get("/budget").json() == {"value": 1}
+
+        cache.invalidate_prefix(("test_budget|",))
+        slow.update(delay=0.6, value=2)
+        response = client.get("/budget")
+        assert response.json() == {"value": 1}
+        assert response.headers["X-Cache-Status"] == "stale"
+
+        time.sleep(0.8)
+        response = client.get("/budget")
+        assert response.json() == {"value": 2}
+        assert "X-Cache-Status" not in response.headers
+
+    # No last-known-good value: the request waits for the result.
+    cache.invalidate_cache()
+    slow.update(delay=0.3, value=3)
+    response = TestClient(app).get("/budget")
+    assert response.json() == {"value": 3}
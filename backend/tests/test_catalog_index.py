@@ -0,0 +1,66 @@
+from backend.analytics.catalog_index import CardCatalogIndex
+from backend.data_structures.data_source import DataSource
+
+PILOTS = {
+    "lukeskywalker": {
+        "name": "Luke Skywalker", "caption": "Red Five", "ship": "X-wing",
+        "ship_xws": "t65xwing", "faction": "Rebel Alliance", "initiative": 5,
+        "cost": 6, "loadout": 8, "ability": "", "hull": 4, "shields": 2,
+        "agility": 2, "attack": 3, "size": "Small", "valid_in_standard": True,
+    },
+    "darthvader": {
+        "name": "Darth Vader", "caption": "Black Leader", "ship": "TIE Advanced x1",
+        "ship_xws": "tieadvancedx1", "faction": "Galactic Empire", "initiative": 6,
+        "cost": 7, "loadout": 12, "ability": "", "hull": 3, "shields": 2,
+        "agility": 3, "attack": 2, "size": "Small", "valid_in_standard": True,
+    },
+    "bobafett": {
+        "name": "Boba Fett", "caption": "", "ship": "Firespray-class Patrol Craft",
+        "ship_xws": "firesprayclasspatrolcraft", "faction": "Scum and Villainy",
+        "initiative": 5, "cost": 8, "loadout": 4, "ability": "", "hull": 6,
+        "shields": 4, "agility": 2, "attack": 3, "size": "Medium",
+        "valid_in_standard": False, "wildspace": True,
+    },
+}
+
+
+def _ids(index, mask):
+    return index.selected(mask)
+
+
+def test_range_columns_and_catalog_order():
+    index = CardCatalogIndex(PILOTS, "pilots")
+    assert _ids(index, index.all) == ["lukeskywalker", "darthvader", "bobafett"]
+    assert _ids(index, index.cost.between(7, 8)) == ["darthvader", "bobafett"]
+    assert _ids(index, index.cost.between(0, 5)) == []
+    assert _ids(index, index.hull.between(4, 20)) == ["lukeskywalker", "bobafett"]
+
+
+def test_text_search_does_not_span_fields_or_cards():
+    index = CardCatalogIndex(PILOTS, "pilots")
+    assert _ids(index, index.text_mask("red five")) == ["lukeskywalker"]
+    assert _ids(index, index.text_mask("fett")) == ["bobafett"]
+    # "Five" ends Luke's caption and "X-wing" starts the next field.
+    assert _ids(index, index.text_mask("fivex")) == []
+
+
+def test_format_and_size_masks():
+    index = CardCatalogIndex(PILOTS, "pilots")
+    assert _ids(index, index.format_mask([], DataSource.XWA, False)) == ["lukeskywalker", "darthvader"]
+    assert _ids(index, index.format_mask(["wildspace"], DataSource.XWA, False)) == ["bobafett"]
+    assert _ids(index, index.size_mask({"M": True, "S": False})) == ["bobafett"]
+
+
+def test_upgrade_factions_and_types():
+    upgrades = {
+        "predator": {"name": "Predator", "cost": {"value": 2}, "sides": [{"type": "Talent", "ability": "Reroll"}]},
+        "hansolo": {
+            "name": "Han Solo", "cost": 6, "type": "Crew", "text": "",
+            "restrictions": [{"factions": ["Rebel Alliance"]}],
+        },
+    }
+    index = CardCatalogIndex(upgrades, "upgrades")
+    assert _ids(index, index.unrestricted) == ["predator"]
+    assert _ids(index, index.by_faction["rebelalliance"]) == ["hansolo"]
+    assert _ids(index, index.any_of(index.by_type, {"talent"})) == ["predator"]
+    assert _ids(index, index.cost.between(2, 2)) == ["predator"]
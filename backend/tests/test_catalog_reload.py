@@ -0,0 +1,64 @@
+import json
+
+from backend import cache
+from backend.data_structures.data_source import DataSource
+from backend.utils.xwing_data import catalog
+from backend.utils.xwing_data.aliases import load_alias_index
+
+
+def _write_upgrades(data_dir, cost):
+    (data_dir / "upgrades").mkdir(parents=True, exist_ok=True)
+    (data_dir / "upgrades" / "talent.json").write_text(json.dumps([
+        {"xws": "predator", "name": "Predator", "cost": {"value": cost}},
+    ]))
+
+
+def test_reload_swaps_changed_catalog_and_notifies(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    _write_upgrades(data_dir, 2)
+    monkeypatch.setattr(catalog, "get_data_dir", lambda source: data_dir)
+    monkeypatch.setattr(catalog, "SNAPSHOT_PATH", tmp_path / "catalog.snapshot")
+    monkeypatch.setattr(catalog, "_catalogs", {})
+    monkeypatch.setattr(catalog, "_fingerprints", {})
+    monkeypatch.setattr(catalog, "_reload_listeners", [])
+    notified = []
+    catalog.add_reload_listener(notified.append)
+
+    before = catalog.load_catalog(DataSource.XWA)
+    assert load_alias_index(DataSource.XWA, "upgrades").get("predator-lsl")["cost"] == {"value": 2}
+    assert catalog.reload_if_changed() == []
+
+    _write_upgrades(data_dir, 30)
+    assert catalog.reload_if_changed() == [DataSource.XWA]
+    assert notified == [DataSource.XWA]
+    assert before["upgrades"]["predator"]["cost"] == {"value": 2}
+    assert catalog.load_catalog(DataSource.XWA)["upgrades"]["predator"]["cost"] == {"value": 30}
+    assert load_alias_index(DataSource.XWA, "upgrades").get("predator-lsl")["cost"] == {"value": 30}
+
+
+def test_invalidate_prefix_keeps_unrelated_entries():
+    cache.invalidate_cache()
+    cache.get_cached_or_compute("cards_pilots|test", lambda: 1)
+    cache.get_cached_or_compute("pilot_chart|test", lambda: 2)
+    assert cache.invalidate_prefix(("cards_pilots|", "lists|")) == 1
+    assert cache.get_cached_or_compute("pilot_chart|test", lambda: 3) == 2
+    assert cache.get_cached_or_compute("cards_pilots|test", lambda: 4) == 4
+
+
+def test_reload_drops_every_catalog_dependent_prefix():
+    import backend.main  # noqa: F401  (registers the api modules' prefixes)
+
+    dependent = (
+        "cards_pilots|", "cards_upgrades|", "ships|", "lists|", "squadrons|",
+        "squadron_base|", "pilot_configs|", "meta_snapshot|",
+    )
+    assert set(dependent) <= set(cache.catalog_dependent_prefixes())
+
+    cache.invalidate_cache()
+    for prefix in dependent:
+        cache.get_cached_or_compute(f"{prefix}xwa", lambda: 1)
+        cache.get_cached_or_compute(f"{prefix}resp|/api/x?", lambda: 1)
+    cache.get_cached_or_compute("tournaments|resp|/api/tournaments?", lambda: 2)
+
+    assert cache.invalidate_prefix(cache.catalog_dependent_prefixes()) == 2 * len(dependent)
+    assert cache._cache["tournaments|resp|/api/tournaments?"] == 2
@@ -0,0 +1,90 @@
+import json
+
+from backend.data_structures.data_source import DataSource
+from backend.utils.xwing_data import catalog
+
+
+def _make_tree(root):
+    ship_dir = root / "pilots" / "rebel-alliance"
+    ship_dir.mkdir(parents=True)
+    (ship_dir / "t-65-x-wing.json").write_text(json.dumps({
+        "name": "T-65 X-wing", "xws": "t65xwing", "faction": "Rebel Alliance",
+        "size": "Small", "stats": [{"type": "attack", "value": 3}, {"type": "hull", "value": 4}],
+        "pilots": [{"xws": "lukeskywalker", "name": "Luke Skywalker", "cost": 6, "standard": True}],
+    }))
+    (root / "upgrades").mkdir()
+    (root / "upgrades" / "talent.json").write_text(json.dumps([
+        {"xws": "predator", "name": "Predator", "cost": {"value": 2}, "sides": [{"type": "Talent"}]},
+    ]))
+
+
+def test_snapshot_round_trip_and_staleness(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    _make_tree(data_dir)
+    monkeypatch.setattr(catalog, "get_data_dir", lambda source: data_dir)
+
+    parsed = catalog.parse_catalog(DataSource.XWA)
+    assert list(parsed["ships"]) == ["t65xwing"]
+    assert parsed["pilots"]["lukeskywalker"]["attack"] == 3
+    assert parsed["upgrades"]["predator"]["slot_category"] == "talent"
+
+    path = tmp_path / "catalog.snapshot"
+    fingerprint = catalog.source_fingerprint(DataSource.XWA)
+    catalog.write_snapshot({DataSource.XWA: (fingerprint, parsed)}, path)
+
+    assert catalog.read_snapshot(DataSource.XWA, fingerprint, path) == parsed
+    assert catalog.read_snapshot(DataSource.LEGACY, fingerprint, path) is None
+    assert catalog.read_snapshot(DataSource.XWA, "stale", path) is None
+
+    (data_dir / "upgrades" / "talent.json").write_text("[]")
+    assert catalog.source_fingerprint(DataSource.XWA) != fingerprint
+
+
+def test_read_snapshot_ignores_missing_or_foreign_files(tmp_path):
+    assert catalog.read_snapshot(DataSource.XWA, "x", tmp_path / "missing") is None
+    garbage = tmp_path / "garbage"
+    garbage.write_bytes(b"not a snapshot at all")
+    assert catalog.read_snapshot(DataSource.XWA, "x", garbage) is None
+
+
+def test_mapped_snapshot_matches_decoded_catalog(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    _make_tree(data_dir)
+    monkeypatch.setattr(catalog, "get_data_dir", lambda source: data_dir)
+    parsed = catalog.parse_catalog(DataSource.XWA)
+    path = tmp_path / "catalog.snapshot"
+    fingerprint = catalog.source_fingerprint(DataSource.XWA)
+    catalog.write_snapshot({DataSource.XWA: (fingerprint, parsed)}, path)
+
+    mapped = catalog.map_snapshot(DataSource.XWA, fingerprint, path)
+    assert isinstance(mapped["pilots"], catalog.MappedCatalog)
+    for kind in ("pilots", "ships", "upgrades"):
+        assert list(mapped[kind]) == list(parsed[kind])
+        assert dict(mapped[kind].items()) == parsed[kind]
+    assert "lukeskywalker" in mapped["pilots"]
+    assert mapped["pilots"].get("missing") is None
+    assert catalog.map_snapshot(DataSource.XWA, "stale", path) is None
+
+    # A mapped catalog can be written back (e.g. by a reload snapshot refresh).
+    catalog.write_snapshot({DataSource.XWA: (fingerprint, mapped)}, path)
+    assert catalog.read_snapshot(DataSource.XWA, fingerprint, path) == parsed
+
+
+def test_shared_mode_alias_index(tmp_path, monkeypatch):
+    from backend.utils.xwing_data.aliases import AliasIndex
+
+    data_dir = tmp_path / "data"
+    _make_tree(data_dir)
+    monkeypatch.setattr(catalog, "get_data_dir", lambda source: data_dir)
+    parsed = catalog.parse_catalog(DataSource.XWA)
+    path = tmp_path / "catalog.snapshot"
+    fingerprint = catalog.source_fingerprint(DataSource.XWA)
+    catalog.write_snapshot({DataSource.XWA: (fingerprint, parsed)}, path)
+    mapped = catalog.map_snapshot(DataSource.XWA, fingerprint, path)
+
+    for kind in ("pilots", "upgrades"):
+        eager = AliasIndex(parsed[kind], with_slots=(kind == "upgrades"))
+        lazy = AliasIndex(mapped[kind], with_slots=(kind == "upgrades"))
+        for xws in list(parsed[kind]) + ["predator-lsl", "lukeskywalker-lsl-battleofyavin", "nope"]:
+            assert lazy.get(xws) == eager.get(xws)
+            assert lazy.slot(xws) == eager.slot(xws)
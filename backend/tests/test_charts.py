@@ -0,0 +1,102 @@
+import os
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlmodel import Session, SQLModel
+
+from backend.analytics import charts
+from backend.analytics.charts import bucket_label
+from backend.models import PlayerStanding, Tournament
+
+
+def test_bucket_label_month_and_quarter():
+    assert bucket_label(date(2024, 2, 29), "month") == "2024-02"
+    assert bucket_label(date(2024, 3, 31), "quarter") == "2024-Q1"
+    assert bucket_label(date(2024, 10, 1), "quarter") == "2024-Q4"
+
+
+def test_bucket_label_week_starts_on_monday():
+    # 2024-01-03 is a Wednesday; its ISO week starts Monday 2024-01-01.
+    assert bucket_label(date(2024, 1, 3), "week") == "2024-01-01"
+    assert bucket_label(date(2024, 1, 1), "week") == "2024-01-01"
+    # Weeks may straddle a year boundary, like date_trunc('week').
+    assert bucket_label(date(2021, 1, 2), "week") == "2020-12-28"
+
+
+@pytest.mark.parametrize("filters, path", [
+    ({}, "cube"),
+    ({"date_start": "2025-01-01", "date_end": "2025-06-30"}, "cube"),
+    ({"sources": ["longshanks"], "allowed_formats": ["xwa"]}, "cube"),
+    ({"country": ["Italy"]}, "scan"),
+    ({"player_count_min": 16}, "scan"),
+    ({"factions": ["rebelalliance"], "allowed_formats": ["xwa"]}, "scan"),
+    ({"continent": [], "city": None}, "cube"),
+])
+def test_filters_without_a_cube_dimension_fall_back_to_the_scan(monkeypatch, filters, path):
+    calls = []
+    monkeypatch.setattr(charts, "_cube_usage_history", lambda *a: calls.append("cube") or {})
+    monkeypatch.setattr(charts, "_scan_usage_history", lambda *a: calls.append("scan") or {})
+    charts.get_card_usage_history(filters, "lukeskywalker")
+    assert calls == [path]
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'charts.db'}")
+    SQLModel.metadata.create_all(engine, tables=[Tournament.__table__, PlayerStanding.__table__])
+    luke = {"faction": "rebelalliance", "pilots": [
+        {"id": "lukeskywalker", "upgrades": {"talent": ["predator"]}},
+    ]}
+    with Session(engine) as session:
+        session.add(Tournament(id=1, name="Open", date=date(2025, 1, 10), url="",
+                               source="longshanks", format="xwa"))
+        session.add(Tournament(id=2, name="Teams", date=date(2025, 2, 10), url="",
+                               source="longshanks", format="xwa", is_team_event=True))
+        # Open: two Luke lists. Teams: a member row and the team placeholder.
+        for ps_id, t_id, member in [(1, 1, False), (2, 1, False), (3, 2, True), (4, 2, False)]:
+            session.add(PlayerStanding(id=ps_id, tournament_id=t_id, player_name=f"p{ps_id}",
+                                       is_team_member=member, list_json=luke))
+        session.commit()
+    monkeypatch.setattr(charts, "read_engine", lambda: engine)
+    return engine
+
+
+def test_scan_counts_team_members_but_not_team_placeholders(sqlite_db):
+    history = charts._scan_usage_history(
+        {"allowed_formats": ["xwa"]}, "lukeskywalker", ["predator"], False, "month"
+    )
+    assert _plain(history) == {
+        "2025-01": {"lukeskywalker": 2, "predator": 2},
+        "2025-02": {"lukeskywalker": 1, "predator": 1},
+    }
+
+
+def _plain(history) -> dict:
+    return {label: {k: v for k, v in counts.items() if v} for label, counts in history.items()}
+
+
+@pytest.mark.skipif(
+    not os.getenv("DATABASE_URL", "").startswith("postgresql"),
+    reason="the card_usage cube is Postgres-only",
+)
+@pytest.mark.parametrize("filters", [
+    {},
+    {"date_start": "2024-01-01"},
+    {"allowed_formats": ["xwa"]},
+    {"sources": ["longshanks", "rollbetter"], "date_end": "2025-12-31"},
+])
+@pytest.mark.parametrize("granularity", ["week", "quarter"])
+def test_cube_and_scan_agree(filters, granularity):
+    from backend.database import engine
+
+    with engine.connect() as conn:
+        top = conn.execute(text(
+            "SELECT card_kind, card_xws FROM card_usage "
+            "GROUP BY card_kind, card_xws ORDER BY SUM(entries) DESC LIMIT 2"
+        )).fetchall()
+    if not top:
+        pytest.skip("card_usage is empty (run a scrape or refresh_rollups first)")
+    (kind, main), comparisons = top[0], [row[1] for row in top[1:]]
+    args = (filters, main, comparisons, kind == "upgrade", granularity)
+    assert _plain(charts._cube_usage_history(*args)) == _plain(charts._scan_usage_history(*args))
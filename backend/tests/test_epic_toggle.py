@@ -1,5 +1,6 @@
 from backend.data_structures.data_source import DataSource
 from backend.utils.xwing_data.pilots import load_all_pilots
+from backend.analytics.dialects import POSTGRES, SQLITE
 from backend.analytics.filter_helpers import huge_ships_exclusion_clause
 
 
@@ -44,11 +45,14 @@ def test_epic_pilots_filtering_in_catalog():
 
 
 def test_huge_ships_exclusion_clause():
-    params = {}
-    clause_off = huge_ships_exclusion_clause(include_epic=False, source=DataSource.XWA, params=params)
-    assert clause_off.startswith("NOT (")
-    assert "cr90corelliancorvette" in params.values()
-    assert "syliureclasshyperspacering" in params.values()
+    for dialect in (POSTGRES, SQLITE):
+        params = {}
+        clause_off = huge_ships_exclusion_clause(
+            include_epic=False, source=DataSource.XWA, params=params, dialect=dialect
+        )
+        assert clause_off.startswith("NOT (") and clause_off.endswith(")")
+        assert "cr90corelliancorvette" in params["epic_ships"]
+        assert "syliureclasshyperspacering" in params["epic_ships"]
 
     params_on = {}
     clause_on = huge_ships_exclusion_clause(include_epic=True, source=DataSource.XWA, params=params_on)
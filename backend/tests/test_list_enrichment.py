@@ -0,0 +1,64 @@
+import pytest
+
+from backend.api.formatters import enrich_list_data, enrich_lists_batch
+from backend.data_structures.data_source import DataSource
+from backend.utils.xwing_data import catalog
+
+PILOTS = {
+    "lukeskywalker": {
+        "name": "Luke Skywalker", "ship_xws": "t65xwing", "faction": "rebelalliance",
+        "cost": 6, "loadout": 8, "initiative": 5,
+    },
+    "wedgeantilles": {
+        "name": "Wedge Antilles", "ship_xws": "t65xwing", "faction": "rebelalliance",
+        "cost": "5", "loadout": 4, "initiative": 4,
+    },
+    # Zero cost in the catalog: the list_json points are used instead.
+    "blueescort": {"name": "Blue Escort", "ship_xws": "t65xwing", "cost": 0, "loadout": 0},
+}
+UPGRADES = {
+    "predator": {"name": "Predator", "cost": {"value": 2}, "sides": [{"slots": ["Talent"]}]},
+    "r2d2": {"name": "R2-D2", "cost": 4, "sides": [{"slots": ["Astromech"]}]},
+    "os1arsenalloadout": {"name": "Os-1", "cost": "x", "slot_category": "configuration"},
+}
+
+LISTS = [
+    {
+        "signature": "sig-1", "name": "Aces", "faction_xws": "rebelalliance", "points": "20",
+        "games": 10, "wins": 7, "win_rate": "70.0", "popularity": 3,
+        "pilots": [
+            {"id": "lukeskywalker", "points": 99,
+             "upgrades": {"talent": ["predator"], "astromech": ["r2d2-lsl"], "modification": "x"}},
+            {"id": "wedgeantilles-battleofyavin", "upgrades": {"Configuration": ["os1arsenalloadout"]}},
+        ],
+    },
+    {
+        "signature": "sig-2", "faction": "not-a-faction", "count": 2, "games": "bad",
+        "pilots": [
+            {"xws": "blueescort", "points": 3, "ship": "t65xwing",
+             "upgrades": [{"xws": "predator"}, "r2d2", {"name": "os1arsenalloadout"}, ""]},
+            {"name": "unknownpilot", "ship": "mystery", "faction": "scumandvillainy", "points": "4",
+             "upgrades": None},
+        ],
+    },
+    {"signature": "", "pilots": []},
+]
+
+
+@pytest.fixture(autouse=True)
+def _catalog(monkeypatch):
+    test_catalog = {"pilots": PILOTS, "ships": {}, "upgrades": UPGRADES}
+    monkeypatch.setitem(catalog._catalogs, DataSource.XWA, test_catalog)
+    monkeypatch.setitem(catalog._catalogs, DataSource.LEGACY, test_catalog)
+
+
+@pytest.mark.parametrize("source", [DataSource.XWA, DataSource.LEGACY])
+def test_batch_matches_validated_path(source):
+    expected = [enrich_list_data(l, source=source) for l in LISTS]
+    batch = enrich_lists_batch(LISTS, source=source)
+    assert [m.model_dump() for m in batch] == [m.model_dump() for m in expected]
+
+
+def test_batch_models_are_valid():
+    for model in enrich_lists_batch(LISTS, source=DataSource.LEGACY):
+        assert type(model).model_validate(model.model_dump()).model_dump() == model.model_dump()
@@ -0,0 +1,110 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel
+
+from backend.analytics import lists
+from backend.analytics.lists import aggregate_list_page, decode_list_cursor, encode_list_cursor
+from backend.api.lists import _compute_lists, _list_sort_key
+from backend.data_structures.data_source import DataSource
+from backend.database import engine as app_engine
+from backend.models import List, PlayerStanding, Tournament
+
+
+def test_list_cursor_round_trips_int_and_float_values():
+    for value in (0, 1234, 0.4285714285714286):
+        cursor = encode_list_cursor(value, "abc123")
+        assert decode_list_cursor(cursor) == (value, "abc123")
+
+
+def test_list_cursor_rejects_garbage():
+    with pytest.raises(ValueError):
+        decode_list_cursor("not-a-cursor")
+    with pytest.raises(ValueError):
+        decode_list_cursor(encode_list_cursor("x", "abc")[:-2] + "!!")
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    if app_engine.dialect.name != "sqlite":
+        pytest.skip("needs the SQLite analytics dialect")
+    engine = create_engine(f"sqlite:///{tmp_path / 'lists.db'}")
+    SQLModel.metadata.create_all(engine, tables=[
+        Tournament.__table__, List.__table__, PlayerStanding.__table__,
+    ])
+    with Session(engine) as session:
+        session.add(Tournament(
+            id=1, name="Open", date=date(2025, 3, 1), url="", source="longshanks", format="xwa",
+        ))
+        ps_id = 0
+        # 14 lists with many ties on games, entries, win rate and points.
+        for i in range(14):
+            list_json = {"faction": "rebelalliance", "pilots": [{"id": f"pilot{i}"}]}
+            session.add(List(
+                id=i + 1, canonical_signature=f"sig-{(i * 5) % 14:02d}", faction="Rebel Alliance",
+                faction_xws_normalized="rebelalliance", ship_list="t65xwing",
+                points=None if i % 5 == 0 else 20 - i % 3, list_json=list_json,
+            ))
+            for _ in range(1 + i % 3):
+                ps_id += 1
+                session.add(PlayerStanding(
+                    id=ps_id, tournament_id=1, player_name=f"p{ps_id}", list_id=i + 1,
+                    swiss_wins=i % 4, swiss_losses=2, list_json=list_json,
+                ))
+        session.commit()
+    monkeypatch.setattr(lists, "read_engine", lambda: engine)
+    return engine
+
+
+FILTERS = {"epic": True, "allowed_formats": ["xwa"], "sources": ["longshanks"]}
+
+
+def _expected(filters: dict, metric: str, direction: str) -> list[str]:
+    """The in-memory path's order, ties broken by signature like the SQL."""
+    rows = sorted(_compute_lists("xwa", filters), key=lambda r: r["signature"])
+    rows.sort(key=_list_sort_key(metric), reverse=direction == "desc")
+    return [r["signature"] for r in rows]
+
+
+def _walk(filters: dict, metric: str, direction: str, use_cursor: bool) -> list[str]:
+    seen, cursor, offset = [], None, 0
+    while True:
+        page, cursor = aggregate_list_page(
+            filters, DataSource.XWA, sort_metric=metric, sort_direction=direction,
+            limit=3, cursor=cursor if use_cursor else None, offset=offset,
+        )
+        seen += [row["signature"] for row in page]
+        offset += 3
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("metric", ["Games", "Win Rate", "Points Cost", "Entries"])
+@pytest.mark.parametrize("direction", ["desc", "asc"])
+@pytest.mark.parametrize("use_cursor", [True, False])
+def test_page_walk_matches_the_in_memory_path(db, metric, direction, use_cursor):
+    walked = _walk(FILTERS, metric, direction, use_cursor)
+    assert len(walked) == len(set(walked)) == 14
+    assert walked == _expected(FILTERS, metric, direction)
+
+
+def test_min_games_and_points_are_pushed_into_sql(db):
+    filters = {**FILTERS, "min_games": 5, "points_min": 19, "points_max": 20}
+    walked = _walk(filters, "Games", "desc", use_cursor=True)
+    expected = _expected({**filters}, "Games", "desc")
+    assert walked == expected
+    assert 0 < len(walked) < 14
+    assert lists.count_list_stats(filters) == len(expected)
+
+
+def test_keyset_breaks_ties_by_signature(db):
+    # Four lists have three entries each: the first page boundary falls
+    # inside that run of equal sort values.
+    first, cursor = aggregate_list_page(FILTERS, sort_metric="Entries", limit=3)
+    assert [r["entries"] for r in first] == [3, 3, 3]
+    second, _ = aggregate_list_page(FILTERS, sort_metric="Entries", limit=3, cursor=cursor)
+    assert second[0]["entries"] == 3
+    assert first[-1]["signature"] < second[0]["signature"]
+    tied = [r["signature"] for r in first + second if r["entries"] == 3]
+    assert tied == sorted(tied)
@@ -0,0 +1,104 @@
+import os
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from backend.analytics import factions
+from backend.database import QueryScope, _query_scope
+
+
+def _tasks(slow_part: str, failing_part: str):
+    def ok(value):
+        return lambda: value
+
+    def slow():
+        time.sleep(1.0)
+        return ["late"]
+
+    def boom():
+        raise RuntimeError("db down")
+
+    tasks = {name: ok([name]) for name in ("factions", "ships", "lists", "pilots", "upgrades")}
+    tasks["totals"] = ok((3, 42))
+    tasks[slow_part] = slow
+    tasks[failing_part] = boom
+    return tasks
+
+
+def test_parallel_snapshot_isolates_failures_and_timeouts(monkeypatch):
+    monkeypatch.setattr(factions, "META_SNAPSHOT_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(
+        factions, "_snapshot_tasks", lambda filters, ds: _tasks("pilots", "ships")
+    )
+
+    result = factions._parallel_snapshot({}, factions.DataSource.XWA)
+
+    assert sorted(result["degraded"]) == ["pilots", "ships"]
+    assert result["pilots"] == [] and result["ships"] == []
+    assert result["factions"] == ["factions"]
+    assert result["upgrades"] == ["upgrades"]
+    assert (result["total_tournaments"], result["total_players"]) == (3, 42)
+
+
+def test_sequential_snapshot_reports_failed_totals_as_degraded(monkeypatch):
+    monkeypatch.setattr(
+        factions, "_snapshot_tasks", lambda filters, ds: _tasks("pilots", "totals")
+    )
+
+    result = factions._sequential_snapshot({}, factions.DataSource.XWA)
+
+    assert result["degraded"] == ["totals"]
+    assert (result["total_tournaments"], result["total_players"]) == (0, 0)
+    assert result["factions"] == ["factions"]
+
+
+def test_parallel_parts_run_in_the_callers_query_scope(monkeypatch):
+    tasks = {name: (lambda: _query_scope.get()) for name in factions._SNAPSHOT_FALLBACKS}
+    tasks["totals"] = lambda: (0, 0) if _query_scope.get() is scope else (-1, -1)
+    monkeypatch.setattr(factions, "_snapshot_tasks", lambda filters, ds: tasks)
+
+    with QueryScope("snapshot") as scope:
+        result = factions._parallel_snapshot({}, factions.DataSource.XWA)
+
+    assert result["degraded"] == []
+    assert all(result[name] is scope for name in ("factions", "ships", "lists", "pilots", "upgrades"))
+    assert result["total_tournaments"] == 0
+
+
+def _keyed(rows: list[dict], key: str, fields: tuple[str, ...]) -> dict:
+    return {row[key]: tuple(row[f] for f in fields) for row in rows}
+
+
+@pytest.mark.skipif(
+    not os.getenv("DATABASE_URL", "").startswith("postgresql"),
+    reason="the single-pass snapshot is Postgres-only",
+)
+@pytest.mark.parametrize("epic", [False, True])
+def test_single_pass_matches_the_sequential_snapshot(epic):
+    from backend.analytics.snapshot import compute_meta_snapshot
+
+    filters = {
+        "date_start": (date.today() - timedelta(days=90)).isoformat(),
+        "include_epic": epic,
+        "epic": epic,
+        "allowed_formats": ["xwa"],
+    }
+    single = compute_meta_snapshot(filters, factions.DataSource.XWA)
+    sequential = factions._sequential_snapshot(filters, factions.DataSource.XWA)
+
+    assert sequential["degraded"] == []
+    for total in ("total_tournaments", "total_players"):
+        assert single[total] == sequential[total]
+    faction_fields = ("games_count", "list_count", "wins", "different_lists_count")
+    assert _keyed(single["factions"], "xws", faction_fields) == \
+        _keyed(sequential["factions"], "xws", faction_fields)
+    ship_fields = ("games_count", "wins", "entries_count", "different_lists_count", "squadron_count")
+    assert _keyed(single["ships"], "xws", ship_fields) == \
+        _keyed(sequential["ships"], "xws", ship_fields)
+    assert _keyed(single["lists"], "signature", ("games", "wins", "entries")) == \
+        _keyed(sequential["lists"], "signature", ("games", "wins", "entries"))
+    card_fields = ("games_count", "wins", "entries_count", "different_lists_count")
+    for part in ("pilots", "upgrades"):
+        assert _keyed(single[part], "xws", card_fields) == \
+            _keyed(sequential[part], "xws", card_fields)
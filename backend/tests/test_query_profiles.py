@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+from backend import cache
+from backend.database import QueryScope, is_query_canceled
+from backend.main import on_database_error
+
+_SLOW_SQL = text("""
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n)
+    SELECT count(*) FROM n
+""")
+
+
+def test_cancel_interrupts_the_running_statement(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'q.db'}")
+    scope = QueryScope("aggregate")
+    errors = []
+
+    def run():
+        with scope, engine.begin() as conn:
+            try:
+                conn.execute(_SLOW_SQL)
+            except OperationalError as e:
+                errors.append(e)
+
+    worker = threading.Thread(target=run)
+    worker.start()
+    deadline = time.monotonic() + 5
+    while not scope._connections and time.monotonic() < deadline:
+        time.sleep(0.01)
+    scope.cancel()
+    worker.join(timeout=5)
+
+    assert not worker.is_alive()
+    assert errors and "interrupted" in str(errors[0])
+    assert not scope._connections
+
+
+def test_abandoned_computation_is_retried_by_a_follower():
+    cache.invalidate_cache()
+    leader_started = threading.Event()
+    results = []
+
+    def abandoned():
+        leader_started.set()
+        time.sleep(0.1)
+        raise cache.ComputeAbandoned("k")
+
+    def leader():
+        with pytest.raises(cache.ComputeAbandoned):
+            cache.get_cached_or_compute("abandoned|k", abandoned)
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    leader_started.wait()
+    results.append(cache.get_cached_or_compute("abandoned|k", lambda: "recomputed"))
+    thread.join()
+    assert results == ["recomputed"]
+
+
+class _Canceled(Exception):
+    pgcode = "57014"
+
+
+def test_statement_timeout_becomes_a_503():
+    app = FastAPI()
+    app.add_exception_handler(DBAPIError, on_database_error)
+
+    @app.get("/slow")
+    def slow():
+        raise OperationalError("SELECT ...", {}, _Canceled("canceling statement due to statement timeout"))
+
+    response = TestClient(app).get("/slow")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    assert response.json()["code"] == "query_timeout"
+    assert is_query_canceled(OperationalError("x", {}, _Canceled()))
+    assert not is_query_canceled(OperationalError("x", {}, Exception()))
+
+
+def test_other_database_errors_become_a_plain_500(caplog):
+    app = FastAPI()
+    app.add_exception_handler(DBAPIError, on_database_error)
+
+    @app.get("/broken")
+    def broken():
+        raise OperationalError("SELECT ...", {}, Exception("relation does not exist"))
+
+    response = TestClient(app, raise_server_exceptions=False).get("/broken")
+    assert response.status_code == 500
+    assert response.text == "Internal Server Error"
+    assert any(record.exc_info for record in caplog.records)
@@ -0,0 +1,105 @@
+import asyncio
+import sys
+import time
+import types
+
+from backend import cache, database
+
+
+def _replica(tmp_path, name):
+    return database._Replica(f"sqlite:///{tmp_path / name}")
+
+
+def test_read_engine_round_robins_over_healthy_replicas(tmp_path, monkeypatch):
+    a, b = _replica(tmp_path, "a.db"), _replica(tmp_path, "b.db")
+    monkeypatch.setattr(database, "_replicas", [a, b])
+    engines = {database.read_engine() for _ in range(4)}
+    assert engines == {a.engine, b.engine}
+    assert [r["healthy"] for r in database.replica_status()] == [True, True]
+
+
+def test_read_engine_falls_back_to_primary(tmp_path, monkeypatch):
+    down = database._Replica(f"sqlite:///{tmp_path / 'missing' / 'x.db'}")
+    monkeypatch.setattr(database, "_replicas", [down])
+    assert database.read_engine() is database.engine
+    assert database.replica_status()[0]["healthy"] is False
+
+    # Not re-probed before REPLICA_CHECK_INTERVAL, then back in rotation.
+    (tmp_path / "missing").mkdir()
+    assert database.read_engine() is database.engine
+    down.checked_at = 0.0
+    assert database.read_engine() is down.engine
+
+
+def test_run_db_worker_path_reads_from_a_replica(tmp_path, monkeypatch):
+    replica = _replica(tmp_path, "a.db")
+    monkeypatch.setattr(database, "_replicas", [replica])
+    monkeypatch.setattr(database, "async_engine", None)
+    bind = asyncio.run(database.run_db(lambda session: session.get_bind()))
+    assert bind is replica.engine
+
+
+def test_run_db_async_path_reads_from_a_replica(tmp_path, monkeypatch):
+    binds = []
+
+    class FakeAsyncSession:
+        def __init__(self, bind):
+            binds.append(bind)
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def run_sync(self, fn, *args):
+            return fn(self, *args)
+
+    monkeypatch.setitem(
+        sys.modules,
+        "sqlmodel.ext.asyncio.session",
+        types.SimpleNamespace(AsyncSession=FakeAsyncSession),
+    )
+    replica = _replica(tmp_path, "a.db")
+    replica.async_engine = "replica async engine"
+    monkeypatch.setattr(database, "_replicas", [replica])
+    monkeypatch.setattr(database, "async_engine", "primary async engine")
+
+    assert asyncio.run(database.run_db(lambda session, x: x, 7)) == 7
+    replica.healthy = False
+    replica.checked_at = time.monotonic()
+    asyncio.run(database.run_db(lambda session: None))
+    assert binds == ["replica async engine", "primary async engine"]
+
+
+def test_version_change_waits_for_replicas(monkeypatch):
+    caught_up = {"value": False}
+    monkeypatch.setattr(database, "REPLICA_LAG_AWARE", True)
+    monkeypatch.setattr(database, "replicas_have_version", lambda v: caught_up["value"])
+    monkeypatch.setattr(cache, "_get_db_version", lambda: "v2")
+    monkeypatch.setattr(cache, "_cached_version", "v1")
+    monkeypatch.setattr(cache, "_last_version_check", 0.0)
+    cache._cache["k"] = 1
+
+    assert cache._check_version() is False
+    assert cache._cache["k"] == 1
+
+    caught_up["value"] = True
+    cache._last_version_check = 0.0
+    assert cache._check_version() is True
+    assert "k" not in cache._cache
+
+
+def test_replica_probe_runs_outside_the_cache_lock(monkeypatch):
+    locked = []
+    monkeypatch.setattr(database, "REPLICA_LAG_AWARE", True)
+    monkeypatch.setattr(
+        database, "replicas_have_version", lambda v: locked.append(cache._lock.locked()) or True
+    )
+    monkeypatch.setattr(cache, "_get_db_version", lambda: "v3")
+    monkeypatch.setattr(cache, "_cached_version", "v2")
+    monkeypatch.setattr(cache, "_last_version_check", 0.0)
+
+    assert cache._check_version() is True
+    assert locked == [False]
+    assert cache._cached_version == "v3"
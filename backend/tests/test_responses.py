@@ -0,0 +1,68 @@
+import json
+from datetime import date
+
+from fastapi.encoders import jsonable_encoder
+
+from backend.api.responses import RawJSON, encode_json, iter_json, json_response
+from backend.api.schemas import ListData, PilotData, TournamentDetailResponse, TournamentData
+from backend.data_structures.formats import Format
+from backend.data_structures.source import Source
+
+
+def _default_encoding(content):
+    """What FastAPI's default path sends: jsonable_encoder + json.dumps."""
+    return json.loads(json.dumps(jsonable_encoder(content)))
+
+
+def _list(i: int) -> ListData:
+    return ListData(
+        signature=f"sig-{i}", points=20, original_points=20, wins=1, games=2,
+        pilots=[PilotData(xws="lukeskywalker", cost=6)],
+    )
+
+
+def test_encode_json_matches_jsonable_encoder():
+    payload = {"lists": [_list(1), _list(2)], "day": date(2024, 5, 1), "n": {1: "a"}, "f": 0.5}
+    assert json.loads(encode_json(payload)) == _default_encoding(payload)
+    model = _list(3)
+    assert json.loads(encode_json(model)) == _default_encoding(model)
+
+
+def test_iter_json_chunks_long_lists():
+    detail = TournamentDetailResponse(
+        tournament=TournamentData(
+            id=1, name="Open", date="2024-05-01", players=0, format=Format.UNKNOWN,
+            source=Source.UNKNOWN, location="", url="",
+        ),
+        players_swiss=[], players_cut=[], matches=[],
+    )
+    body = b"".join(iter_json(detail, chunk_items=2))
+    assert json.loads(body) == detail.model_dump(mode="json")
+
+    payload = {"items": [_list(i) for i in range(5)], "total": 5}
+    chunks = list(iter_json(payload, chunk_items=2))
+    assert len(chunks) > 4
+    assert json.loads(b"".join(chunks)) == _default_encoding(payload)
+
+
+def test_iter_json_splices_raw_json():
+    list_json = '{"faction": "rebelalliance", "pilots": [{"id": "lukeskywalker"}]}'
+    players = [
+        {"id": i, "list_json": RawJSON(list_json.encode()) if i % 2 else None, "rank": i}
+        for i in range(5)
+    ]
+    payload = {"tournament": _list(0), "players": players, "raw": RawJSON(b"[1, 2]")}
+    body = b"".join(iter_json(payload, chunk_items=2))
+    assert list_json.encode() in body
+    decoded = json.loads(body)
+    assert decoded["raw"] == [1, 2]
+    assert decoded["players"][1] == {"id": 1, "list_json": json.loads(list_json), "rank": 1}
+    assert decoded["players"][0] == {"id": 0, "list_json": None, "rank": 0}
+    assert decoded["tournament"] == _default_encoding(_list(0))
+
+
+def test_json_response_reports_serialization_time():
+    response = json_response({"ok": True})
+    assert response.body == b'{"ok":true}'
+    assert response.headers["Server-Timing"].startswith("serialize;")
+    assert response.media_type == "application/json"
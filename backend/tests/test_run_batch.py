@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects.postgresql.psycopg import PGDialect_psycopg
+from sqlmodel import Session, SQLModel
+
+from backend.database import _compiled, run_batch
+from backend.models import ScrapeMeta
+
+
+def test_run_batch_returns_rows_per_statement(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'b.db'}")
+    SQLModel.metadata.create_all(engine, tables=[ScrapeMeta.__table__])
+    with Session(engine) as session:
+        session.add_all(ScrapeMeta(key=f"k{i}", value=str(i)) for i in range(3))
+        session.commit()
+
+        values, missing, count = run_batch(session, [
+            (text("SELECT key, value FROM scrapemeta ORDER BY key"), None),
+            (text("SELECT value FROM scrapemeta WHERE key = :key"), {"key": "nope"}),
+            (text("SELECT COUNT(*) AS n FROM scrapemeta WHERE key >= :lo"), {"lo": "k1"}),
+        ])
+    assert [(r.key, r.value) for r in values] == [("k0", "0"), ("k1", "1"), ("k2", "2")]
+    assert missing == []
+    assert count[0].n == 2
+
+
+def test_compiled_statements_use_driver_placeholders():
+    conn = SimpleNamespace(dialect=PGDialect_psycopg())
+    [(sql, params)] = _compiled(conn, [
+        (text("SELECT id FROM list WHERE id = ANY(:ids) AND faction = :f"), {"ids": [1, 2], "f": "x"}),
+    ])
+    assert sql == "SELECT id FROM list WHERE id = ANY(%(ids)s) AND faction = %(f)s"
+    assert params == {"ids": [1, 2], "f": "x"}
@@ -0,0 +1,56 @@
+from backend import cache
+from backend.api.cards import _card_sort_key
+from backend.cache import discard, get_cached_or_compute, get_sorted_permutation
+
+
+def _rows():
+    return [
+        {"xws": "b", "games_count": 10, "wins": 5, "list_count": 3},
+        {"xws": "a", "games_count": 10, "wins": 9, "list_count": 3},
+        {"xws": "c", "games_count": 0, "wins": 0, "list_count": 7},
+        {"xws": "d", "games_count": 4, "wins": 1, "list_count": 3},
+    ]
+
+
+def test_permutation_matches_sorted_including_ties():
+    key = "test_perm|all"
+    discard(key)
+    data = get_cached_or_compute(key, _rows)
+    for metric in ("Games", "Win Rate", "Name", "Lists", "Cost"):
+        for direction in ("asc", "desc"):
+            order = get_sorted_permutation(
+                key, (metric, direction), data, _card_sort_key(metric), direction == "desc"
+            )
+            expected = sorted(data, key=_card_sort_key(metric), reverse=direction == "desc")
+            assert [data[i] for i in order] == expected
+
+
+def test_orders_live_beside_the_aggregate_not_in_the_cache():
+    key = "test_perm|owned"
+    discard(key)
+    data = get_cached_or_compute(key, _rows)
+    entries = len(cache._cache)
+    first = get_sorted_permutation(key, ("Games", "desc"), data, _card_sort_key("Games"), True)
+    get_sorted_permutation(key, ("Name", "asc"), data, _card_sort_key("Name"))
+    assert len(cache._cache) == entries
+    assert get_sorted_permutation(key, ("Games", "desc"), data, _card_sort_key("Games"), True) is first
+
+    discard(key)
+    assert key not in cache._orders
+
+
+def test_permutation_is_recomputed_for_a_new_aggregate():
+    key = "test_perm|stale"
+    discard(key)
+    first = get_cached_or_compute(key, _rows)
+    get_sorted_permutation(key, ("Games", "desc"), first, _card_sort_key("Games"), True)
+    second = first[:2]
+    order = get_sorted_permutation(key, ("Games", "desc"), second, _card_sort_key("Games"), True)
+    assert sorted(order) == [0, 1]
+
+
+def test_orders_of_uncached_aggregates_are_not_kept():
+    key = "test_perm|uncached"
+    discard(key)
+    get_sorted_permutation(key, ("Games", "desc"), _rows(), _card_sort_key("Games"), True)
+    assert key not in cache._orders
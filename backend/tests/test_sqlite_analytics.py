@@ -0,0 +1,157 @@
+from datetime import date
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlmodel import Session, SQLModel
+
+from backend import database
+from backend.analytics import core, lists, ships, squadrons
+from backend.api.tournaments import router as tournaments_router
+from backend.analytics.dialects import SQLITE, prepare_embedded_db, sql_dialect
+from backend.data_structures.data_source import DataSource
+from backend.database import engine as app_engine
+from backend.models import List, Match, PlayerStanding, Tournament
+
+pytestmark = pytest.mark.skipif(
+    app_engine.dialect.name != "sqlite", reason="needs the SQLite analytics dialect"
+)
+
+
+def _pilot(xws: str, ship: str, upgrades) -> dict:
+    return {"id": xws, "ship": ship, "points": 5, "upgrades": upgrades}
+
+
+LISTS = {
+    "sig-a": ("Rebel Alliance", "t65xwing,t65xwing", [
+        _pilot("lukeskywalker", "t65xwing", {"talent": ["predator"], "astromech": ["r2d2"]}),
+        _pilot("wedgeantilles", "t65xwing", {"talent": ["predator"]}),
+    ]),
+    "sig-b": ("Galactic Empire", "tielnfighter", [
+        _pilot("blackprincess", "tielnfighter", ["predator"]),
+    ]),
+}
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'analytics.db'}")
+    SQLModel.metadata.create_all(engine, tables=[
+        Tournament.__table__, List.__table__, PlayerStanding.__table__,
+    ])
+    with Session(engine) as session:
+        session.add(Tournament(
+            id=1, name="Open", date=date(2025, 3, 1), url="", source="longshanks", format="xwa",
+        ))
+        list_jsons = {}
+        for list_id, (sig, (faction, ship_list, pilots)) in enumerate(LISTS.items(), start=1):
+            list_jsons[list_id] = {"faction": faction, "pilots": pilots}
+            session.add(List(
+                id=list_id, canonical_signature=sig, faction=faction,
+                faction_xws_normalized=faction.lower().replace(" ", ""), ship_list=ship_list,
+                points=20, list_json=list_jsons[list_id],
+            ))
+        for ps_id, (list_id, wins, losses) in enumerate([(1, 3, 1), (1, 2, 2), (2, 1, 3)], start=1):
+            session.add(PlayerStanding(
+                id=ps_id, tournament_id=1, player_name=f"p{ps_id}", swiss_wins=wins,
+                swiss_losses=losses, list_id=list_id,
+                list_json=list_jsons[list_id],
+            ))
+        session.commit()
+    prepare_embedded_db(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM pilot_ship_mapping"))
+        conn.execute(text(
+            "INSERT INTO pilot_ship_mapping (pilot_xws, source, ship_xws) VALUES "
+            "('lukeskywalker', 'xwa', 't65xwing'), ('wedgeantilles', 'xwa', 't65xwing'), "
+            "('blackprincess', 'xwa', 'tielnfighter')"
+        ))
+    for module in (core, lists, ships, squadrons):
+        monkeypatch.setattr(module, "read_engine", lambda: engine)
+    return engine
+
+
+FILTERS = {"epic": True, "allowed_formats": ["xwa"], "sources": ["longshanks"]}
+
+
+def test_dialect_follows_engine():
+    assert sql_dialect() is SQLITE
+
+
+def test_lists_on_sqlite(db):
+    rows = lists.aggregate_list_stats(FILTERS, DataSource.XWA)
+    assert [(r["signature"], r["games"], r["wins"], r["entries"]) for r in rows] == [
+        ("sig-a", 8, 5, 2), ("sig-b", 4, 1, 1),
+    ]
+    page, cursor = lists.aggregate_list_page(
+        {**FILTERS, "ships": ["t65xwing"]}, DataSource.XWA, sort_metric="Win Rate", limit=1,
+    )
+    assert [r["signature"] for r in page] == ["sig-a"] and cursor is None
+    assert lists.count_list_stats({**FILTERS, "factions": ["Galactic Empire"]}) == 1
+    pilots = lists.fetch_list_pilots(["sig-b"])["sig-b"]
+    assert [p["xws"] for p in pilots] == ["blackprincess"]
+
+
+def test_squadrons_and_ships_on_sqlite(db):
+    rows = squadrons.aggregate_squadron_stats({**FILTERS, "ships": ["t65xwing"]})
+    assert [(r["ships"], r["games"]) for r in rows] == [(["t65xwing", "t65xwing"], 8)]
+
+    by_ship = {r["xws"]: r for r in ships.aggregate_ship_stats(FILTERS)}
+    # One row per pilot element, as on Postgres: two X-wings in sig-a.
+    assert by_ship["t65xwing"]["games_count"] == 16
+    assert by_ship["t65xwing"]["factions"] == ["Rebel Alliance"]
+    assert by_ship["tielnfighter"]["entries_count"] == 1
+
+
+def test_cards_on_sqlite(db, monkeypatch):
+    def catalog(filters, mode, data_source):
+        ids = ["lukeskywalker", "blackprincess"] if mode == "pilots" else ["predator", "r2d2"]
+        return {xws: {"xws": xws, "games_count": 0, "list_count": 0, "different_lists_count": 0,
+                      "entries_count": 0, "squadron_count": 0, "wins": 0} for xws in ids}
+
+    monkeypatch.setattr(core, "filter_card_catalog", catalog)
+    pilots = {r["xws"]: r for r in core.aggregate_card_stats(FILTERS, mode="pilots")}
+    assert pilots["lukeskywalker"]["games_count"] == 8
+    assert pilots["blackprincess"]["wins"] == 1
+
+    upgrades = {r["xws"]: r for r in core.aggregate_card_stats(FILTERS, mode="upgrades")}
+    assert upgrades["predator"]["different_lists_count"] == 2
+    assert upgrades["r2d2"]["entries_count"] == 2
+
+    only_r2 = core.aggregate_card_stats({**FILTERS, "upgrade_id": "r2d2"}, mode="pilots")
+    assert {r["xws"]: r["entries_count"] for r in only_r2} == {"lukeskywalker": 2, "blackprincess": 0}
+
+    tie_lists = core.aggregate_card_stats({**FILTERS, "ships": ["tielnfighter"]}, mode="pilots")
+    assert {r["xws"]: r["games_count"] for r in tie_lists} == {"blackprincess": 4, "lukeskywalker": 0}
+
+
+def test_tournament_detail_on_sqlite(db, monkeypatch):
+    SQLModel.metadata.create_all(db, tables=[Match.__table__])
+    with Session(db) as session:
+        session.add(PlayerStanding(
+            id=4, tournament_id=1, player_name="p4", swiss_rank=4, cut_rank=None,
+            list_json={"faction": "Scum and Villainy", "pilots": []},
+        ))
+        session.add(Match(
+            tournament_id=1, round_number=1, round_type="swiss", player1_id=1, player2_id=3,
+            player1_score=200, player2_score=120, winner_id=1,
+        ))
+        session.commit()
+    monkeypatch.setattr(database, "read_engine", lambda: db)
+    monkeypatch.setattr(database, "async_engine", None)
+    app = FastAPI()
+    app.include_router(tournaments_router)
+
+    body = TestClient(app).get("/api/tournaments/1").json()
+    assert body["tournament"]["date"] == "2025-03-01"
+    assert body["tournament"]["players"] == 4
+    players = {p["name"]: p for p in body["players_swiss"]}
+    assert players["p1"]["faction"] == "rebelalliance"
+    assert players["p1"]["list_json"]["pilots"][0]["id"] == "lukeskywalker"
+    # Faction from list_json without a list row; no pilots, no list_json.
+    assert players["p4"]["faction"] == "scumandvillainy"
+    assert players["p4"].get("list_json") is None
+    assert body["matches"][0]["player1"] == "p1"
+    assert body["matches"][0]["player2"] == "p3"
+    assert TestClient(app).get("/api/tournaments/99").status_code == 404
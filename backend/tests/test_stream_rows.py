@@ -0,0 +1,23 @@
+from sqlalchemy import create_engine, text
+from sqlmodel import Session, SQLModel, select
+
+from backend.database import stream_rows
+from backend.models import ScrapeMeta
+
+
+def test_stream_rows_yields_every_row_in_batches(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 's.db'}")
+    SQLModel.metadata.create_all(engine, tables=[ScrapeMeta.__table__])
+    with Session(engine) as session:
+        session.add_all(ScrapeMeta(key=f"k{i:02d}", value=str(i)) for i in range(25))
+        session.commit()
+
+        rows = stream_rows(session, text("SELECT value FROM scrapemeta ORDER BY key"), batch_size=10)
+        assert [int(r[0]) for r in rows] == list(range(25))
+
+        query = select(ScrapeMeta).where(ScrapeMeta.key >= "k20").order_by(ScrapeMeta.key)
+        assert [m.value for (m,) in stream_rows(session, query, batch_size=2)] == ["20", "21", "22", "23", "24"]
+
+    with engine.connect() as conn:
+        rows = stream_rows(conn, text("SELECT key FROM scrapemeta WHERE key >= :lo"), {"lo": "k05"})
+        assert sum(1 for _ in rows) == 20
@@ -0,0 +1,72 @@
+import pytest
+
+from backend.analytics import filter_helpers
+from backend.analytics.dialects import POSTGRES, SQLITE
+from backend.analytics.filter_helpers import WhereBuilder, ship_list_filter_clause
+from backend.analytics.lists import _list_where_sql
+from backend.data_structures.data_source import DataSource
+
+
+@pytest.fixture(autouse=True)
+def _postgres(monkeypatch):
+    # The array-parameter shape is what these tests check.
+    monkeypatch.setattr(filter_helpers, "sql_dialect", lambda: POSTGRES)
+
+
+def _where(filters: dict) -> tuple[str, dict]:
+    params: dict = {}
+    return _list_where_sql({"epic": True, **filters}, DataSource.XWA, params), params
+
+
+def test_statement_text_does_not_depend_on_values():
+    one_ship, p1 = _where({"ships": ["t65xwing"], "date_start": "2025-01-01"})
+    three_ships, p3 = _where({
+        "ships": ["t65xwing", "rz1awing", "btla4ywing"],
+        "date_start": "2025-06-01",
+    })
+    assert one_ship == three_ships
+    assert p1["ship_list"] == ["t65xwing"]
+    assert p3["ship_list"] == ["t65xwing", "rz1awing", "btla4ywing"]
+    assert p3["date_start"] == "2025-06-01"
+
+
+def test_list_filters_bind_one_array_each():
+    sql, params = _where({
+        "factions": ["Rebel Alliance", "Galactic Empire"],
+        "sources": "longshanks",
+        "allowed_formats": ["xwa", "amg"],
+    })
+    assert params["factions"] == ["rebelalliance", "galacticempire"]
+    assert params["sources"] == ["longshanks"]
+    assert params["formats"] == ["xwa", "amg"]
+    assert sql.count(":factions") == 1
+    assert sql.count(":formats") == 1
+
+
+def test_ship_filter_modes():
+    params: dict = {}
+    assert "@>" in ship_list_filter_clause(["a", "b", "a"], params, mode="all", dialect=POSTGRES)
+    assert params["ship_list"] == ["a", "b"]
+    assert "&&" in ship_list_filter_clause(["a"], {}, mode="any", dialect=POSTGRES)
+    assert ship_list_filter_clause([], {}) == ""
+    assert ship_list_filter_clause(["a"], {}, mode="all", dialect=SQLITE).startswith("NOT EXISTS")
+
+
+def test_list_filters_follow_the_dialect():
+    pg = WhereBuilder(dialect=POSTGRES)
+    pg.faction_filter(["Rebel Alliance"])
+    assert pg.sql() == "l.faction_xws_normalized = ANY(:factions)"
+    lite = WhereBuilder(dialect=SQLITE)
+    lite.faction_filter(["Rebel Alliance"])
+    assert lite.sql() == "l.faction_xws_normalized IN (SELECT value FROM json_each(:factions))"
+    assert pg.params == {"factions": ["rebelalliance"]}
+    assert lite.params == {"factions": '["rebelalliance"]'}
+
+
+def test_builder_defaults_and_order():
+    where = WhereBuilder("p->>'id' IS NOT NULL", params={"source": "xwa"})
+    assert WhereBuilder().sql() == "1=1"
+    where.add("")
+    where.team_rule()
+    assert where.sql() == "p->>'id' IS NOT NULL AND (NOT t.is_team_event OR ps.is_team_member)"
+    assert where.params == {"source": "xwa"}
@@ -0,0 +1,63 @@
+import pytest
+
+from backend.utils.xwing_data.aliases import PACK_SUFFIXES, AliasIndex, strip_pack_suffixes
+
+
+def _legacy_lookup(records, xws_id):
+    """The resolution get_pilot_info/get_upgrade_info used to run per call."""
+    if xws_id in records:
+        return records[xws_id]
+    clean_id = xws_id
+    for suf in PACK_SUFFIXES:
+        if clean_id.endswith(suf):
+            clean_id = clean_id[:-len(suf)]
+    if clean_id in records:
+        return {**records[clean_id], "xws": xws_id}
+    return None
+
+
+RECORDS = {
+    "predator": {"name": "Predator", "sides": [{"slots": ["Talent"]}], "slot_category": "talent"},
+    "hansolo": {"name": "Han Solo", "sides": [], "slot_category": "crew"},
+    # A canonical id that itself looks like a variant.
+    "longshot-evacuationofdqar": {"name": "Longshot (Dqar)", "slot_category": "pilot"},
+    "longshot": {"name": "Longshot", "slot_category": "pilot"},
+}
+
+
+@pytest.mark.parametrize("xws_id", [
+    "predator",
+    "predator-lsl",
+    "hansolo-battleofyavin",
+    "hansolo-lsl-battleofyavin",
+    "hansolo-battleofyavin-lsl",
+    "longshot-evacuationofdqar",
+    "longshot-evacuationofdqar-lsl",
+    "longshot-lsl",
+    "unknown-lsl",
+    "",
+])
+def test_alias_index_matches_suffix_stripping(xws_id):
+    index = AliasIndex(RECORDS, with_slots=True)
+    expected = _legacy_lookup(RECORDS, xws_id)
+    got = index.get(xws_id)
+    assert (dict(got) if got is not None else None) == expected
+
+
+def test_records_are_shared_and_read_only():
+    index = AliasIndex(RECORDS, with_slots=True)
+    record = index.get("predator-battleofyavin")
+    assert record is index.get("predator-battleofyavin")
+    with pytest.raises(TypeError):
+        record["name"] = "x"
+
+
+def test_precomputed_slots():
+    index = AliasIndex(RECORDS, with_slots=True)
+    assert index.slot("predator-lsl") == "Talent"
+    assert index.slot("hansolo") == "crew"
+    assert index.slot("hansolo-lsl-battleofyavin") == "crew"
+    assert index.slot("nothing") == "unknown"
+    # Suffixes are stripped in PACK_SUFFIXES order, each at most once.
+    assert strip_pack_suffixes("x-lsl-battleofyavin") == "x"
+    assert strip_pack_suffixes("x-battleofyavin-lsl") == "x-battleofyavin"
@@ -3,7 +3,7 @@ Location utility functions.
 """
 from sqlmodel import Session, select, func
 from sqlalchemy import distinct, cast, String
-from ..database import engine
+from ..database import read_engine
 from ..models import Tournament
 from ..data_structures.location import Location
 
@@ -18,7 +18,7 @@ def get_all_locations() -> dict[str, dict[str, list[str]]]:
             }
         }
     """
-    with Session(engine) as session:
+    with Session(read_engine()) as session:
         # Fetch all non-null locations
         # We fetch the whole object and process in Python for simplicity and DB-agnosticism
         # (SQLite JSON support varies by version/compilation)
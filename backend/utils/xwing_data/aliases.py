@@ -0,0 +1,132 @@
+"""
+XWS alias index: variant pilot/upgrade IDs resolved once per catalog.
+
+Lists often carry pack/variant IDs ("lukeskywalker-battleofyavin") that
+are not catalog keys. Resolution strips the known PACK_SUFFIXES (in list
+order, each at most once) and looks the result up again; the resolved
+record is the canonical one with "xws" set to the variant ID.
+
+AliasIndex does that work when the catalog is loaded: every canonical ID
+and every single-suffix variant that resolves to it map to a shared,
+read-only record (MappingProxyType), so lookups are one dict hit and no
+per-call copies. Rarer multi-suffix variants are resolved on first sight
+and then memoized. For upgrades the primary slot is precomputed as well.
+
+Over a shared, memory-mapped catalog (CATALOG_SHARED, see catalog.py)
+holding every record would defeat the point, so the index keeps only
+alias → canonical ID (and the slots) and resolves records per lookup.
+"""
+from types import MappingProxyType
+from typing import Mapping
+
+from ...data_structures.data_source import DataSource
+from .catalog import MappedCatalog, load_catalog
+
+PACK_SUFFIXES = [
+    "-armedanddangerous",
+    "-evacuationofdqar",
+    "-battleoverendor",
+    "-battleofyavin",
+    "-siegeofcoruscant",
+    "-alphastrike",
+    "-lsl",
+]
+
+
+def strip_pack_suffixes(xws_id: str) -> str:
+    """Remove pack/variant suffixes, in PACK_SUFFIXES order."""
+    clean_id = xws_id
+    for suf in PACK_SUFFIXES:
+        if clean_id.endswith(suf):
+            clean_id = clean_id[:-len(suf)]
+    return clean_id
+
+
+def primary_slot(upgrade: Mapping) -> str:
+    """First slot of the first side, else the slot category of the file."""
+    sides = upgrade.get("sides", [])
+    if sides and len(sides) > 0:
+        slots = sides[0].get("slots", [])
+        if slots:
+            return slots[0]
+    return upgrade.get("slot_category", "unknown")
+
+
+class AliasIndex:
+    """alias → read-only record for one pilot or upgrade catalog."""
+
+    def __init__(self, records: Mapping, with_slots: bool = False):
+        self._canonical = records
+        self._with_slots = with_slots
+        self._lazy = isinstance(records, MappedCatalog)
+        self._records: dict[str, Mapping] = {}
+        self._aliases: dict[str, str] = {}
+        if not self._lazy:
+            self._records = {xws: MappingProxyType(rec) for xws, rec in records.items()}
+        for canonical in records:
+            for suf in PACK_SUFFIXES:
+                alias = canonical + suf
+                if alias not in records and strip_pack_suffixes(alias) == canonical:
+                    if self._lazy:
+                        self._aliases[alias] = canonical
+                    else:
+                        self._records[alias] = MappingProxyType({**records[canonical], "xws": alias})
+        self._slots: dict[str, str] = {}
+        if with_slots and self._lazy:
+            self._slots = {xws: primary_slot(rec) for xws, rec in records.items()}
+            self._slots.update(
+                (alias, self._slots[canonical]) for alias, canonical in self._aliases.items()
+            )
+        elif with_slots:
+            self._slots = {xws: primary_slot(rec) for xws, rec in self._records.items()}
+
+    def get(self, xws_id) -> Mapping | None:
+        record = self._records.get(xws_id)
+        if record is not None or not isinstance(xws_id, str):
+            return record
+        if self._lazy:
+            return self._resolve(xws_id)
+        base = self._canonical.get(strip_pack_suffixes(xws_id))
+        if base is None:
+            return None
+        # Multi-suffix variant: resolve once, then serve from the index.
+        record = MappingProxyType({**base, "xws": xws_id})
+        self._records[xws_id] = record
+        if self._with_slots:
+            self._slots[xws_id] = primary_slot(record)
+        return record
+
+    def _resolve(self, xws_id: str) -> Mapping | None:
+        """Lookup without memoizing records (mapped catalogs)."""
+        if xws_id in self._canonical:
+            return MappingProxyType(self._canonical[xws_id])
+        canonical = self._aliases.get(xws_id) or strip_pack_suffixes(xws_id)
+        base = self._canonical.get(canonical)
+        if base is None:
+            return None
+        if self._with_slots and xws_id not in self._slots:
+            self._slots[xws_id] = primary_slot(base)
+        return MappingProxyType({**base, "xws": xws_id})
+
+    def slot(self, xws_id) -> str:
+        """Primary slot of an upgrade ID ("unknown" when not resolvable)."""
+        slot = self._slots.get(xws_id)
+        if slot is not None:
+            return slot
+        record = self.get(xws_id)
+        return self._slots.get(xws_id, "unknown") if record is not None else "unknown"
+
+
+# (source, kind) -> (catalog the index was built from, index). Keyed on
+# the catalog's identity so a hot-reloaded catalog gets a fresh index.
+_indexes: dict[tuple[DataSource, str], tuple[Mapping, AliasIndex]] = {}
+
+
+def load_alias_index(source: DataSource, kind: str) -> AliasIndex:
+    """Alias index over load_catalog(source)[kind] ("pilots" or "upgrades")."""
+    records = load_catalog(source)[kind]
+    entry = _indexes.get((source, kind))
+    if entry is None or entry[0] is not records:
+        entry = (records, AliasIndex(records, with_slots=(kind == "upgrades")))
+        _indexes[(source, kind)] = entry
+    return entry[1]
@@ -0,0 +1,525 @@
+"""
+Compiled catalog: pilots, ships and upgrades of one data source in one pass,
+optionally served from a prebuilt binary snapshot.
+
+Parsing the xwing-data2 trees means json.load-ing hundreds of files, and
+the pilot and ship loaders used to do it separately over the same ship
+files. `parse_catalog` walks each source once and builds all three
+lookup dicts together.
+
+`build_snapshot` (run by `python -m backend.scripts.build_catalog_snapshot`
+and the Docker build) writes both sources to SNAPSHOT_PATH:
+
+    magic (6 bytes) | format version (u16) | header length (u32)
+    header: marshal {"sources": {source: {"fingerprint", "kinds": {kind: region}}}}
+    body:   per source and kind ("pilots", "ships", "upgrades"):
+            keys    — marshal list of the record keys, in catalog order
+            offsets — u64 array, record i spans offsets[i]:offsets[i + 1]
+            records — one marshal blob per record
+
+Each source is stamped with a fingerprint of its JSON tree (relative path,
+size and mtime of every file), so a snapshot older than the data is
+ignored section by section and the source is parsed from JSON instead.
+The file is memory-mapped and only the requested section is decoded.
+
+With CATALOG_SHARED=1 the section is not decoded at all: every kind is a
+MappedCatalog, a read-only Mapping over the mapped file that decodes a
+record when it is looked up (with a small per-process memo). The file's
+pages live in the OS page cache and are shared by every worker process
+mapping it, so a worker holds only the key table instead of its own copy
+of every record, and starts without decoding the catalog.
+
+Catalogs stay in memory once loaded. start_catalog_watcher polls the
+fingerprints and, when a source's JSON changes (e.g. an external_data
+points update), rebuilds it off the request path, swaps it in atomically
+and notifies reload listeners, so workers pick up new data without a
+restart.
+
+Bump SNAPSHOT_VERSION whenever the parsing below changes shape.
+"""
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from collections.abc import Callable, Iterator, Mapping
+from functools import lru_cache
+from pathlib import Path
+
+from ...data_structures.data_source import DataSource
+from .core import ROOT_DIR, get_data_dir
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_PATH = Path(
+    os.getenv("XWING_CATALOG_SNAPSHOT", ROOT_DIR / "backend" / "data" / "xwing_catalog.snapshot")
+)
+
+_MAGIC = b"M3XCAT"
+_PREAMBLE = struct.Struct("<6sHI")
+_KINDS = ("pilots", "ships", "upgrades")
+
+CATALOG_SHARED = os.getenv("CATALOG_SHARED", "0") == "1"
+# Decoded records each MappedCatalog keeps per process.
+_MAPPED_MEMO_SIZE = 256
+
+
+def source_fingerprint(source: DataSource) -> str:
+    """Hash of (relative path, size, mtime) for every JSON file of `source`."""
+    data_dir = get_data_dir(source)
+    digest = hashlib.sha1()
+    for sub in ("pilots", "upgrades"):
+        root = data_dir / sub
+        if not root.exists():
+            continue
+        for path in sorted(root.rglob("*.json")):
+            st = path.stat()
+            digest.update(f"{path.relative_to(data_dir)}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def _add_ship(all_ships: dict, ship_data: dict) -> None:
+    xws_id = ship_data.get("xws", "")
+    if not xws_id:
+        return
+    faction_val = ship_data.get("faction", "")
+    if xws_id not in all_ships:
+        # Basic ship info
+        all_ships[xws_id] = {
+            "name": ship_data.get("name", "Unknown Ship"),
+            "xws": xws_id,
+            "faction": faction_val,
+            "factions": [faction_val] if faction_val else [],
+            "icon": ship_data.get("icon", ""),
+            "size": ship_data.get("size", "Small"),
+            "stats": ship_data.get("stats", []),
+            "actions": ship_data.get("actions", []),
+            "maneuvers": ship_data.get("maneuvers", []),
+        }
+    elif faction_val and faction_val not in all_ships[xws_id]["factions"]:
+        all_ships[xws_id]["factions"].append(faction_val)
+
+
+def _add_pilots(all_pilots: dict, ship_data: dict) -> None:
+    ship_name = ship_data.get("name", "Unknown Ship")
+    ship_icon = ship_data.get("icon", "")
+    faction = ship_data.get("faction", "")
+    ship_size = ship_data.get("size", "Small")
+
+    # Parse ship-level stats from stats array
+    stats_flat = {}
+    for s_entry in ship_data.get("stats", []):
+        stat_type = s_entry.get("type")
+        if stat_type in ("hull", "shields", "agility"):
+            stats_flat[stat_type] = s_entry.get("value", 0)
+        elif stat_type == "attack":
+            # Take max attack value if multiple arcs
+            stats_flat["attack"] = max(stats_flat.get("attack", 0), s_entry.get("value", 0))
+
+    for pilot in ship_data.get("pilots", []):
+        xws_id = pilot.get("xws", "")
+        if xws_id:
+            all_pilots[xws_id] = {
+                "name": pilot.get("name", xws_id),
+                "caption": pilot.get("caption", ""),
+                "ship": ship_name,
+                "ship_xws": ship_data.get("xws", ""),
+                "ship_icon": ship_icon,
+                "faction": faction,
+                "image": pilot.get("image", ""),
+                "artwork": pilot.get("artwork", ""),
+                "initiative": pilot.get("initiative", 0),
+                "cost": pilot.get("cost", 0),
+                "loadout": pilot.get("loadout", 0),
+                "ability": pilot.get("ability", ""),
+                # Ship stats for filtering
+                "hull": stats_flat.get("hull"),
+                "shields": stats_flat.get("shields"),
+                "agility": stats_flat.get("agility"),
+                "attack": stats_flat.get("attack"),
+                "size": ship_size,
+                "limited": pilot.get("limited", 0),
+                # Formats
+                "valid_in_standard": pilot.get("standard", False) or pilot.get("extended", False),
+                "wildspace": pilot.get("wildspace", False),
+                "epic": pilot.get("epic", False),
+            }
+
+
+def _parse_upgrades(upgrades_dir: Path) -> dict:
+    all_upgrades = {}
+    for upgrade_file in upgrades_dir.glob("*.json"):
+        try:
+            with open(upgrade_file, "r", encoding="utf-8") as f:
+                upgrades_list = json.load(f)
+
+            for upgrade in upgrades_list:
+                xws_id = upgrade.get("xws", "")
+                if xws_id:
+                    # Upgrades in xwing-data2 are in files named by slot
+                    # (e.g. talent.json); the filename stem is a good proxy
+                    # for the primary slot category.
+                    slot_category = upgrade_file.stem
+
+                    all_upgrades[xws_id] = {
+                        "name": upgrade.get("name", xws_id),
+                        "xws": xws_id,
+                        "sides": upgrade.get("sides", []),
+                        "cost": upgrade.get("cost", {}),
+                        "limited": upgrade.get("limited", 0),
+                        "slot_category": slot_category, # Normalized slot name
+                        "valid_in_standard": upgrade.get("standard", False) or upgrade.get("extended", False),
+                        "wildspace": upgrade.get("wildspace", False),
+                        "epic": upgrade.get("epic", False),
+                        "image": upgrade.get("image") or (upgrade.get("sides", [{}])[0].get("image") if upgrade.get("sides") else ""),
+                        "artwork": upgrade.get("artwork") or (upgrade.get("sides", [{}])[0].get("artwork") if upgrade.get("sides") else ""),
+                    }
+        except Exception:
+            continue
+    return all_upgrades
+
+
+def parse_catalog(source: DataSource) -> dict:
+    """Parse the JSON tree of `source` into {"pilots", "ships", "upgrades"}.
+
+    Each ship file is read once and feeds both the ship and the pilot dict.
+    """
+    data_dir = get_data_dir(source)
+    pilots_dir = data_dir / "pilots"
+    upgrades_dir = data_dir / "upgrades"
+
+    all_pilots: dict = {}
+    all_ships: dict = {}
+    if pilots_dir.exists():
+        for faction_dir in pilots_dir.iterdir():
+            if not faction_dir.is_dir():
+                continue
+            for ship_file in faction_dir.glob("*.json"):
+                try:
+                    with open(ship_file, "r", encoding="utf-8") as f:
+                        ship_data = json.load(f)
+                except Exception:
+                    continue
+                # Separate guards: a malformed pilot entry must not drop
+                # the ship, and vice versa.
+                try:
+                    _add_ship(all_ships, ship_data)
+                except Exception:
+                    pass
+                try:
+                    _add_pilots(all_pilots, ship_data)
+                except Exception:
+                    pass
+
+    all_upgrades = _parse_upgrades(upgrades_dir) if upgrades_dir.exists() else {}
+    return {"pilots": all_pilots, "ships": all_ships, "upgrades": all_upgrades}
+
+
+class MappedCatalog(Mapping):
+    """Read-only {xws: record} view over one kind of a mapped snapshot.
+
+    Only the key table is held in memory; a record is unmarshalled from
+    the mapped file on lookup, and the most recent ones are memoized.
+    Iteration follows the catalog order of the original dict. Like the
+    plain dicts, returned records are shared and must not be mutated.
+    """
+
+    def __init__(self, keys: list[str], offsets: memoryview, records: memoryview):
+        self._records = records
+        self._offsets = offsets
+        self._keys = keys
+        self._positions = {key: i for i, key in enumerate(keys)}
+        self._decode = lru_cache(maxsize=_MAPPED_MEMO_SIZE)(self._decode_at)
+
+    def _decode_at(self, i: int) -> dict:
+        return marshal.loads(self._records[self._offsets[i]:self._offsets[i + 1]])
+
+    def __getitem__(self, key) -> dict:
+        return self._decode(self._positions[key])
+
+    def __contains__(self, key) -> bool:
+        return key in self._positions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+def _open_section(path: Path, source: DataSource, fingerprint: str):
+    """(mmap, body start, section header) for a fresh section, else None."""
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, version, header_len = _PREAMBLE.unpack_from(mm, 0)
+        if magic != _MAGIC or version != SNAPSHOT_VERSION:
+            mm.close()
+            return None
+        body_start = _PREAMBLE.size + header_len
+        header = marshal.loads(mm[_PREAMBLE.size:body_start])
+        section = header["sources"].get(source.value)
+        if not section or section["fingerprint"] != fingerprint:
+            mm.close()
+            return None
+    except BaseException:
+        mm.close()
+        raise
+    return mm, body_start, section
+
+
+def _kind_views(view: memoryview, region: dict) -> tuple[list[str], memoryview, memoryview]:
+    """(keys, offsets, records) of one kind region of the snapshot body."""
+    keys_at, keys_len = region["keys"]
+    offsets_at, offsets_len = region["offsets"]
+    return (
+        marshal.loads(view[keys_at:keys_at + keys_len]),
+        view[offsets_at:offsets_at + offsets_len].cast("Q"),
+        view[region["records"]:region["end"]],
+    )
+
+
+def read_snapshot(source: DataSource, fingerprint: str, path: Path | None = None) -> dict | None:
+    """The snapshot section for `source` as plain dicts, or None if missing
+    or stale."""
+    path = path or SNAPSHOT_PATH
+    try:
+        opened = _open_section(path, source, fingerprint)
+        if opened is None:
+            return None
+        mm, body_start, section = opened
+        with mm, memoryview(mm)[body_start:] as view:
+            catalog = {}
+            for kind in _KINDS:
+                keys, offsets, records = _kind_views(view, section["kinds"][kind])
+                with offsets, records:
+                    catalog[kind] = {
+                        key: marshal.loads(records[offsets[i]:offsets[i + 1]])
+                        for i, key in enumerate(keys)
+                    }
+            return catalog
+    except (OSError, ValueError, EOFError, TypeError, KeyError, struct.error):
+        return None
+
+
+def map_snapshot(source: DataSource, fingerprint: str, path: Path | None = None) -> dict | None:
+    """Like read_snapshot, but each kind is a MappedCatalog over the file.
+
+    The mapping stays open for as long as any of the views is referenced.
+    """
+    path = path or SNAPSHOT_PATH
+    try:
+        opened = _open_section(path, source, fingerprint)
+        if opened is None:
+            return None
+        mm, body_start, section = opened
+        view = memoryview(mm)[body_start:]
+        return {
+            kind: MappedCatalog(*_kind_views(view, section["kinds"][kind]))
+            for kind in _KINDS
+        }
+    except (OSError, ValueError, EOFError, TypeError, KeyError, struct.error):
+        return None
+
+
+def _encode_kind(records: Mapping, offset: int) -> tuple[dict, list[bytes]]:
+    """Region header and blobs (keys, offsets, records) for one kind."""
+    keys = list(records)
+    keys_blob = marshal.dumps(keys)
+    blobs = [marshal.dumps(records[key]) for key in keys]
+    ends = array("Q", [0])
+    for blob in blobs:
+        ends.append(ends[-1] + len(blob))
+    # Pad so the offsets array is 8-byte aligned in the file.
+    offsets_at = offset + len(keys_blob)
+    padding = b"\0" * (-offsets_at % ends.itemsize)
+    offsets_at += len(padding)
+    offsets_blob = ends.tobytes()
+    records_at = offsets_at + len(offsets_blob)
+    region = {
+        "keys": (offset, len(keys_blob)),
+        "offsets": (offsets_at, len(offsets_blob)),
+        "records": records_at,
+        "end": records_at + ends[-1],
+    }
+    return region, [keys_blob, padding, offsets_blob, *blobs]
+
+
+def write_snapshot(catalogs: dict, path: Path | None = None) -> Path:
+    """Write {source: (fingerprint, catalog)} atomically to `path`."""
+    path = path or SNAPSHOT_PATH
+    sections = {}
+    blobs = []
+    offset = 0
+    for source, (fingerprint, catalog) in catalogs.items():
+        kinds = {}
+        for kind in _KINDS:
+            region, kind_blobs = _encode_kind(catalog[kind], offset)
+            kinds[kind] = region
+            blobs.extend(kind_blobs)
+            offset = region["end"]
+        sections[DataSource(source).value] = {"fingerprint": fingerprint, "kinds": kinds}
+    header = marshal.dumps({"sources": sections})
+    # Offsets are relative to the body; keep the body 8-byte aligned too.
+    header += b"\0" * (-(_PREAMBLE.size + len(header)) % 8)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(_PREAMBLE.pack(_MAGIC, SNAPSHOT_VERSION, len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, path)
+    return path
+
+
+def build_snapshot(path: Path | None = None) -> Path:
+    """Parse every data source from JSON and write a fresh snapshot."""
+    return write_snapshot(
+        {source: (source_fingerprint(source), parse_catalog(source)) for source in DataSource},
+        path,
+    )
+
+
+# The live catalogs. A reload builds a new dict and swaps the entry, so a
+# reader holding the previous catalog keeps a consistent (old) view; a
+# replaced snapshot file stays mapped until its last view is dropped.
+_catalogs: dict[DataSource, dict] = {}
+# Fingerprint each loaded catalog was checked against, and the sources
+# that were parsed from JSON since the snapshot was last written.
+_fingerprints: dict[DataSource, str] = {}
+_stale_sources: set[DataSource] = set()
+_store_lock = threading.Lock()
+_reload_listeners: list[Callable[[DataSource], None]] = []
+
+
+def _load_source(source: DataSource, fingerprint: str) -> tuple[dict, bool]:
+    """(catalog, parsed from JSON?) for `source` at `fingerprint`.
+
+    In shared mode a missing or stale snapshot is rebuilt first, so that
+    every worker maps the same file rather than parsing its own copy.
+    Concurrent rebuilds by several workers are harmless (os.replace).
+    """
+    if CATALOG_SHARED:
+        catalog = map_snapshot(source, fingerprint)
+        if catalog is None:
+            try:
+                build_snapshot()
+            except OSError as e:
+                print(f"[catalog] could not write snapshot: {e}")
+            catalog = map_snapshot(source, fingerprint)
+    else:
+        catalog = read_snapshot(source, fingerprint)
+    if catalog is not None:
+        return catalog, False
+    return parse_catalog(source), True
+
+
+def load_catalog(source: DataSource = DataSource.XWA) -> dict:
+    """{"pilots", "ships", "upgrades"} for `source`: snapshot if fresh, else JSON.
+
+    Loaded once, then served from memory (or from the mapped snapshot, see
+    CATALOG_SHARED) until reload_if_changed swaps in a rebuilt catalog.
+    """
+    catalog = _catalogs.get(source)
+    if catalog is not None:
+        return catalog
+    with _store_lock:
+        catalog = _catalogs.get(source)
+        if catalog is None:
+            fingerprint = source_fingerprint(source)
+            catalog, parsed = _load_source(source, fingerprint)
+            if parsed:
+                _stale_sources.add(source)
+            _fingerprints[source] = fingerprint
+            _catalogs[source] = catalog
+    return catalog
+
+
+def add_reload_listener(listener: Callable[[DataSource], None]) -> None:
+    """Call `listener(source)` after a reloaded catalog has been swapped in."""
+    _reload_listeners.append(listener)
+
+
+def reload_if_changed() -> list[DataSource]:
+    """Rebuild every loaded source whose JSON tree changed; return them.
+
+    The fingerprint is taken before parsing, so files still changing
+    during the parse are picked up again by the next call. A snapshot
+    already rebuilt for the new data (by another worker, or the build
+    script) is used instead of parsing.
+    """
+    changed = []
+    for source in list(_catalogs):
+        fingerprint = source_fingerprint(source)
+        if fingerprint == _fingerprints.get(source):
+            continue
+        catalog, parsed = _load_source(source, fingerprint)
+        with _store_lock:
+            _catalogs[source] = catalog
+            _fingerprints[source] = fingerprint
+            if parsed:
+                _stale_sources.add(source)
+        changed.append(source)
+
+    for source in changed:
+        for listener in _reload_listeners:
+            try:
+                listener(source)
+            except Exception as e:
+                print(f"[catalog] reload listener failed for {source.value}: {e}")
+    if changed:
+        _refresh_snapshot()
+    return changed
+
+
+def _refresh_snapshot() -> None:
+    """Rewrite the snapshot file if any loaded source was parsed from JSON.
+
+    Best-effort: the data directory may be read-only.
+    """
+    with _store_lock:
+        if not _stale_sources:
+            return
+        _stale_sources.clear()
+        sections = {
+            source: (_fingerprints[source], catalog)
+            for source, catalog in _catalogs.items()
+        }
+    try:
+        write_snapshot(sections)
+    except OSError as e:
+        print(f"[catalog] could not write snapshot: {e}")
+
+
+def warm_catalog() -> None:
+    """Load every source, refreshing the snapshot file if it was stale.
+
+    Meant for a background thread at startup, so no request pays for the
+    JSON parse.
+    """
+    for source in DataSource:
+        load_catalog(source)
+    _refresh_snapshot()
+
+
+def start_catalog_watcher(interval: float) -> threading.Thread:
+    """Poll the data directories every `interval` seconds in a daemon thread
+    and hot-reload changed catalogs (see reload_if_changed)."""
+    def _run():
+        while True:
+            time.sleep(interval)
+            try:
+                changed = reload_if_changed()
+                if changed:
+                    print(f"[catalog] reloaded {', '.join(s.value for s in changed)}")
+            except Exception as e:
+                print(f"[catalog] reload check failed: {e}")
+
+    thread = threading.Thread(target=_run, daemon=True, name="catalog-watcher")
+    thread.start()
+    return thread
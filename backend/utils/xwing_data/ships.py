@@ -1,51 +1,9 @@
-import json
-from functools import lru_cache
 from ...data_structures.data_source import DataSource
-from .core import get_data_dir
+from .catalog import load_catalog
 
-@lru_cache(maxsize=4)
 def load_all_ships(source: DataSource = DataSource.XWA) -> dict:
     """Load all ships. Returns dict mapping xws ID to ship info."""
-    data_dir = get_data_dir(source)
-    pilots_dir = data_dir / "pilots"
-    
-    if not pilots_dir.exists():
-        return {}
-    
-    all_ships = {}
-    
-    for faction_dir in pilots_dir.iterdir():
-        if not faction_dir.is_dir():
-            continue
-        
-        for ship_file in faction_dir.glob("*.json"):
-            try:
-                with open(ship_file, "r", encoding="utf-8") as f:
-                    ship_data = json.load(f)
-                
-                xws_id = ship_data.get("xws", "")
-                if xws_id:
-                    faction_val = ship_data.get("faction", "")
-                    if xws_id not in all_ships:
-                        # Basic ship info
-                        all_ships[xws_id] = {
-                            "name": ship_data.get("name", "Unknown Ship"),
-                            "xws": xws_id,
-                            "faction": faction_val,
-                            "factions": [faction_val] if faction_val else [],
-                            "icon": ship_data.get("icon", ""),
-                            "size": ship_data.get("size", "Small"),
-                            "stats": ship_data.get("stats", []),
-                            "actions": ship_data.get("actions", []),
-                            "maneuvers": ship_data.get("maneuvers", []),
-                        }
-                    else:
-                        if faction_val and faction_val not in all_ships[xws_id]["factions"]:
-                            all_ships[xws_id]["factions"].append(faction_val)
-            except Exception:
-                continue
-            
-    return all_ships
+    return load_catalog(source)["ships"]
 
 def get_ship_info(xws_ship: str, source: DataSource = DataSource.XWA) -> dict | None:
     """Get full ship info from XWS ID."""
@@ -21,7 +21,7 @@ Run performance tests against a local Docker stack or a live deployment.
 
 Options:
   --target TARGET   local (default) or live
-  --mode MODE       smoke (default) | baseline | soak | stress | spike | all
+  --mode MODE       smoke (default) | baseline | soak | stress | spike | concurrency | all
   --reports-dir DIR Reports directory (default: reports/)
   -h, --help        Show this help
 
@@ -51,7 +51,7 @@ case "$TARGET" in
 esac
 
 case "$MODE" in
-    smoke|baseline|soak|stress|spike|all) ;;
+    smoke|baseline|soak|stress|spike|concurrency|all) ;;
     *) echo "ERROR: Invalid mode '$MODE'"; usage; exit 1 ;;
 esac
 
@@ -160,6 +160,12 @@ run_k6_spike() {
         --out json="$REPORTS_DIR/k6-spike.json" || true
 }
 
+run_k6_concurrency() {
+    log "Running k6 concurrency..."
+    TARGET_URL="$TARGET_URL" k6 run "$PROJECT_ROOT/tests/performance/k6/concurrency.js" \
+        --out json="$REPORTS_DIR/k6-concurrency.json" || true
+}
+
 run_lighthouse() {
     log "Running Lighthouse..."
     LIGHTHOUSE_URL="$LIGHTHOUSE_URL" REPORTS_DIR="$REPORTS_DIR" \
@@ -238,12 +244,20 @@ case "$MODE" in
             run_docker_stats
         fi
         ;;
+    concurrency)
+        run_k6_smoke
+        run_k6_concurrency
+        if [ "$TARGET" = "local" ]; then
+            run_docker_stats
+        fi
+        ;;
     all)
         run_k6_smoke
         run_k6_baseline
         run_k6_soak
         run_k6_stress
         run_k6_spike
+        run_k6_concurrency
         run_lighthouse
         if [ "$TARGET" = "local" ]; then
             run_benchmarks
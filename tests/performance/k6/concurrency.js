@@ -0,0 +1,77 @@
+import http from 'k6/http';
+import { check, sleep } from 'k6';
+import { Rate, Trend } from 'k6/metrics';
+
+// 200 concurrent clients on a mix of the cached hot endpoints (served on
+// the event loop once warm) and detail endpoints (database per request).
+// The two are tracked separately: detail latency must stay flat while
+// the hot endpoints are under load.
+
+const targetUrl = __ENV.TARGET_URL || 'http://localhost:8888';
+
+const errorRate = new Rate('errors');
+const hotDuration = new Trend('hot_duration', true);
+const detailDuration = new Trend('detail_duration', true);
+
+export const options = {
+  stages: [
+    { duration: '20s', target: 50 },
+    { duration: '20s', target: 200 },
+    { duration: '60s', target: 200 },
+    { duration: '20s', target: 0 },
+  ],
+  thresholds: {
+    errors: ['rate<0.02'],
+    hot_duration: ['p(95)<500'],
+    detail_duration: ['p(95)<1500'],
+    http_req_failed: ['rate<0.02'],
+  },
+};
+
+const hotEndpoints = [
+  '/api/meta-snapshot',
+  '/api/tournaments',
+  '/api/lists',
+  '/api/cards/pilots',
+  '/api/cards/upgrades',
+  '/api/ships',
+  '/api/squadrons',
+];
+
+const detailEndpoints = [
+  '/api/tournaments/1',
+  '/api/tournaments/2',
+  '/api/tournaments/3',
+];
+
+export default function () {
+  const hot = Math.random() < 0.7;
+  const pool = hot ? hotEndpoints : detailEndpoints;
+  const path = pool[Math.floor(Math.random() * pool.length)];
+  const res = http.get(`${targetUrl}${path}`);
+
+  check(res, {
+    'status 200 or 404': (r) => r.status === 200 || r.status === 404,
+  });
+
+  errorRate.add(res.status >= 500 || res.status === 0);
+  (hot ? hotDuration : detailDuration).add(res.timings.duration);
+  sleep(Math.random() * 0.2 + 0.05);
+}
+
+export function handleSummary(data) {
+  const p95 = (name) => (data.metrics[name] ? data.metrics[name].values['p(95)'] : 0);
+  return {
+    stdout: JSON.stringify({
+      summary: {
+        mode: 'concurrency',
+        total_requests: data.metrics.http_reqs ? data.metrics.http_reqs.values.count : 0,
+        p95: p95('http_req_duration'),
+        p99: data.metrics.http_req_duration ? data.metrics.http_req_duration.values['p(99)'] : 0,
+        hot_p95: p95('hot_duration'),
+        detail_p95: p95('detail_duration'),
+        error_rate: data.metrics.http_req_failed ? data.metrics.http_req_failed.values.rate : 0,
+      },
+    }),
+  };
+}